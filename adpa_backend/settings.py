@@ -167,6 +167,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Local memory is per process: signal-based invalidation only reaches the
+# process that made the change, other workers catch up when entries expire.
+# Point this at a shared backend (Redis/Memcached) when running several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+DASHBOARD_METRICS_CACHE_TIMEOUT = 300  # seconds
+SURVEY_DOCUMENT_CACHE_TIMEOUT = 60 * 60 * 24  # seconds
+
+# Accept survey submissions into a staging table; run
+# `manage.py ingest_survey_submissions --loop` to write them
+SURVEY_STAGED_SUBMISSIONS = False
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
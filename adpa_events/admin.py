@@ -3,18 +3,22 @@ from .models import (
     User,
     Event,
     EventRegistration,
+    WaitlistEntry,
     Survey,
     Question,
     Choice,
     SurveyResponse,
-    Answer
+    Answer,
+    StagedSubmission
 )
 # Register your models here.
 admin.site.register(User)
 admin.site.register(Event)
 admin.site.register(EventRegistration)
+admin.site.register(WaitlistEntry)
 admin.site.register(Survey)
 admin.site.register(Question)
 admin.site.register(Choice)
 admin.site.register(SurveyResponse)
 admin.site.register(Answer)
+admin.site.register(StagedSubmission)
@@ -6,5 +6,5 @@ class AdpaEventsConfig(AppConfig):
     name = 'adpa_events'
     
     def ready(self):
-        # Import signals or other startup code here if needed
-        pass
\ No newline at end of file
+        # Retire cached survey documents when surveys, questions or choices change
+        from . import signals  # noqa: F401
@@ -0,0 +1,67 @@
+"""
+Bulk attendance check-in.
+
+A batch of badge scans (registration ids or user emails) is resolved with
+one query and applied with one statement: live scans share the current
+time and become a single UPDATE ... WHERE id IN (...), while offline scans carry the time they were taken on the scanner and
+are written with bulk_update. Scans are idempotent: replaying a batch reports
+the registrations as already checked in and keeps the earliest scan time,
+so a scanner can safely resend its queue after reconnecting.
+"""
+
+from django.db.models import Q
+from django.utils import timezone
+from .models import EventRegistration
+
+CHECK_IN_BATCH_LIMIT = 1000  # scans per request
+
+
+def check_in(event_id, scans):
+    """
+    Check in a batch of scans for an event.
+
+    scans is a list of dicts with either 'registration' or 'email', and
+    'scanned_at' for scans taken offline. Returns one result per scan, in
+    order, each echoing the scan with the matched 'registration' and a
+    'status' of checked_in, already_checked_in or not_registered.
+    """
+    ids = {scan['registration'] for scan in scans if 'registration' in scan}
+    emails = {scan['email'] for scan in scans if 'email' in scan}
+    rows = {
+        row[0]: row for row in
+        EventRegistration.objects.filter(event_id=event_id)
+        .filter(Q(pk__in=ids) | Q(user__email__in=emails))
+        .values_list('pk', 'user__email', 'attended', 'checked_in_at')
+    }
+    by_email = {row[1]: row for row in rows.values()}
+
+    now = timezone.now()
+    results = []
+    earliest = {}
+    for scan in scans:
+        row = rows.get(scan['registration']) if 'registration' in scan else by_email.get(scan['email'])
+        result = dict(scan)
+        if row is None:
+            result['status'] = 'not_registered'
+            results.append(result)
+            continue
+        pk, _, attended, _ = row
+        result['registration'] = pk
+        result['status'] = 'already_checked_in' if attended or pk in earliest else 'checked_in'
+        scanned_at = scan.get('scanned_at') or now
+        earliest[pk] = min(scanned_at, earliest.get(pk, scanned_at))
+        results.append(result)
+
+    # Write new check-ins, and earlier scan times for ones already stored
+    changed = {
+        pk: scanned_at for pk, scanned_at in earliest.items()
+        if not rows[pk][2] or rows[pk][3] is None or scanned_at < rows[pk][3]
+    }
+    if changed and set(changed.values()) == {now}:
+        EventRegistration.objects.filter(pk__in=changed).update(attended=True, checked_in_at=now)
+    elif changed:
+        EventRegistration.objects.bulk_update(
+            [EventRegistration(pk=pk, attended=True, checked_in_at=t) for pk, t in changed.items()],
+            ['attended', 'checked_in_at']
+        )
+    return results
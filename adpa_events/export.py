@@ -0,0 +1,146 @@
+"""
+Streaming export of survey responses.
+
+Responses are read with a single query through a server-side cursor
+(iterator(chunk_size=...)) and written out one response at a time, so
+memory use does not depend on the size of the survey. Two layouts are
+available:
+
+csv
+    One row per response, one column per question. Choice answers are
+    written as the choice text; checkbox answers are joined with '; '.
+
+columnar
+    Newline-delimited JSON in the spirit of Parquet row groups. The first
+    line is the schema with a codebook of choices per question; every
+    following line holds one group of rows as column arrays, with choices
+    dictionary-encoded as their position in the codebook.
+"""
+
+import csv
+import json
+from django.conf import settings
+from .models import SurveyResponse
+from .survey_documents import get_survey_document
+
+SURVEY_EXPORT_CHUNK_SIZE = 2000  # rows fetched per round trip
+SURVEY_EXPORT_ROW_GROUP_SIZE = 5000  # responses per columnar row group
+
+EXPORT_FORMATS = ('csv', 'columnar')
+
+BASE_COLUMNS = ['response_id', 'user', 'submitted_at']
+
+
+class Echo:
+    """File-like object whose write() returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def export_schema(survey_id):
+    """Return the survey's questions in display order from its cached document."""
+    document, _ = get_survey_document(survey_id)
+    return [
+        {
+            'id': question['id'],
+            'text': question['text'],
+            'question_type': question['question_type'],
+            'choices': [choice['text'] for choice in question['choices']],
+            'codes': {choice['id']: index for index, choice in enumerate(question['choices'])},
+        }
+        for question in document['questions']
+    ]
+
+
+def iter_responses(survey_id):
+    """
+    Yield (response_id, user, submitted_at, answers) per response of a survey.
+
+    answers maps question id to a list of (choice_id, text_answer) pairs.
+    """
+    rows = (
+        SurveyResponse.objects.filter(survey_id=survey_id)
+        .order_by('id')
+        .values_list(
+            'id', 'user__email', 'submitted_at',
+            'adpa_answers__question_id', 'adpa_answers__choice_answer_id', 'adpa_answers__text_answer'
+        )
+        .iterator(chunk_size=getattr(settings, 'SURVEY_EXPORT_CHUNK_SIZE', SURVEY_EXPORT_CHUNK_SIZE))
+    )
+    current = None
+    for response_id, user, submitted_at, question_id, choice_id, text in rows:
+        if current is None or current[0] != response_id:
+            if current is not None:
+                yield current
+            current = (response_id, user, submitted_at, {})
+        if question_id is not None:
+            current[3].setdefault(question_id, []).append((choice_id, text))
+    if current is not None:
+        yield current
+
+
+def iter_csv(survey_id):
+    """Yield the export as CSV lines."""
+    schema = export_schema(survey_id)
+    choice_text = {
+        choice_id: question['choices'][index]
+        for question in schema
+        for choice_id, index in question['codes'].items()
+    }
+    writer = csv.writer(Echo())
+    yield writer.writerow(BASE_COLUMNS + [question['text'] for question in schema])
+    for response_id, user, submitted_at, answers in iter_responses(survey_id):
+        row = [response_id, user, submitted_at.isoformat()]
+        for question in schema:
+            values = [
+                text if choice_id is None else choice_text.get(choice_id, '')
+                for choice_id, text in answers.get(question['id'], [])
+            ]
+            row.append('; '.join(value for value in values if value))
+        yield writer.writerow(row)
+
+
+def iter_columnar(survey_id):
+    """Yield the export as newline-delimited JSON: a schema line, then row groups."""
+    schema = export_schema(survey_id)
+    group_size = getattr(settings, 'SURVEY_EXPORT_ROW_GROUP_SIZE', SURVEY_EXPORT_ROW_GROUP_SIZE)
+    yield json.dumps({
+        'survey': survey_id,
+        'columns': BASE_COLUMNS + [f"q{question['id']}" for question in schema],
+        'questions': [
+            {key: question[key] for key in ('id', 'text', 'question_type', 'choices')}
+            for question in schema
+        ],
+    }) + '\n'
+
+    def empty_group():
+        return {column: [] for column in BASE_COLUMNS + [f"q{question['id']}" for question in schema]}
+
+    group = empty_group()
+    rows = 0
+    for response_id, user, submitted_at, answers in iter_responses(survey_id):
+        group['response_id'].append(response_id)
+        group['user'].append(user)
+        group['submitted_at'].append(submitted_at.isoformat())
+        for question in schema:
+            given = answers.get(question['id'], [])
+            if question['question_type'] == 'text':
+                value = given[0][1] if given else None
+            else:
+                codes = [question['codes'][c] for c, _ in given if c in question['codes']]
+                value = codes if question['question_type'] == 'checkbox' else (codes[0] if codes else None)
+            group[f"q{question['id']}"].append(value)
+        rows += 1
+        if rows == group_size:
+            yield json.dumps({'rows': rows, 'columns': group}) + '\n'
+            group, rows = empty_group(), 0
+    if rows:
+        yield json.dumps({'rows': rows, 'columns': group}) + '\n'
+
+
+def iter_export(survey_id, export_format='csv'):
+    """Yield the export of a survey in the given format ('csv' or 'columnar')."""
+    if export_format == 'columnar':
+        return iter_columnar(survey_id)
+    return iter_csv(survey_id)
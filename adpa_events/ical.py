@@ -0,0 +1,206 @@
+"""
+iCalendar feeds of events.
+
+There is a public feed of current public events and a private feed per user of
+the events they are registered for, addressed by a signed token so
+calendar apps can poll it without logging in.
+
+Calendar apps poll every few minutes, so the conditional GET has to be
+free: every feed has a version made of the events version (moved by any
+Event change) and, for user feeds, the user's registrations version
+(moved when they register or cancel). Versions are timestamps kept in
+the cache; the ETag and Last-Modified come from them, so a poll that
+ends in 304 runs no queries. A changed feed is rebuilt with one query,
+and every VEVENT is rendered once per event version and reused by all
+feeds that contain it.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from .models import Event
+
+CALENDAR_FEED_CACHE_TIMEOUT = 60 * 60 * 24  # seconds
+CALENDAR_PUBLIC_FEED_PAST_DAYS = 30  # ended events kept in the public feed
+
+FEED_SALT = 'adpa_events.calendar-feed'
+EVENT_FIELDS = ('id', 'title', 'description', 'start_date', 'end_date', 'location', 'updated_at')
+
+
+def _timeout():
+    return getattr(settings, 'CALENDAR_FEED_CACHE_TIMEOUT', CALENDAR_FEED_CACHE_TIMEOUT)
+
+
+def _events_version_key():
+    return 'adpa_events:calendar:events:version'
+
+
+def _user_version_key(user_id):
+    return f'adpa_events:calendar:user:{user_id}:version'
+
+
+def feed_token(user_id):
+    """Return the signed token that addresses a user's private feed."""
+    return signing.Signer(salt=FEED_SALT).sign(str(user_id))
+
+
+def feed_url(user_id=None):
+    """Absolute URL of the public feed, or of a user's private feed."""
+    if user_id is None:
+        path = reverse('calendar-public-feed')
+    else:
+        path = reverse('calendar-user-feed', kwargs={'token': feed_token(user_id)})
+    return settings.SITE_URL + path
+
+
+def calendar_links(event, user_id=None):
+    """Links for adding an event to a calendar, for the registration email."""
+    google = 'https://calendar.google.com/calendar/render?' + urlencode({
+        'action': 'TEMPLATE',
+        'text': event.title,
+        'dates': f'{_format_datetime(event.start_date)}/{_format_datetime(event.end_date)}',
+        'location': event.location,
+    })
+    return {'google': google, 'ical': feed_url(user_id)}
+
+
+def user_for_token(token):
+    """Return the user id of a feed token, or None if it is not valid. Runs no queries."""
+    try:
+        return int(signing.Signer(salt=FEED_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def _now_version():
+    return int(timezone.now().timestamp() * 1000000)
+
+
+def feed_version(user_id=None):
+    """Return the feed's versions as a tuple; unknown versions start now."""
+    keys = [_events_version_key()] if user_id is None else [_events_version_key(), _user_version_key(user_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _now_version(), _timeout())
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def feed_etag(user_id=None):
+    scope = 'public' if user_id is None else f'user-{user_id}'
+    return f"calendar-{scope}-{'-'.join(str(v) for v in feed_version(user_id))}"
+
+
+def feed_last_modified(user_id=None):
+    return datetime.fromtimestamp(max(feed_version(user_id)) / 1000000, tz=dt_timezone.utc)
+
+
+def invalidate_calendar_feeds(user_ids=None):
+    """
+    Move the events version (every feed), or the given users' versions, on commit.
+
+    Moving versions after commit keeps a concurrent rebuild from caching the
+    data being replaced under the new version.
+    """
+    if user_ids is None:
+        keys = [_events_version_key()]
+    else:
+        keys = [_user_version_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, _now_version()), _timeout()))
+
+
+def get_feed(user_id=None):
+    """Return the iCalendar text of the public feed, or of a user's feed."""
+    key = f"adpa_events:calendar:feed:{feed_etag(user_id)}"
+    feed = cache.get(key)
+    if feed is None:
+        feed = _build_feed(user_id)
+        cache.set(key, feed, _timeout())
+    return feed
+
+
+def _build_feed(user_id):
+    if user_id is None:
+        events = Event.objects.filter(
+            is_public=True,
+            end_date__gte=timezone.now() - timedelta(
+                days=getattr(settings, 'CALENDAR_PUBLIC_FEED_PAST_DAYS', CALENDAR_PUBLIC_FEED_PAST_DAYS)
+            )
+        )
+        name = 'ADPA Events'
+    else:
+        events = Event.objects.filter(adpa_registrations__user_id=user_id)
+        name = 'My ADPA Events'
+    rows = list(events.order_by('start_date', 'id').values(*EVENT_FIELDS))
+
+    # Reuse rendered VEVENTs; only events changed since they were cached are rendered
+    keys = {row['id']: _vevent_key(row) for row in rows}
+    cached = cache.get_many(keys.values())
+    missing = {keys[row['id']]: _render_vevent(row) for row in rows if keys[row['id']] not in cached}
+    if missing:
+        cache.set_many(missing, _timeout())
+        cached.update(missing)
+
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//ADPA//Events//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        _fold(f'X-WR-CALNAME:{_escape(name)}'),
+    ]
+    body = '\r\n'.join(lines) + '\r\n'
+    body += ''.join(cached[keys[row['id']]] for row in rows)
+    return body + 'END:VCALENDAR\r\n'
+
+
+def _vevent_key(row):
+    return f"adpa_events:calendar:vevent:{row['id']}:{int(row['updated_at'].timestamp() * 1000000)}"
+
+
+def _render_vevent(row):
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:event-{row['id']}@adpa",
+        f"DTSTAMP:{_format_datetime(row['updated_at'])}",
+        f"DTSTART:{_format_datetime(row['start_date'])}",
+        f"DTEND:{_format_datetime(row['end_date'])}",
+        f"SUMMARY:{_escape(row['title'])}",
+        f"DESCRIPTION:{_escape(row['description'])}",
+        f"LOCATION:{_escape(row['location'])}",
+        f"URL:{settings.SITE_URL}/events/{row['id']}/",
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) + '\r\n' for line in lines)
+
+
+def _format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _escape(text):
+    return (
+        text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Fold a content line at 75 octets, as RFC 5545 requires."""
+    if len(line.encode()) <= 75:
+        return line
+    parts, current, limit = [], '', 75
+    for char in line:
+        if len((current + char).encode()) > limit:
+            parts.append(current)
+            current, limit = char, 74
+        else:
+            current += char
+    parts.append(current)
+    return '\r\n '.join(parts)
@@ -0,0 +1,114 @@
+"""
+Staged survey submission ingestion.
+
+With SURVEY_STAGED_SUBMISSIONS enabled, submissions are validated and
+appended to StagedSubmission, and the request is acknowledged right away.
+The ingest_survey_submissions command drains the staging table in
+batches: it keeps the first submission per (survey, user), skips users
+who have already responded, and writes the rest with one bulk insert for
+responses and one for answers, then adds the answers to the results
+tallies.
+"""
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from .models import Answer, Choice, Question, StagedSubmission, SurveyResponse
+from .results import record_answers
+
+SURVEY_INGEST_BATCH_SIZE = 500
+
+
+def staged_submissions_enabled():
+    return getattr(settings, 'SURVEY_STAGED_SUBMISSIONS', False)
+
+
+def stage_submission(survey_id, user_id, answers):
+    """Append a validated submission to the staging table."""
+    return StagedSubmission.objects.create(survey_id=survey_id, user_id=user_id, answers=list(answers))
+
+
+def ingest_staged_submissions(batch_size=None):
+    """
+    Ingest one batch of staged submissions.
+
+    Claimed rows are locked with SKIP LOCKED, so several ingesters can run
+    side by side. Returns a (created, duplicates) tuple for the batch.
+    """
+    batch_size = batch_size or getattr(settings, 'SURVEY_INGEST_BATCH_SIZE', SURVEY_INGEST_BATCH_SIZE)
+    with transaction.atomic():
+        batch = list(
+            StagedSubmission.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+
+        # Like a direct submission, the first one per (survey, user) wins
+        first = {}
+        for staged in batch:
+            first.setdefault((staged.survey_id, staged.user_id), staged)
+        existing = set(
+            SurveyResponse.objects.filter(
+                survey_id__in={survey_id for survey_id, _ in first},
+                user_id__in={user_id for _, user_id in first}
+            ).values_list('survey_id', 'user_id')
+        )
+        pending = [staged for key, staged in first.items() if key not in existing]
+
+        created = _create_responses(pending)
+        _create_answers(created)
+        StagedSubmission.objects.filter(pk__in=[staged.pk for staged in batch]).delete()
+
+    return len(created), len(batch) - len(created)
+
+
+def _create_responses(pending):
+    """Bulk insert the responses; returns (staged, response) pairs that were written."""
+    responses = [SurveyResponse(survey_id=s.survey_id, user_id=s.user_id) for s in pending]
+    try:
+        with transaction.atomic():
+            SurveyResponse.objects.bulk_create(responses)
+        return list(zip(pending, responses))
+    except IntegrityError:
+        pass
+
+    # A direct submission got in first; fall back to row by row for this batch
+    created = []
+    for staged, response in zip(pending, responses):
+        try:
+            with transaction.atomic():
+                response.save()
+            created.append((staged, response))
+        except IntegrityError:
+            continue
+    return created
+
+
+def _create_answers(created):
+    """
+    Bulk insert the answers of the written responses.
+
+    Answers were validated when they were staged; any whose question or
+    choice has been removed since are dropped. The check reads the
+    database rather than the cached survey documents, which are only
+    retired once the removal commits.
+    """
+    if not created:
+        return
+    survey_ids = {staged.survey_id for staged, _ in created}
+    questions = set(Question.objects.filter(survey_id__in=survey_ids).values_list('id', flat=True))
+    choices = dict(Choice.objects.filter(question__survey_id__in=survey_ids).values_list('id', 'question_id'))
+    answers = []
+    for staged, response in created:
+        for answer in staged.answers:
+            question_id = answer['question_id']
+            choice = answer.get('choice_answer_id')
+            if question_id not in questions or (choice is not None and choices.get(choice) != question_id):
+                continue
+            answers.append(Answer(
+                response=response,
+                question_id=question_id,
+                choice_answer_id=choice,
+                text_answer=answer.get('text_answer')
+            ))
+    Answer.objects.bulk_create(answers, batch_size=1000)
+    record_answers(answers)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from adpa_events.models import Event
+from adpa_events.views import EventList
+from members.views import EventListView
+from utils.benchmark import measure, rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Time the event listings against a large event table (the events are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100000, help='Number of events to create')
+        parser.add_argument(
+            '--pages',
+            default='1,100,1000,4000',
+            help='Comma-separated page numbers to time on each listing'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per page (best is reported)')
+
+    def handle(self, *args, **options):
+        pages = [int(page) for page in options['pages'].split(',')]
+        self.stdout.write(f"Listing {options['events']} events on {connection.vendor}...")
+        with rolled_back():
+            user = self.create_events(options['events'])
+            self.stdout.write(str(Event.objects.upcoming().explain()))
+            listings = (
+                ('events/ (all)', EventList.as_view(), pages),
+                ('events/upcoming/', EventListView.as_view(), pages),
+            )
+            for label, view, numbers in listings:
+                for page in numbers:
+                    elapsed, queries = self.measure(view, user, {'page': page}, options['repeat'])
+                    self.stdout.write(f'{label:<18} page {page:<5} {elapsed * 1000:8.1f} ms  {queries} queries')
+                for page, elapsed, queries in self.measure_keyset(view, user, numbers, options['repeat']):
+                    self.stdout.write(f'{label:<18} keyset {page:<5} {elapsed * 1000:6.1f} ms  {queries} queries')
+
+    def create_events(self, count):
+        user = User.objects.create(email='benchmark-events@example.com')
+        now = timezone.now()
+        types = [choice for choice, _ in Event.EVENT_TYPE_CHOICES]
+        # Half in the past, half upcoming
+        Event.objects.bulk_create([
+            Event(
+                title=f'Event {i}',
+                description='Benchmark event',
+                event_type=types[i % len(types)],
+                start_date=now + timedelta(minutes=i - count // 2),
+                end_date=now + timedelta(minutes=i - count // 2 + 60),
+                location='Luanda',
+                is_public=i % 10 != 0,
+                organizer=user
+            )
+            for i in range(count)
+        ], batch_size=5000)
+        return user
+
+    def measure_keyset(self, view, user, pages, repeat):
+        """Follow ?cursor= next links and time the requested pages."""
+        params, page, results = {'cursor': ''}, 1, []
+        while page <= max(pages):
+            if page in pages:
+                elapsed, queries = self.measure(view, user, params, repeat)
+                results.append((page, elapsed, queries))
+            request = APIRequestFactory().get('/', params, HTTP_HOST='localhost')
+            force_authenticate(request, user=user)
+            response = view(request)
+            if not response.data['next']:
+                break
+            params = {'cursor': parse_qs(urlparse(response.data['next']).query)['cursor'][0]}
+            page += 1
+        return results
+
+    def measure(self, view, user, params, repeat):
+        """Best time for one page of a listing, and its query count."""
+        factory = APIRequestFactory()
+
+        def get_page():
+            request = factory.get('/', params, HTTP_HOST='localhost')
+            force_authenticate(request, user=user)
+            return view(request).render()
+
+        elapsed, queries, _ = measure(get_page, repeat)
+        return elapsed, queries
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from adpa_events.models import Choice, Question, Survey
+from adpa_events.serializers import SurveySerializer
+from utils.benchmark import measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = 'Compare serializing a large survey with and without prefetching (the survey is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--questions',
+            type=int,
+            default=100,
+            help='Number of questions in the benchmark survey'
+        )
+        parser.add_argument(
+            '--choices',
+            type=int,
+            default=4,
+            help='Number of choices per question'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Serializing a {options['questions']}-question survey with "
+            f"{options['choices']} choices each on {connection.vendor}..."
+        )
+        with rolled_back():
+            survey = self.create_survey(options['questions'], options['choices'])
+            strategies = (
+                ('Survey.objects', Survey.objects.all()),
+                ('setup_eager_loading()', SurveySerializer.setup_eager_loading(Survey.objects.all())),
+            )
+            for label, queryset in strategies:
+                elapsed, queries, _ = measure(lambda: SurveySerializer(queryset.get(pk=survey.pk)).data)
+                self.stdout.write(f'{label:<24} {elapsed * 1000:9.1f} ms  {queries:5d} queries')
+
+    def create_survey(self, questions, choices):
+        survey = Survey.objects.create(title='Benchmark survey')
+        created = Question.objects.bulk_create([
+            Question(survey=survey, text=f'Question {i}', question_type='radio', order=i)
+            for i in range(questions)
+        ])
+        Choice.objects.bulk_create([
+            Choice(question=question, text=f'Choice {i}', order=i)
+            for question in created
+            for i in range(choices)
+        ])
+        return survey
+
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from adpa_events.export import EXPORT_FORMATS, iter_export
+from adpa_events.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Stream every response of a survey as CSV or columnar NDJSON, one row per response'
+
+    def add_arguments(self, parser):
+        parser.add_argument('survey', type=int, help='Survey id')
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', help='Output layout')
+        parser.add_argument('--output', help='File to write; default is stdout')
+
+    def handle(self, *args, **options):
+        if not Survey.objects.filter(pk=options['survey']).exists():
+            raise CommandError(f"Survey {options['survey']} does not exist")
+
+        chunks = iter_export(options['survey'], options['format'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        lines = 0
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for chunk in chunks:
+                output.write(chunk)
+                lines += 1
+        self.stdout.write(self.style.SUCCESS(f"✓ Wrote {lines} lines to {options['output']}"))
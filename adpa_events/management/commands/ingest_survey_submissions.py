@@ -0,0 +1,46 @@
+import time
+from django.core.management.base import BaseCommand
+from adpa_events.ingestion import ingest_staged_submissions
+
+
+class Command(BaseCommand):
+    help = 'Deduplicate staged survey submissions and bulk-write them as responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of staged submissions claimed per batch (default: SURVEY_INGEST_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the staging table instead of exiting once it is drained'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep between polls when nothing is staged (with --loop)'
+        )
+
+    def handle(self, *args, **options):
+        total_created = total_duplicates = 0
+
+        while True:
+            created, duplicates = ingest_staged_submissions(options['batch_size'])
+            total_created += created
+            total_duplicates += duplicates
+
+            if created or duplicates:
+                self.stdout.write(f'Batch done: {created} responses, {duplicates} duplicates')
+                continue
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Staging drained: {total_created} responses, {total_duplicates} duplicates'
+        ))
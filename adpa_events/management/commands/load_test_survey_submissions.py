@@ -0,0 +1,130 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from adpa_events.ingestion import ingest_staged_submissions
+from adpa_events.models import Choice, Question, Survey, SurveyResponse
+from adpa_events.views import SurveyResponseList
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate many concurrent survey submitters against the configured database, '
+        'submitting directly and through the staging table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submitters', type=int, default=2000, help='Number of users submitting')
+        parser.add_argument('--threads', type=int, default=32, help='Concurrent submitting threads')
+        parser.add_argument('--questions', type=int, default=10, help='Questions in the test survey')
+        parser.add_argument(
+            '--repeat-every',
+            type=int,
+            default=10,
+            help='Every Nth submitter submits twice, to exercise deduplication (0 disables)'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['direct', 'staged', 'both'],
+            default='both',
+            help='Which submission path to load'
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the generated survey and users')
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4().hex[:8]
+        User.objects.bulk_create([
+            User(email=f'loadtest-{run}-{i}@example.com', first_name='Load', last_name='Test')
+            for i in range(options['submitters'])
+        ])
+        users = list(User.objects.filter(email__startswith=f'loadtest-{run}-').order_by('id'))
+        surveys = []
+        self.stdout.write(
+            f"{len(users)} submitters, {options['threads']} threads, "
+            f"{options['questions']} questions on {connections['default'].vendor}"
+        )
+
+        try:
+            for mode in (['direct', 'staged'] if options['mode'] == 'both' else [options['mode']]):
+                survey, answers = self.create_survey(f'Load test {run} ({mode})', options['questions'])
+                surveys.append(survey)
+                submitters = list(users)
+                if options['repeat_every']:
+                    submitters += users[::options['repeat_every']]
+                self.load(mode, survey, answers, submitters, options['threads'])
+        finally:
+            if not options['keep']:
+                Survey.objects.filter(pk__in=[s.pk for s in surveys]).delete()
+                User.objects.filter(email__startswith=f'loadtest-{run}-').delete()
+
+    def create_survey(self, title, questions):
+        survey = Survey.objects.create(title=title)
+        created = Question.objects.bulk_create([
+            Question(survey=survey, text=f'Question {i}', question_type='radio', order=i)
+            for i in range(questions)
+        ])
+        choices = Choice.objects.bulk_create([
+            Choice(question=question, text='Yes', order=0) for question in created
+        ])
+        answers = [{'question': c.question_id, 'choice_answer': c.pk} for c in choices]
+        return survey, answers
+
+    def load(self, mode, survey, answers, submitters, threads):
+        factory = APIRequestFactory()
+        view = SurveyResponseList.as_view()
+        payload = {'survey': survey.pk, 'answers': answers}
+
+        def submit(user):
+            request = factory.post('/', payload, format='json')
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            response = view(request, survey_id=survey.pk)
+            return time.perf_counter() - start, response.status_code
+
+        def close_connection(result):
+            connections.close_all()
+            return result
+
+        with override_settings(SURVEY_STAGED_SUBMISSIONS=(mode == 'staged')):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                results = list(pool.map(lambda user: close_connection(submit(user)), submitters))
+            elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for latency, _ in results)
+        codes = {}
+        for _, code in results:
+            codes[code] = codes.get(code, 0) + 1
+        self.stdout.write(
+            f'{mode:<7} accept: {len(results) / elapsed:8.1f} req/s  '
+            f'p50 {statistics.median(latencies) * 1000:6.1f} ms  '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:6.1f} ms  '
+            f'status {dict(sorted(codes.items()))}'
+        )
+
+        if mode == 'staged':
+            start = time.perf_counter()
+            created = duplicates = 0
+            while True:
+                batch_created, batch_duplicates = ingest_staged_submissions()
+                if not (batch_created or batch_duplicates):
+                    break
+                created += batch_created
+                duplicates += batch_duplicates
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{mode:<7} ingest: {created} responses, {duplicates} duplicates '
+                f'in {elapsed * 1000:.0f} ms'
+            )
+
+        responses = SurveyResponse.objects.filter(survey=survey).count()
+        expected = len(set(user.pk for user in submitters))
+        style = self.style.SUCCESS if responses == expected else self.style.ERROR
+        self.stdout.write(style(f'{mode:<7} stored {responses} responses for {expected} distinct submitters'))
@@ -0,0 +1,46 @@
+import time
+from django.core.management.base import BaseCommand
+from adpa_events.registrations import promote_waitlist
+
+
+class Command(BaseCommand):
+    help = 'Move waitlisted users into freed event seats, first come first served'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of events claimed per batch (default: WAITLIST_PROMOTION_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for freed seats instead of exiting once none are left'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to sleep between polls when there is nothing to promote (with --loop)'
+        )
+
+    def handle(self, *args, **options):
+        total_promoted = total_dropped = 0
+
+        while True:
+            promoted, dropped = promote_waitlist(options['batch_size'])
+            total_promoted += promoted
+            total_dropped += dropped
+
+            if promoted or dropped:
+                self.stdout.write(f'Batch done: {promoted} promoted, {dropped} already registered')
+                continue
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Waitlists promoted: {total_promoted} registrations, {total_dropped} already registered'
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from adpa_events.registrations import rebuild_registration_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount Event.registrations_count from EventRegistration'
+
+    def handle(self, *args, **options):
+        count = rebuild_registration_counts()
+        self.stdout.write(self.style.SUCCESS(f'✓ Recounted registrations for {count} events'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from adpa_events.results import rebuild_survey_results
+
+
+class Command(BaseCommand):
+    help = 'Recompute the survey results tallies from Answer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey',
+            type=int,
+            help='Only rebuild this survey; default is every survey'
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_survey_results(options['survey'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {count} question tally rows'))
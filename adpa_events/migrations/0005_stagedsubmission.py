@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adpa_events', '0004_remove_registration_event_remove_registration_user_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answers', models.JSONField(default=list, help_text='Validated answers waiting to be written')),
+                ('received_at', models.DateTimeField(auto_now_add=True, help_text='When this submission was accepted')),
+                ('survey', models.ForeignKey(help_text='Survey being responded to', on_delete=django.db.models.deletion.CASCADE, related_name='adpa_staged_submissions', to='adpa_events.survey')),
+                ('user', models.ForeignKey(help_text='User who submitted the response', on_delete=django.db.models.deletion.CASCADE, related_name='adpa_staged_submissions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Staged Submission',
+                'verbose_name_plural': 'Staged Submissions',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+
+
+def backfill_tallies(apps, schema_editor):
+    Answer = apps.get_model('adpa_events', 'Answer')
+    QuestionTally = apps.get_model('adpa_events', 'QuestionTally')
+    rows = [
+        QuestionTally(
+            survey_id=row['question__survey_id'],
+            question_id=row['question_id'],
+            responses=row['responses'],
+            text_length_total=row['length'] or 0
+        )
+        for row in Answer.objects.values('question_id', 'question__survey_id')
+        .annotate(responses=Count('response', distinct=True), length=Sum(Length('text_answer')))
+        .order_by()
+    ]
+    rows += [
+        QuestionTally(
+            survey_id=row['question__survey_id'],
+            question_id=row['question_id'],
+            choice_id=row['choice_answer_id'],
+            responses=row['responses']
+        )
+        for row in Answer.objects.filter(choice_answer__isnull=False)
+        .values('question_id', 'question__survey_id', 'choice_answer_id')
+        .annotate(responses=Count('id'))
+        .order_by()
+    ]
+    QuestionTally.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adpa_events', '0005_stagedsubmission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responses', models.PositiveIntegerField(default=0, help_text='Responses that answered the question or picked the choice')),
+                ('text_length_total', models.PositiveBigIntegerField(default=0, help_text='Summed length of text answers to the question')),
+                ('choice', models.ForeignKey(blank=True, help_text='Choice being counted (empty for the question totals)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='adpa_tallies', to='adpa_events.choice')),
+                ('question', models.ForeignKey(help_text='Question being counted', on_delete=django.db.models.deletion.CASCADE, related_name='adpa_tallies', to='adpa_events.question')),
+                ('survey', models.ForeignKey(help_text='Survey the question belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='adpa_tallies', to='adpa_events.survey')),
+            ],
+            options={
+                'verbose_name': 'Question Tally',
+                'verbose_name_plural': 'Question Tallies',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='questiontally',
+            constraint=models.UniqueConstraint(condition=models.Q(('choice__isnull', False)), fields=('question', 'choice'), name='unique_choice_tally'),
+        ),
+        migrations.AddConstraint(
+            model_name='questiontally',
+            constraint=models.UniqueConstraint(condition=models.Q(('choice__isnull', True)), fields=('question',), name='unique_question_tally'),
+        ),
+        migrations.RunPython(backfill_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_registrations(apps, schema_editor):
+    Event = apps.get_model('adpa_events', 'Event')
+    EventRegistration = apps.get_model('adpa_events', 'EventRegistration')
+    counts = (
+        EventRegistration.objects.filter(event=OuterRef('pk'))
+        .order_by().values('event').annotate(total=Count('id')).values('total')
+    )
+    Event.objects.update(registrations_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adpa_events', '0006_questiontally'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, help_text='Maximum number of registrations (empty for unlimited)', null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='registrations_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of registrations, kept in step with EventRegistration'),
+        ),
+        migrations.RunPython(count_registrations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adpa_events', '0007_event_capacity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(auto_now_add=True, help_text='When the user joined the waitlist')),
+                ('event', models.ForeignKey(help_text='Event being waited for', on_delete=django.db.models.deletion.CASCADE, related_name='adpa_waitlist', to='adpa_events.event')),
+                ('user', models.ForeignKey(help_text='User waiting for a seat', on_delete=django.db.models.deletion.CASCADE, related_name='adpa_waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Waitlist Entry',
+                'verbose_name_plural': 'Waitlist Entries',
+                'ordering': ['joined_at', 'id'],
+                'indexes': [models.Index(fields=['event', 'joined_at', 'id'], name='waitlist_event_order_idx')],
+                'unique_together': {('event', 'user')},
+            },
+        ),
+    ]
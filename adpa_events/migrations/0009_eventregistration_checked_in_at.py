@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adpa_events', '0008_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventregistration',
+            name='checked_in_at',
+            field=models.DateTimeField(blank=True, help_text='When the user was checked in at the door', null=True),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_member_events(apps, schema_editor):
+    """Move the dashboard's events (members.Event) into this table."""
+    MemberEvent = apps.get_model('members', 'Event')
+    Event = apps.get_model('adpa_events', 'Event')
+    batch = []
+    for old in MemberEvent.objects.order_by('id').iterator(chunk_size=1000):
+        batch.append(Event(
+            title=old.title,
+            description=old.description,
+            event_type=old.event_type,
+            start_date=old.start_date,
+            end_date=old.end_date or old.start_date,
+            location=old.location,
+            virtual_link=old.virtual_link,
+            is_public=old.is_public,
+        ))
+        if len(batch) == 1000:
+            Event.objects.bulk_create(batch)
+            batch = []
+    Event.objects.bulk_create(batch)
+
+
+def restore_member_events(apps, schema_editor):
+    """Move events without an organizer back, so organizer can be required again."""
+    MemberEvent = apps.get_model('members', 'Event')
+    Event = apps.get_model('adpa_events', 'Event')
+    events = Event.objects.filter(organizer__isnull=True)
+    MemberEvent.objects.bulk_create([
+        MemberEvent(
+            title=event.title,
+            description=event.description,
+            event_type=event.event_type,
+            start_date=event.start_date,
+            end_date=event.end_date,
+            location=event.location,
+            virtual_link=event.virtual_link,
+            is_public=event.is_public,
+        )
+        for event in events.iterator(chunk_size=1000)
+    ], batch_size=1000)
+    events.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adpa_events', '0009_eventregistration_checked_in_at'),
+        ('members', '0004_projectcountry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='event_type',
+            field=models.CharField(choices=[('meeting', 'Meeting'), ('workshop', 'Workshop'), ('deadline', 'Deadline'), ('conference', 'Conference')], default='meeting', help_text='Kind of event', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='is_public',
+            field=models.BooleanField(default=True, help_text='Whether the event is listed publicly'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='virtual_link',
+            field=models.URLField(blank=True, help_text='Link for joining the event online'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='description',
+            field=models.TextField(blank=True, help_text='Detailed description of the event'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='location',
+            field=models.CharField(blank=True, help_text='Location/venue of the event', max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='organizer',
+            field=models.ForeignKey(blank=True, help_text='User who organized this event', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='adpa_organized_events', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_date', 'id'], name='event_start_idx'),
+        ),
+        migrations.RunPython(copy_member_events, restore_member_events),
+    ]
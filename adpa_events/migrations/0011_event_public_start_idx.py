@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adpa_events', '0010_consolidate_events'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['is_public', 'start_date', 'id'], name='event_public_start_idx'),
+        ),
+    ]
@@ -129,17 +129,32 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name_plural = "Users"
 
 
+class EventQuerySet(models.QuerySet):
+    def upcoming(self, now=None):
+        """Events that have not started yet, soonest first (uses event_start_idx)"""
+        return self.filter(start_date__gte=now or timezone.now()).order_by('start_date', 'id')
+
+
 class Event(models.Model):
     """
     An event that can be organized, registered for, and surveyed.
+
+    This is the only event table: the dashboard's event listing (members)
+    reads it too.
     
     Attributes:
         title (CharField): Event name (max 200 chars)
         description (TextField): Detailed event description
+        event_type (CharField): Meeting, workshop, deadline or conference
         start_date (DateTimeField): When event begins
         end_date (DateTimeField): When event ends
         location (CharField): Event venue (max 200 chars)
-        organizer (ForeignKey): User who created the event
+        virtual_link (URLField): Link for joining online (optional)
+        is_public (BooleanField): Whether the event is listed publicly
+        organizer (ForeignKey): User who created the event (optional)
+        capacity (PositiveIntegerField): Maximum registrations (optional)
+        registrations_count (PositiveIntegerField): Current registrations,
+            maintained by adpa_events.registrations
         created_at (DateTimeField): When event was created
         updated_at (DateTimeField): When event was last updated
         
@@ -147,15 +162,30 @@ class Event(models.Model):
         - Many-to-one with User (organizer)
         - One-to-one with Survey (optional)
         - One-to-many with EventRegistration
+        - One-to-many with WaitlistEntry
     """
     
+    EVENT_TYPE_CHOICES = [
+        ('meeting', 'Meeting'),
+        ('workshop', 'Workshop'),
+        ('deadline', 'Deadline'),
+        ('conference', 'Conference'),
+    ]
+
     title = models.CharField(
         max_length=200,
         help_text="Name of the event (max 200 characters)"
     )
     description = models.TextField(
+        blank=True,
         help_text="Detailed description of the event"
     )
+    event_type = models.CharField(
+        max_length=20,
+        choices=EVENT_TYPE_CHOICES,
+        default='meeting',
+        help_text="Kind of event"
+    )
     start_date = models.DateTimeField(
         help_text="Date and time when event starts"
     )
@@ -164,14 +194,35 @@ class Event(models.Model):
     )
     location = models.CharField(
         max_length=200,
+        blank=True,
         help_text="Location/venue of the event"
     )
+    virtual_link = models.URLField(
+        blank=True,
+        help_text="Link for joining the event online"
+    )
+    is_public = models.BooleanField(
+        default=True,
+        help_text="Whether the event is listed publicly"
+    )
     organizer = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='adpa_organized_events',  # Changed to avoid clash
         help_text="User who organized this event"
     )
+    capacity = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Maximum number of registrations (empty for unlimited)"
+    )
+    registrations_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of registrations, kept in step with EventRegistration"
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         help_text="When this event was created"
@@ -185,10 +236,17 @@ class Event(models.Model):
         """String representation using event title"""
         return self.title
 
+    objects = EventQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Event"
         verbose_name_plural = "Events"
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['start_date', 'id'], name='event_start_idx'),
+            # Public events in date order, as the public calendar feed reads them
+            models.Index(fields=['is_public', 'start_date', 'id'], name='event_public_start_idx'),
+        ]
 
 
 class EventRegistration(models.Model):
@@ -200,6 +258,7 @@ class EventRegistration(models.Model):
         user (ForeignKey): Registered User
         registration_date (DateTimeField): When registration occurred
         attended (BooleanField): Whether user attended
+        checked_in_at (DateTimeField): When the user's badge was scanned (optional)
         
     Relationships:
         - Many-to-one with Event
@@ -229,6 +288,11 @@ class EventRegistration(models.Model):
         default=False,
         help_text="Whether the user attended the event"
     )
+    checked_in_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the user was checked in at the door"
+    )
 
     def __str__(self):
         """String representation combining user and event"""
@@ -241,6 +305,53 @@ class EventRegistration(models.Model):
         ordering = ['-registration_date']
 
 
+class WaitlistEntry(models.Model):
+    """
+    A user waiting for a seat at a full event.
+
+    Entries are promoted first come, first served by the promote_waitlist
+    command (see adpa_events.registrations) as seats are freed.
+
+    Attributes:
+        event (ForeignKey): Event being waited for
+        user (ForeignKey): Waiting User
+        joined_at (DateTimeField): When the user joined the waitlist
+
+    Constraints:
+        - Unique together: (event, user) - one place in line per user
+    """
+
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='adpa_waitlist',
+        help_text="Event being waited for"
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='adpa_waitlist_entries',
+        help_text="User waiting for a seat"
+    )
+    joined_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the user joined the waitlist"
+    )
+
+    def __str__(self):
+        """String representation combining user and event ids"""
+        return f"{self.user_id} - {self.event_id} (waitlist)"
+
+    class Meta:
+        verbose_name = "Waitlist Entry"
+        verbose_name_plural = "Waitlist Entries"
+        unique_together = ('event', 'user')
+        ordering = ['joined_at', 'id']
+        indexes = [
+            models.Index(fields=['event', 'joined_at', 'id'], name='waitlist_event_order_idx'),
+        ]
+
+
 class Survey(models.Model):
     """
     A survey associated with an event to collect participant feedback.
@@ -490,4 +601,116 @@ class Answer(models.Model):
 
     class Meta:
         verbose_name = "Answer"
-        verbose_name_plural = "Answers"
\ No newline at end of file
+        verbose_name_plural = "Answers"
+
+class StagedSubmission(models.Model):
+    """
+    A survey submission accepted in staged mode and not yet ingested.
+
+    Submissions are only ever appended here; the ingest_survey_submissions
+    command drains the table in batches, drops duplicates and bulk-writes
+    the rest as SurveyResponse and Answer rows.
+
+    Attributes:
+        survey (ForeignKey): Survey being responded to
+        user (ForeignKey): User who submitted
+        answers (JSONField): Validated answers as question_id/choice_answer_id/text_answer dicts
+        received_at (DateTimeField): When the submission was accepted
+    """
+
+    survey = models.ForeignKey(
+        Survey,
+        on_delete=models.CASCADE,
+        related_name='adpa_staged_submissions',
+        help_text="Survey being responded to"
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='adpa_staged_submissions',
+        help_text="User who submitted the response"
+    )
+    answers = models.JSONField(
+        default=list,
+        help_text="Validated answers waiting to be written"
+    )
+    received_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When this submission was accepted"
+    )
+
+    def __str__(self):
+        """String representation combining user and survey ids"""
+        return f"{self.user_id} - {self.survey_id} (staged)"
+
+    class Meta:
+        verbose_name = "Staged Submission"
+        verbose_name_plural = "Staged Submissions"
+        ordering = ['id']
+
+
+class QuestionTally(models.Model):
+    """
+    Running result counters for one question, or for one choice of a question.
+
+    The row with no choice holds the question's totals: how many responses
+    answered it and, for text questions, the summed answer length. Every
+    choice that was picked has its own row with the number of times it
+    was. Maintained by adpa_events.results as answers are written.
+
+    Attributes:
+        survey (ForeignKey): Survey the question belongs to
+        question (ForeignKey): Question being counted
+        choice (ForeignKey): Choice being counted, or null for the question totals
+        responses (PositiveIntegerField): Responses that answered the question / picked the choice
+        text_length_total (PositiveBigIntegerField): Summed length of text answers
+    """
+
+    survey = models.ForeignKey(
+        Survey,
+        on_delete=models.CASCADE,
+        related_name='adpa_tallies',
+        help_text="Survey the question belongs to"
+    )
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='adpa_tallies',
+        help_text="Question being counted"
+    )
+    choice = models.ForeignKey(
+        Choice,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='adpa_tallies',
+        help_text="Choice being counted (empty for the question totals)"
+    )
+    responses = models.PositiveIntegerField(
+        default=0,
+        help_text="Responses that answered the question or picked the choice"
+    )
+    text_length_total = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Summed length of text answers to the question"
+    )
+
+    def __str__(self):
+        """String representation combining question and choice ids"""
+        return f"{self.question_id} / {self.choice_id or '-'}: {self.responses}"
+
+    class Meta:
+        verbose_name = "Question Tally"
+        verbose_name_plural = "Question Tallies"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['question', 'choice'],
+                condition=models.Q(choice__isnull=False),
+                name='unique_choice_tally'
+            ),
+            models.UniqueConstraint(
+                fields=['question'],
+                condition=models.Q(choice__isnull=True),
+                name='unique_question_tally'
+            ),
+        ]
@@ -0,0 +1,187 @@
+"""
+Event registration with capacity control.
+
+A registration is one INSERT backed by the (event, user) unique constraint
+followed, in the same transaction, by a conditional UPDATE that takes a
+seat:
+
+    UPDATE event SET registrations_count = registrations_count + 1
+    WHERE id = %s AND (capacity IS NULL OR registrations_count < capacity)
+
+The UPDATE locks only that event's row, so concurrent registrations queue
+on it and overbooking is impossible; when no row matches the event is
+full and the insert is rolled back. Cancellation deletes the registration
+and gives the seat back the same way. Registrations written any other way
+(the admin, fixtures) are picked up by rebuild_registration_counts().
+
+Only a full event with a capacity can be waitlisted. While anyone is on
+its waitlist the UPDATE also requires the waitlist to be empty, so a
+freed seat goes to the person at the head of the line rather than to
+whoever refreshes first; until promotion, newcomers join the waitlist too. promote_waitlist() hands
+freed seats out: workers lock events with SKIP LOCKED, so each event is
+promoted by one worker at a time, first come first served, while
+several workers share the events between them. Promotion queues the
+confirmation email in the same transaction.
+"""
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from utils.email import send_event_registration_email
+from .ical import calendar_links, invalidate_calendar_feeds
+from .models import Event, EventRegistration, WaitlistEntry
+
+WAITLIST_PROMOTION_BATCH_SIZE = 50  # events claimed per batch
+
+
+class RegistrationError(Exception):
+    pass
+
+
+class AlreadyRegistered(RegistrationError):
+    pass
+
+
+class EventFull(RegistrationError):
+    pass
+
+
+class AlreadyWaitlisted(RegistrationError):
+    pass
+
+
+class EventNotFull(RegistrationError):
+    pass
+
+
+def _has_waitlist():
+    return Exists(WaitlistEntry.objects.filter(event=OuterRef('pk')))
+
+
+def _seat_available():
+    return Q(capacity__isnull=True) | (Q(registrations_count__lt=F('capacity')) & ~_has_waitlist())
+
+
+def register(event_id, user):
+    """
+    Register a user for an event and return the EventRegistration.
+
+    Raises AlreadyRegistered or EventFull.
+    """
+    try:
+        with transaction.atomic():
+            registration = EventRegistration.objects.create(event_id=event_id, user=user)
+            seated = (
+                Event.objects.filter(pk=event_id)
+                .filter(_seat_available())
+                .update(registrations_count=F('registrations_count') + 1)
+            )
+            if not seated:
+                raise EventFull
+    except IntegrityError:
+        raise AlreadyRegistered
+    return registration
+
+
+def cancel_registration(registration):
+    """Delete a registration and free its seat. Returns False if it was already gone."""
+    with transaction.atomic():
+        deleted, _ = EventRegistration.objects.filter(pk=registration.pk).delete()
+        if deleted:
+            Event.objects.filter(pk=registration.event_id).update(
+                registrations_count=F('registrations_count') - 1
+            )
+    return bool(deleted)
+
+
+def registered_event_ids(user, event_ids):
+    """Return which of the given events the user is registered for, in one query."""
+    if not user or not user.is_authenticated:
+        return set()
+    return set(
+        EventRegistration.objects.filter(user=user, event_id__in=list(event_ids))
+        .values_list('event_id', flat=True)
+    )
+
+
+def rebuild_registration_counts():
+    """Recount Event.registrations_count from EventRegistration. Returns the events updated."""
+    counts = (
+        EventRegistration.objects.filter(event=OuterRef('pk'))
+        .order_by().values('event').annotate(total=Count('id')).values('total')
+    )
+    return Event.objects.update(registrations_count=Coalesce(Subquery(counts), 0))
+
+
+def join_waitlist(event_id, user):
+    """
+    Put a user at the back of a full event's waitlist and return the WaitlistEntry.
+
+    An event whose freed seats are held for its waitlist counts as full.
+
+    Raises AlreadyRegistered, EventNotFull or AlreadyWaitlisted.
+    """
+    if EventRegistration.objects.filter(event_id=event_id, user=user).exists():
+        raise AlreadyRegistered
+    # Exactly the events register() turns away: full, or holding freed seats for the waitlist
+    full = Event.objects.filter(pk=event_id, capacity__isnull=False).filter(
+        Q(registrations_count__gte=F('capacity')) | _has_waitlist()
+    )
+    if not full.exists():
+        raise EventNotFull
+    try:
+        with transaction.atomic():
+            return WaitlistEntry.objects.create(event_id=event_id, user=user)
+    except IntegrityError:
+        raise AlreadyWaitlisted
+
+
+def leave_waitlist(event_id, user):
+    """Remove a user from an event's waitlist. Returns False if they weren't on it."""
+    deleted, _ = WaitlistEntry.objects.filter(event_id=event_id, user=user).delete()
+    return bool(deleted)
+
+
+def promote_waitlist(batch_size=None):
+    """
+    Move waiting users into free seats for one batch of events.
+
+    Events with free seats and a waitlist are locked with SKIP LOCKED, so
+    concurrent workers promote different events and a seat is never handed
+    out twice. Entries of users who registered in the meantime are dropped.
+    Returns a (promoted, dropped) tuple for the batch.
+    """
+    batch_size = batch_size or getattr(settings, 'WAITLIST_PROMOTION_BATCH_SIZE', WAITLIST_PROMOTION_BATCH_SIZE)
+    promoted = dropped = 0
+    with transaction.atomic():
+        events = list(
+            Event.objects.select_for_update(skip_locked=True)
+            .filter(Q(capacity__isnull=True) | Q(registrations_count__lt=F('capacity')))
+            .filter(Exists(WaitlistEntry.objects.filter(event=OuterRef('pk'))))
+            .order_by('id')[:batch_size]
+        )
+        for event in events:
+            seated, skipped = _promote_event(event)
+            promoted += seated
+            dropped += skipped
+    return promoted, dropped
+
+
+def _promote_event(event):
+    free = None if event.capacity is None else event.capacity - event.registrations_count
+    entries = list(event.adpa_waitlist.select_related('user').order_by('joined_at', 'id')[:free])
+    registered = set(
+        EventRegistration.objects.filter(event=event, user_id__in=[e.user_id for e in entries])
+        .values_list('user_id', flat=True)
+    )
+    seated = [entry for entry in entries if entry.user_id not in registered]
+
+    EventRegistration.objects.bulk_create([EventRegistration(event=event, user=e.user) for e in seated])
+    invalidate_calendar_feeds([entry.user_id for entry in seated])
+    Event.objects.filter(pk=event.pk).update(registrations_count=F('registrations_count') + len(seated))
+    WaitlistEntry.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
+    for entry in seated:
+        send_event_registration_email(entry.user, event, calendar_links(event, entry.user_id))
+    return len(seated), len(entries) - len(seated)
+
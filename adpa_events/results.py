@@ -0,0 +1,140 @@
+"""
+Incremental survey results.
+
+QuestionTally rows are bumped in the same transaction that writes the
+answers (ResponseSerializer.create and the staged ingester): missing rows
+are inserted with one INSERT ... ON CONFLICT DO NOTHING and all counters
+move with a single CASE UPDATE, so the cost depends on the questions
+touched, not on the number of answers. Answers written any other way, and
+deletions, are picked up by rebuild_survey_results().
+"""
+
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Length
+from .models import Answer, QuestionTally
+
+
+def record_answers(answers):
+    """Add freshly inserted Answer rows (with their response attached) to the tallies."""
+    deltas = defaultdict(lambda: [0, 0])
+    surveys = {}
+    answered = set()
+    for answer in answers:
+        surveys[answer.question_id] = answer.response.survey_id
+        if (answer.response.pk, answer.question_id) not in answered:
+            answered.add((answer.response.pk, answer.question_id))
+            deltas[(answer.question_id, None)][0] += 1
+        if answer.text_answer:
+            deltas[(answer.question_id, None)][1] += len(answer.text_answer)
+        if answer.choice_answer_id is not None:
+            deltas[(answer.question_id, answer.choice_answer_id)][0] += 1
+    if not deltas:
+        return
+
+    def amount(index):
+        cases = [
+            When(_key_filter(question_id, choice_id), then=Value(delta[index]))
+            for (question_id, choice_id), delta in deltas.items() if delta[index]
+        ]
+        return Case(*cases, default=Value(0)) if cases else Value(0)
+
+    with transaction.atomic():
+        QuestionTally.objects.bulk_create([
+            QuestionTally(survey_id=surveys[question_id], question_id=question_id, choice_id=choice_id)
+            for question_id, choice_id in deltas
+        ], ignore_conflicts=True)
+        QuestionTally.objects.filter(question_id__in=surveys.keys()).update(
+            responses=F('responses') + amount(0),
+            text_length_total=F('text_length_total') + amount(1)
+        )
+
+
+def _key_filter(question_id, choice_id):
+    if choice_id is None:
+        return Q(question_id=question_id, choice__isnull=True)
+    return Q(question_id=question_id, choice_id=choice_id)
+
+
+def survey_results(survey_id):
+    """
+    Return the per-question results of a survey from its tallies, in one query.
+
+    Choice questions list how often each choice was picked; text questions
+    report how many responses answered and the average answer length.
+    Returns None when the survey has no tallies yet.
+    """
+    rows = (
+        QuestionTally.objects.filter(survey_id=survey_id)
+        .order_by('question__order', 'question_id', 'choice__order', 'choice_id')
+        .values(
+            'question_id', 'question__text', 'question__question_type',
+            'choice_id', 'choice__text', 'responses', 'text_length_total'
+        )
+    )
+    questions = {}
+    for row in rows:
+        question = questions.setdefault(row['question_id'], {
+            'question': row['question_id'],
+            'text': row['question__text'],
+            'question_type': row['question__question_type'],
+            'responses': 0,
+        })
+        if row['choice_id'] is not None:
+            question.setdefault('choices', []).append({
+                'choice': row['choice_id'],
+                'text': row['choice__text'],
+                'count': row['responses'],
+            })
+            continue
+        question['responses'] = row['responses']
+        if row['question__question_type'] == 'text':
+            question['average_length'] = (
+                round(row['text_length_total'] / row['responses'], 1) if row['responses'] else 0
+            )
+    if not questions:
+        return None
+    return {'survey': survey_id, 'questions': list(questions.values())}
+
+
+def rebuild_survey_results(survey_id=None):
+    """Recompute the tallies of one survey (or all) from Answer. Returns the number of rows."""
+    answers = Answer.objects.all()
+    tallies = QuestionTally.objects.all()
+    if survey_id is not None:
+        answers = answers.filter(question__survey_id=survey_id)
+        tallies = tallies.filter(survey_id=survey_id)
+
+    question_rows = (
+        answers.values('question_id', 'question__survey_id')
+        .annotate(responses=Count('response', distinct=True), text_length_total=Sum(Length('text_answer')))
+        .order_by()
+    )
+    choice_rows = (
+        answers.filter(choice_answer__isnull=False)
+        .values('question_id', 'question__survey_id', 'choice_answer_id')
+        .annotate(responses=Count('id'))
+        .order_by()
+    )
+    rows = [
+        QuestionTally(
+            survey_id=row['question__survey_id'],
+            question_id=row['question_id'],
+            responses=row['responses'],
+            text_length_total=row['text_length_total'] or 0
+        )
+        for row in question_rows
+    ] + [
+        QuestionTally(
+            survey_id=row['question__survey_id'],
+            question_id=row['question_id'],
+            choice_id=row['choice_answer_id'],
+            responses=row['responses']
+        )
+        for row in choice_rows
+    ]
+    with transaction.atomic():
+        tallies.delete()
+        QuestionTally.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.db.models import Prefetch
 from rest_framework import serializers
+from .checkin import CHECK_IN_BATCH_LIMIT
 from .models import Event, EventRegistration, Survey, Question, Choice, SurveyResponse, Answer
 
 class EventSerializer(serializers.ModelSerializer):
@@ -10,22 +13,41 @@ class EventRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = EventRegistration
         fields = '__all__'
+        # The registering user comes from the request; duplicates are settled by the
+        # unique constraint in adpa_events.registrations.register
+        read_only_fields = ['user']
 
-class SurveySerializer(serializers.ModelSerializer):
+def survey_prefetches():
+    """Prefetch a survey's questions and their choices, both in display order"""
+    return (
+        Prefetch('adpa_questions', queryset=Question.objects.order_by('order', 'id')),
+        Prefetch('adpa_questions__adpa_choices', queryset=Choice.objects.order_by('order', 'id')),
+    )
+
+class ChoiceSerializer(serializers.ModelSerializer):
     class Meta:
-        model = Survey
+        model = Choice
         fields = '__all__'
 
 class QuestionSerializer(serializers.ModelSerializer):
+    choices = ChoiceSerializer(source='adpa_choices', many=True, read_only=True)
+
     class Meta:
         model = Question
         fields = '__all__'
 
-class ChoiceSerializer(serializers.ModelSerializer):
+class SurveySerializer(serializers.ModelSerializer):
+    questions = QuestionSerializer(source='adpa_questions', many=True, read_only=True)
+
     class Meta:
-        model = Choice
+        model = Survey
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load every question and choice with two queries, however many there are"""
+        return queryset.prefetch_related(*survey_prefetches())
+
 class ResponseSerializer(serializers.ModelSerializer):
     class Meta:
         model = SurveyResponse
@@ -34,4 +56,36 @@ class ResponseSerializer(serializers.ModelSerializer):
 class AnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Answer
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class ScanSerializer(serializers.Serializer):
+    registration = serializers.IntegerField(required=False)
+    email = serializers.EmailField(required=False)
+    scanned_at = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if ('registration' in data) == ('email' in data):
+            raise serializers.ValidationError('Give either a registration or an email.')
+        return data
+
+class CheckInSerializer(serializers.Serializer):
+    """
+    A batch of badge scans: live scans as registrations and/or emails, or an
+    offline scanner's queued scans, each with the time it was taken.
+    """
+    registrations = serializers.ListField(child=serializers.IntegerField(), required=False)
+    emails = serializers.ListField(child=serializers.EmailField(), required=False)
+    scans = ScanSerializer(many=True, required=False)
+
+    def validate(self, data):
+        scans = (
+            [{'registration': pk} for pk in data.get('registrations', [])]
+            + [{'email': email} for email in data.get('emails', [])]
+            + list(data.get('scans', []))
+        )
+        if not scans:
+            raise serializers.ValidationError('Nothing to check in.')
+        limit = getattr(settings, 'CHECK_IN_BATCH_LIMIT', CHECK_IN_BATCH_LIMIT)
+        if len(scans) > limit:
+            raise serializers.ValidationError(f'At most {limit} scans per batch.')
+        return {'scans': scans}
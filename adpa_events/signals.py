@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save
+from .ical import invalidate_calendar_feeds
+from .models import Choice, Event, EventRegistration, Question, Survey
+from .survey_documents import invalidate_survey_document
+
+
+def survey_changed(sender, instance, raw=False, **kwargs):
+    # auto_now has already moved updated_at on save
+    if not raw:
+        invalidate_survey_document(instance.pk, touch=False)
+
+
+def question_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_survey_document(instance.survey_id)
+
+
+def choice_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        survey_id = Question.objects.filter(pk=instance.question_id).values_list('survey_id', flat=True).first()
+        if survey_id is not None:
+            invalidate_survey_document(survey_id)
+
+
+for model, receiver in ((Survey, survey_changed), (Question, question_changed), (Choice, choice_changed)):
+    post_save.connect(receiver, sender=model, dispatch_uid=f'survey-document-save-{model.__name__}')
+    post_delete.connect(receiver, sender=model, dispatch_uid=f'survey-document-delete-{model.__name__}')
+
+
+def event_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_calendar_feeds()
+
+
+def registration_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_calendar_feeds([instance.user_id])
+
+
+for model, receiver in ((Event, event_changed), (EventRegistration, registration_changed)):
+    post_save.connect(receiver, sender=model, dispatch_uid=f'calendar-feed-save-{model.__name__}')
+    post_delete.connect(receiver, sender=model, dispatch_uid=f'calendar-feed-delete-{model.__name__}')
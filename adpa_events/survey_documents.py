@@ -0,0 +1,89 @@
+"""
+Cached survey definition documents.
+
+A survey's serialized definition (survey, questions and choices) is built
+once per version and stored in the cache. The version is the survey's
+updated_at, and a small pointer key records the current version, so a
+hit is two cache reads and no queries. Any change to the survey or to
+one of its questions or choices touches updated_at and drops the pointer
+(see adpa_events.signals); the next read builds the new version.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from .models import Survey
+from .serializers import SurveySerializer
+
+SURVEY_DOCUMENT_CACHE_TIMEOUT = 60 * 60 * 24  # seconds
+
+
+def _timeout():
+    return getattr(settings, 'SURVEY_DOCUMENT_CACHE_TIMEOUT', SURVEY_DOCUMENT_CACHE_TIMEOUT)
+
+
+def _version_key(survey_id):
+    return f'adpa_events:survey:{survey_id}:version'
+
+
+def _document_key(survey_id, version):
+    return f'adpa_events:survey:{survey_id}:{version}'
+
+
+def get_survey_document(survey_id):
+    """
+    Return (document, etag) for a survey, building and caching it on a miss.
+
+    Raises Survey.DoesNotExist for unknown surveys.
+    """
+    version = cache.get(_version_key(survey_id))
+    if version is not None:
+        document = cache.get(_document_key(survey_id, version))
+        if document is not None:
+            return document, _etag(survey_id, version)
+
+    survey = SurveySerializer.setup_eager_loading(Survey.objects.all()).get(pk=survey_id)
+    version = int(survey.updated_at.timestamp() * 1000000)
+    document = SurveySerializer(survey).data
+    cache.set_many({
+        _document_key(survey_id, version): document,
+        _version_key(survey_id): version,
+    }, _timeout())
+    return document, _etag(survey_id, version)
+
+
+def _etag(survey_id, version):
+    return f'"survey-{survey_id}-{version}"'
+
+
+def invalidate_survey_document(survey_id, touch=True):
+    """
+    Retire the cached document of a survey.
+
+    With touch, updated_at is bumped so clients holding the old ETag get the
+    new definition. The pointer is dropped after commit so a concurrent read
+    can't cache the version that is being replaced.
+    """
+    if touch:
+        Survey.objects.filter(pk=survey_id).update(updated_at=timezone.now())
+    transaction.on_commit(lambda: cache.delete(_version_key(survey_id)))
+
+
+def get_question_map(survey_id):
+    """
+    Return {question_id: question} for validating answers to a survey.
+
+    Each question is a dict with 'type', 'required' and the set of valid
+    'choices' ids. Built from the cached document, so it costs no queries
+    on a hit.
+    """
+    document, _ = get_survey_document(survey_id)
+    return {
+        question['id']: {
+            'type': question['question_type'],
+            'required': question['is_required'],
+            'choices': {choice['id'] for choice in question['choices']},
+        }
+        for question in document['questions']
+    }
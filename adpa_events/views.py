@@ -1,22 +1,44 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
+from django.utils.http import parse_etags
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from rest_framework import viewsets, generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import Event, EventRegistration, Survey, SurveyResponse
+from rest_framework.exceptions import APIException, PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
+from .models import Event, EventRegistration, Survey, SurveyResponse, WaitlistEntry
 from .serializers import (
     EventSerializer,
     EventRegistrationSerializer,
     SurveySerializer,
     QuestionSerializer,
     ChoiceSerializer,
-    ResponseSerializer
+    ResponseSerializer,
+    CheckInSerializer
 )
+from .checkin import check_in
+from .export import EXPORT_FORMATS, iter_export
+from .ical import feed_etag, feed_last_modified, feed_url, get_feed, user_for_token
+from .registrations import (
+    AlreadyRegistered,
+    AlreadyWaitlisted,
+    EventFull,
+    EventNotFull,
+    cancel_registration,
+    join_waitlist,
+    leave_waitlist,
+    register
+)
+from .ingestion import stage_submission, staged_submissions_enabled
+from .results import survey_results
+from .survey_documents import get_survey_document
+from api.pagination import EventKeysetPagination, PaginationModeMixin
+from api.serializers import EventDetailSerializer, ResponseSerializer as SubmissionSerializer
 
 User = get_user_model()
 
@@ -25,44 +47,218 @@ class EventViewSet(viewsets.ModelViewSet):
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class EventList(generics.ListAPIView):
+class EventList(PaginationModeMixin, generics.ListAPIView):
+    # registrations_count is stored on Event and is_registered is looked up
+    # once per page, so a page costs the same queries whatever its size.
+    # ?cursor= switches to keyset pages (api.pagination.EventKeysetPagination)
     queryset = Event.objects.all()
-    serializer_class = EventSerializer
+    serializer_class = EventDetailSerializer
     permission_classes = [AllowAny]
+    keyset_pagination_class = EventKeysetPagination
+    keyset_ordering = ('-start_date', '-id')
 
 class EventDetail(generics.RetrieveAPIView):
     queryset = Event.objects.all()
-    serializer_class = EventSerializer
+    serializer_class = EventDetailSerializer
     permission_classes = [AllowAny]
 
-class EventRegistrationList(generics.ListCreateAPIView):
+class EventFullError(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Event is full'
+    default_code = 'event_full'
+
+class EventRegistrationList(PaginationModeMixin, generics.ListCreateAPIView):
+    # ?cursor= pages run newest first on the primary key
     queryset = EventRegistration.objects.all()
     serializer_class = EventRegistrationSerializer
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # See adpa_events.registrations: one insert plus a conditional seat update
+        try:
+            serializer.instance = register(serializer.validated_data['event'].pk, self.request.user)
+        except AlreadyRegistered:
+            raise ValidationError({'detail': 'Already registered'})
+        except EventFull:
+            raise EventFullError
 
 class EventRegistrationDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = EventRegistration.objects.all()
     serializer_class = EventRegistrationSerializer
     permission_classes = [IsAuthenticated]
 
+    def perform_destroy(self, instance):
+        cancel_registration(instance)
+
+class EventCheckInView(APIView):
+    """
+    Check in a batch of badge scans for an event (staff or the organizer).
+
+    Idempotent, so an offline scanner can upload its queued scans, with
+    their scan times, once it reconnects; see adpa_events.checkin.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, event_id):
+        event = get_object_or_404(Event, pk=event_id)
+        if not (request.user.is_staff or event.organizer_id == request.user.pk):
+            raise PermissionDenied
+        serializer = CheckInSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = check_in(event.pk, serializer.validated_data['scans'])
+        totals = {'checked_in': 0, 'already_checked_in': 0, 'not_registered': 0}
+        for result in results:
+            totals[result['status']] += 1
+        return Response({'results': results, **totals})
+
+class EventWaitlistView(APIView):
+    """Join (POST) or leave (DELETE) an event's waitlist; promote_waitlist hands out seats"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, event_id):
+        event = get_object_or_404(Event, pk=event_id)
+        try:
+            entry = join_waitlist(event.pk, request.user)
+        except AlreadyRegistered:
+            raise ValidationError({'detail': 'Already registered'})
+        except AlreadyWaitlisted:
+            raise ValidationError({'detail': 'Already on the waitlist'})
+        except EventNotFull:
+            raise ValidationError({'detail': 'The event has free seats; register instead'})
+        position = WaitlistEntry.objects.filter(event=event, id__lte=entry.pk).count()
+        return Response({'id': entry.pk, 'position': position}, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, event_id):
+        if not leave_waitlist(event_id, request.user):
+            raise Http404
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class CalendarFeedView(APIView):
+    """Addresses of the public calendar feed and of the user's private feed"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'public': feed_url(), 'personal': feed_url(request.user.pk)})
+
+# Calendar apps poll the feeds; the ETag and Last-Modified come from cached
+# versions, so an unchanged feed is answered with a 304 and no queries
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=lambda request: feed_etag(), last_modified_func=lambda request: feed_last_modified())
+def public_calendar_feed(request):
+    return HttpResponse(get_feed(), content_type='text/calendar; charset=utf-8')
+
+@require_http_methods(["GET", "HEAD"])
+def user_calendar_feed(request, token):
+    user_id = user_for_token(token)
+    if user_id is None:
+        raise Http404
+    return _user_calendar_feed(request, user_id)
+
+@condition(
+    etag_func=lambda request, user_id: feed_etag(user_id),
+    last_modified_func=lambda request, user_id: feed_last_modified(user_id)
+)
+def _user_calendar_feed(request, user_id):
+    return HttpResponse(get_feed(user_id), content_type='text/calendar; charset=utf-8')
+
 class SurveyList(generics.ListCreateAPIView):
-    queryset = Survey.objects.all()
+    queryset = SurveySerializer.setup_eager_loading(Survey.objects.all())
     serializer_class = SurveySerializer
     permission_classes = [IsAuthenticated]
 
+def _etag_matches(if_none_match, etag):
+    """Weak If-None-Match comparison (RFC 9110): any listed ETag, with or without W/, or *"""
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in etags}
+
+def survey_document_response(request, survey_id, public=False):
+    """Serve the cached survey document, or 304 if the client's copy is current"""
+    try:
+        document, etag = get_survey_document(survey_id)
+    except Survey.DoesNotExist:
+        raise Http404
+    if public and not document['is_active']:
+        raise Http404
+    if _etag_matches(request.headers.get('If-None-Match', ''), etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(document)
+    response['ETag'] = etag
+    return response
+
 class SurveyDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Survey.objects.all()
+    queryset = SurveySerializer.setup_eager_loading(Survey.objects.all())
     serializer_class = SurveySerializer
     permission_classes = [IsAuthenticated]
 
-class SurveyResponseList(generics.ListCreateAPIView):
-    queryset = SurveyResponse.objects.all()
-    serializer_class = ResponseSerializer
+    def retrieve(self, request, *args, **kwargs):
+        return survey_document_response(request, kwargs['pk'])
+
+class SurveyDocumentView(APIView):
+    """Public, cached definition of an active survey"""
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk):
+        return survey_document_response(request, pk, public=True)
+
+class SurveyResultsView(APIView):
+    """Per-question results of a survey, read from the QuestionTally counters"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        results = survey_results(pk)
+        if results is None:
+            if not Survey.objects.filter(pk=pk).exists():
+                raise Http404
+            results = {'survey': pk, 'questions': []}
+        return Response(results)
+
+class SurveyExportView(APIView):
+    """
+    Stream every response of a survey, one row per response.
+
+    ?output=csv (default) or ?output=columnar; see adpa_events.export.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'output': [f"Must be one of: {', '.join(EXPORT_FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not Survey.objects.filter(pk=pk).exists():
+            raise Http404
+        content_type, extension = {
+            'csv': ('text/csv', 'csv'),
+            'columnar': ('application/x-ndjson', 'ndjson'),
+        }[export_format]
+        response = StreamingHttpResponse(iter_export(pk, export_format), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="survey-{pk}-responses.{extension}"'
+        return response
+
+class SurveyResponseList(PaginationModeMixin, generics.ListCreateAPIView):
+    # Submissions carry their answers; see api.serializers.ResponseSerializer.
+    # ?cursor= pages run newest first on the primary key
+    queryset = SurveyResponse.objects.prefetch_related('adpa_answers')
+    serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
 
+    def create(self, request, *args, **kwargs):
+        if not staged_submissions_enabled():
+            return super().create(request, *args, **kwargs)
+        # Staged mode: validate, append to the staging table and acknowledge;
+        # ingest_survey_submissions writes the response later
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        staged = stage_submission(
+            serializer.validated_data['survey'].pk,
+            request.user.pk,
+            serializer.validated_data['adpa_answers']
+        )
+        return Response({'status': 'queued', 'id': staged.pk}, status=status.HTTP_202_ACCEPTED)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -80,10 +276,12 @@ def register_for_event(request, event_id):
     if not user.is_authenticated:
         return JsonResponse({'error': 'Authentication required'}, status=401)
 
-    if EventRegistration.objects.filter(event=event, user=user).exists():
+    try:
+        registration = register(event.pk, user)
+    except AlreadyRegistered:
         return JsonResponse({'error': 'Already registered'}, status=400)
-
-    registration = EventRegistration.objects.create(event=event, user=user)
+    except EventFull:
+        return JsonResponse({'error': 'Event is full'}, status=409)
     return JsonResponse({'message': 'Registration successful', 'id': registration.id})
 
 @login_required
@@ -91,8 +289,14 @@ def submit_survey_response(request, survey_id):
     survey = get_object_or_404(Survey, id=survey_id)
     user = request.user
 
-    if SurveyResponse.objects.filter(survey=survey, user=user).exists():
-        return JsonResponse({'error': 'Already submitted'}, status=400)
+    if staged_submissions_enabled():
+        staged = stage_submission(survey.pk, user.pk, [])
+        return JsonResponse({'message': 'Response queued', 'id': staged.id}, status=202)
 
-    response = SurveyResponse.objects.create(survey=survey, user=user)
+    # Let the unique constraint settle concurrent submissions instead of checking first
+    try:
+        with transaction.atomic():
+            response = SurveyResponse.objects.create(survey=survey, user=user)
+    except IntegrityError:
+        return JsonResponse({'error': 'Already submitted'}, status=400)
     return JsonResponse({'message': 'Response submitted', 'id': response.id})
\ No newline at end of file
@@ -1,6 +1,146 @@
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+APPROXIMATE_COUNT_THRESHOLD = 10000  # estimates below this are replaced by an exact COUNT
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100 
\ No newline at end of file
+    max_page_size = 100
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset pagination in the view's `ordering` (see PaginationModeMixin).
+
+    Each page continues from the last row of the previous one
+    (WHERE id < %s ORDER BY id DESC for ordering '-id'), so with an indexed
+    ordering deep pages cost the same as the first, and no COUNT is run.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+class EventKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for event listings.
+
+    Each page continues from the last start_date of the previous one
+    (WHERE start_date > %s ORDER BY start_date, id) on event_start_idx, so
+    deep pages cost the same as the first and no COUNT is run. Views can
+    flip the direction with their own `keyset_ordering`.
+    """
+    ordering = ('start_date', 'id')
+
+def estimate_count(queryset):
+    """
+    Return the number of rows in a queryset from the planner's statistics.
+
+    On PostgreSQL this is EXPLAIN's row estimate, which the planner derives
+    from pg_class.reltuples and the column statistics ANALYZE keeps, so it
+    costs a plan instead of a scan. Small estimates, where a COUNT is cheap
+    and an estimate is most likely to be off, and other databases get the
+    exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.get_compiler(queryset.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate >= getattr(settings, 'APPROXIMATE_COUNT_THRESHOLD', APPROXIMATE_COUNT_THRESHOLD):
+            return estimate
+    return queryset.count()
+
+class ApproximateCountPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator whose count is estimate_count().
+
+    Since the count may be off, any page number is accepted and whether
+    there is a next page is decided by reading one row past the page.
+    """
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_("That page contains no results"))
+        return ApproximateCountPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+class ApproximateCountPagination(StandardResultsSetPagination):
+    """Page number pagination with an estimated count, flagged as 'count_is_approximate'."""
+    django_paginator_class = ApproximateCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_is_approximate'] = True
+        return response
+
+class PaginationModeMixin:
+    """
+    Let the request pick how a listing is paginated: ?cursor= (empty for the
+    first page) pages by keyset with keyset_pagination_class,
+    ?count=approximate pages by number with an estimated count, and anything
+    else uses the view's pagination_class.
+
+    Cursor pages are ordered by keyset_ordering (by default the keyset
+    pagination's), which must be indexed and unique, and ?ordering= may only
+    pick the primary key on them. Other requests keep the queryset's own
+    order unless the view sets `ordering` itself.
+    """
+    keyset_pagination_class = KeysetPagination
+    approximate_count_pagination_class = ApproximateCountPagination
+    count_query_param = 'count'
+    keyset_ordering = None
+
+    def is_keyset_request(self):
+        return self.keyset_pagination_class.cursor_query_param in self.request.query_params
+
+    @property
+    def ordering(self):
+        # OrderingFilter's default order
+        if self.is_keyset_request():
+            return self.keyset_ordering or self.keyset_pagination_class.ordering
+        return None
+
+    @property
+    def ordering_fields(self):
+        # None lets OrderingFilter accept any serializer field
+        return ('id',) if self.is_keyset_request() else None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.is_keyset_request():
+                self._paginator = self.keyset_pagination_class()
+            elif self.request.query_params.get(self.count_query_param) == 'approximate':
+                self._paginator = self.approximate_count_pagination_class()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
@@ -1,6 +1,11 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from .models import Event, EventRegistration, Question, Choice, Answer
 from adpa_events.models import Survey, SurveyResponse, User
+from adpa_events.registrations import registered_event_ids
+from adpa_events.results import record_answers
+from adpa_events.serializers import survey_prefetches
+from adpa_events.survey_documents import get_question_map
 from django.contrib.auth import get_user_model
 from members.models import Member, Project, Document
 
@@ -40,38 +45,92 @@ class ChoiceSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class QuestionSerializer(serializers.ModelSerializer):
-    choices = ChoiceSerializer(many=True, read_only=True)
+    choices = ChoiceSerializer(source='adpa_choices', many=True, read_only=True)
     
     class Meta:
         model = Question
         fields = '__all__'
 
 class SurveySerializer(serializers.ModelSerializer):
-    questions = QuestionSerializer(many=True, read_only=True)
+    questions = QuestionSerializer(source='adpa_questions', many=True, read_only=True)
     
     class Meta:
         model = Survey
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetch the questions and choices in display order"""
+        return queryset.prefetch_related(*survey_prefetches())
+
 class AnswerSerializer(serializers.ModelSerializer):
+    # Plain ids; ResponseSerializer checks them against the survey's cached
+    # question map instead of looking each one up
+    question = serializers.IntegerField(source='question_id')
+    choice_answer = serializers.IntegerField(source='choice_answer_id', required=False, allow_null=True)
+
     class Meta:
         model = Answer
         fields = '__all__'
+        read_only_fields = ['response']
 
 class ResponseSerializer(serializers.ModelSerializer):
-    answers = AnswerSerializer(many=True)
+    answers = AnswerSerializer(source='adpa_answers', many=True)
     
     class Meta:
         model = SurveyResponse
         fields = '__all__'
+        read_only_fields = ['user']
+
+    def validate(self, attrs):
+        survey = attrs['survey']
+        if not survey.is_active:
+            raise serializers.ValidationError({'survey': 'This survey is not accepting responses.'})
+        questions = get_question_map(survey.pk)
+        errors = []
+        answered = {}
+        for answer in attrs['adpa_answers']:
+            error = self._answer_error(answer, questions, answered)
+            errors.append({'non_field_errors': [error]} if error else {})
+        missing = [pk for pk, question in questions.items() if question['required'] and pk not in answered]
+        if any(errors):
+            raise serializers.ValidationError({'answers': errors})
+        if missing:
+            raise serializers.ValidationError({'answers': f'Required questions not answered: {missing}'})
+        return attrs
+
+    @staticmethod
+    def _answer_error(answer, questions, answered):
+        question_id = answer['question_id']
+        question = questions.get(question_id)
+        if question is None:
+            return 'Question does not belong to this survey.'
+        choice = answer.get('choice_answer_id')
+        seen = answered.setdefault(question_id, set())
+        if question['type'] == 'text':
+            if choice is not None:
+                return 'Text questions do not take a choice.'
+            if seen:
+                return 'Question answered more than once.'
+        else:
+            if choice not in question['choices']:
+                return 'Choice does not belong to this question.'
+            if choice in seen or (seen and question['type'] == 'radio'):
+                return 'Question answered more than once.'
+        seen.add(choice)
+        return None
     
     def create(self, validated_data):
-        answers_data = validated_data.pop('answers')
-        response = SurveyResponse.objects.create(**validated_data)
-        
-        for answer_data in answers_data:
-            Answer.objects.create(response=response, **answer_data)
-        
+        answers_data = validated_data.pop('adpa_answers')
+        try:
+            with transaction.atomic():
+                response = SurveyResponse.objects.create(**validated_data)
+                answers = Answer.objects.bulk_create([
+                    Answer(response=response, **answer_data) for answer_data in answers_data
+                ])
+                record_answers(answers)
+        except IntegrityError:
+            raise serializers.ValidationError({'survey': 'You have already responded to this survey.'})
         return response
 
 class MemberSerializer(serializers.ModelSerializer):
@@ -98,10 +157,28 @@ class DocumentSerializer(serializers.ModelSerializer):
         model = Document
         fields = '__all__'
 
+class EventListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Look up the requesting user's registrations for the whole page at once
+        events = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        self.context['registered_event_ids'] = registered_event_ids(
+            getattr(request, 'user', None), [event.pk for event in events]
+        )
+        return super().to_representation(events)
+
 class EventDetailSerializer(serializers.ModelSerializer):
-    registrations_count = serializers.IntegerField(read_only=True)
-    is_registered = serializers.BooleanField(read_only=True)
+    # registrations_count is the denormalised Event.registrations_count column
+    is_registered = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
         fields = '__all__'
+        list_serializer_class = EventListSerializer
+
+    def get_is_registered(self, obj):
+        registered = self.context.get('registered_event_ids')
+        if registered is None:
+            request = self.context.get('request')
+            registered = registered_event_ids(getattr(request, 'user', None), [obj.pk])
+        return obj.pk in registered
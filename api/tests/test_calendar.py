@@ -0,0 +1,97 @@
+from datetime import timedelta
+from urllib.parse import urlparse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from adpa_events.ical import feed_token, feed_url
+from adpa_events.models import Event, EventRegistration
+from adpa_events.registrations import cancel_registration, register
+from adpa_events.views import public_calendar_feed, user_calendar_feed
+
+User = get_user_model()
+
+
+class CalendarFeedTests(APITestCase):
+    """Calendar feeds are built in one query and revalidated with none"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.organizer = User.objects.create(email='organizer@example.com')
+        self.user = User.objects.create(email='user@example.com')
+        self.events = [
+            Event.objects.create(
+                title=f'Summit {index}, Luanda; day {index}',
+                description='Line one\nLine two ' + 'x' * 100,
+                start_date=timezone.now() + timedelta(days=index + 1),
+                end_date=timezone.now() + timedelta(days=index + 1, hours=3),
+                location='Luanda',
+                organizer=self.organizer
+            )
+            for index in range(20)
+        ]
+        self.token = feed_token(self.user.pk)
+
+    def get(self, view, *args, **headers):
+        request = self.factory.get('/', **headers)
+        return view(request, *args)
+
+    def test_user_feed_is_one_query_and_revalidates_with_none(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for event in self.events:
+                register(event.pk, self.user)
+
+        with self.assertNumQueries(1):
+            response = self.get(user_calendar_feed, self.token)
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), 20)
+        self.assertIn('SUMMARY:Summit 0\\, Luanda\\; day 0', body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+
+        with self.assertNumQueries(0):
+            response = self.get(user_calendar_feed, self.token, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            response = self.get(
+                user_calendar_feed, self.token, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_feeds_change_with_registrations_and_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            register(self.events[0].pk, self.user)
+        etag = self.get(user_calendar_feed, self.token)['ETag']
+        public_etag = self.get(public_calendar_feed)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_registration(EventRegistration.objects.get(user=self.user))
+        response = self.get(user_calendar_feed, self.token, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('BEGIN:VEVENT', response.content.decode())
+        # Other users' registrations leave the public feed alone
+        self.assertEqual(self.get(public_calendar_feed, HTTP_IF_NONE_MATCH=public_etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.events[0].title = 'Renamed'
+            self.events[0].save()
+        response = self.get(public_calendar_feed, HTTP_IF_NONE_MATCH=public_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('SUMMARY:Renamed', response.content.decode())
+
+    def test_tampered_token_is_not_found(self):
+        with self.assertRaises(Http404):
+            self.get(user_calendar_feed, f'{self.user.pk + 1}:{self.token.split(":")[1]}')
+
+    @override_settings(SITE_URL='https://adpa.example.com')
+    def test_feed_urls_resolve_to_the_feeds(self):
+        """Feed links are reversed from the URL configuration"""
+        public, private = feed_url(), feed_url(self.user.pk)
+        self.assertTrue(public.startswith('https://adpa.example.com/'))
+        self.assertEqual(resolve(urlparse(public).path).func, public_calendar_feed)
+        match = resolve(urlparse(private).path)
+        self.assertEqual((match.func, match.kwargs), (user_calendar_feed, {'token': self.token}))
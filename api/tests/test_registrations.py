@@ -0,0 +1,488 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, close_old_connections, connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+from emailutils.models import QueuedEmail
+from adpa_events.models import Event, EventRegistration, WaitlistEntry
+from adpa_events.registrations import (
+    AlreadyRegistered,
+    EventFull,
+    EventNotFull,
+    cancel_registration,
+    join_waitlist,
+    promote_waitlist,
+    register
+)
+from adpa_events.registrations import rebuild_registration_counts
+from adpa_events.views import (
+    EventCheckInView,
+    EventDetail,
+    EventList,
+    EventRegistrationDetail,
+    EventRegistrationList,
+    EventWaitlistView
+)
+
+User = get_user_model()
+
+
+class RegistrationQueryCountTests(APITestCase):
+    """Registration endpoints run a fixed number of queries per page"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='testpass123')
+        self.events = []
+        for index in range(3):
+            organizer = User.objects.create_user(email=f'organizer{index}@example.com', password='testpass123')
+            self.events.append(Event.objects.create(
+                title=f'Event {index}',
+                description='Description',
+                start_date=timezone.now() + timedelta(days=7),
+                end_date=timezone.now() + timedelta(days=8),
+                location='Luanda',
+                organizer=organizer
+            ))
+
+    def register(self, count):
+        start = User.objects.count()
+        for index in range(count):
+            user = User.objects.create(email=f'user{start + index}@example.com')
+            EventRegistration.objects.create(event=self.events[index % len(self.events)], user=user)
+
+    def list_queries(self):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.viewer)
+        with CaptureQueriesContext(connection) as queries:
+            response = EventRegistrationList.as_view()(request, event_id=self.events[0].pk)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_list_queries_do_not_grow_with_page(self):
+        """A full page costs the same number of queries as a short one"""
+        self.register(2)
+        short_page = self.list_queries()
+        self.register(20)
+        self.assertEqual(self.list_queries(), short_page)
+
+    def test_detail_loads_related_rows_in_one_query(self):
+        """The detail view fetches the registration with its event and user"""
+        self.register(1)
+        registration = EventRegistration.objects.get()
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.viewer)
+        with self.assertNumQueries(1):
+            response = EventRegistrationDetail.as_view()(request, pk=registration.pk)
+            response.render()
+        self.assertEqual(response.data['user'], registration.user_id)
+
+
+def create_event(organizer, **kwargs):
+    return Event.objects.create(
+        title=kwargs.pop('title', 'Conference'),
+        description='Description',
+        start_date=timezone.now() + timedelta(days=7),
+        end_date=timezone.now() + timedelta(days=8),
+        location='Luanda',
+        organizer=organizer,
+        **kwargs
+    )
+
+
+class RegistrationCapacityTests(APITestCase):
+    """Registration is a single insert that takes a seat under the capacity"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.organizer = User.objects.create(email='organizer@example.com')
+        self.event = create_event(self.organizer, capacity=2)
+        self.users = [User.objects.create(email=f'user{i}@example.com') for i in range(3)]
+
+    def post(self, user):
+        request = self.factory.post('/', {'event': self.event.pk}, format='json')
+        force_authenticate(request, user=user)
+        response = EventRegistrationList.as_view()(request, event_id=self.event.pk)
+        response.render()
+        return response
+
+    def test_capacity_is_enforced(self):
+        self.assertEqual(self.post(self.users[0]).status_code, 201)
+        self.assertEqual(self.post(self.users[1]).status_code, 201)
+        self.assertEqual(self.post(self.users[2]).status_code, 409)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 2)
+        self.assertEqual(EventRegistration.objects.count(), 2)
+
+    def test_duplicate_registration_keeps_the_seat_count(self):
+        self.assertEqual(self.post(self.users[0]).status_code, 201)
+        response = self.post(self.users[0])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(str(response.data['detail']), 'Already registered')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 1)
+
+    def test_cancellation_frees_the_seat(self):
+        self.post(self.users[0])
+        self.post(self.users[1])
+        registration = EventRegistration.objects.get(user=self.users[0])
+        request = self.factory.delete('/')
+        force_authenticate(request, user=self.users[0])
+        response = EventRegistrationDetail.as_view()(request, pk=registration.pk)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.post(self.users[2]).status_code, 201)
+
+    def test_registration_is_two_statements(self):
+        """No existence check: the insert and the seat update, inside a savepoint"""
+        with CaptureQueriesContext(connection) as queries:
+            register(self.event.pk, self.users[0])
+        statements = [q['sql'] for q in queries if not q['sql'].upper().startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(len(statements), 2)
+
+
+class ConcurrentRegistrationTests(TransactionTestCase):
+    """Simultaneous registrations never overbook an event"""
+
+    def test_concurrent_registrations_respect_capacity(self):
+        organizer = User.objects.create(email='organizer@example.com')
+        event = create_event(organizer, capacity=50)
+        User.objects.bulk_create([User(email=f'user{i}@example.com') for i in range(300)])
+        users = list(User.objects.exclude(pk=organizer.pk))
+        # Every third user clicks twice
+        attempts = users + users[::3]
+
+        def attempt(user):
+            try:
+                while True:
+                    try:
+                        register(event.pk, user)
+                        return 'registered'
+                    except OperationalError:
+                        # SQLite reports lock contention instead of waiting; retry
+                        continue
+            except AlreadyRegistered:
+                return 'duplicate'
+            except EventFull:
+                return 'full'
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            outcomes = list(pool.map(attempt, attempts))
+
+        event.refresh_from_db()
+        self.assertEqual(outcomes.count('registered'), 50)
+        self.assertEqual(event.registrations_count, 50)
+        self.assertEqual(EventRegistration.objects.filter(event=event).count(), 50)
+
+
+class EventListingTests(APITestCase):
+    """Event listings read the stored counter and look up is_registered per page"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.organizer = User.objects.create(email='organizer@example.com')
+        self.viewer = User.objects.create(email='viewer@example.com')
+        self.events = []
+
+    def add_events(self, count):
+        for index in range(count):
+            event = create_event(self.organizer, title=f'Event {len(self.events)}')
+            register(event.pk, User.objects.create(email=f'attendee{event.pk}@example.com'))
+            if index % 2 == 0:
+                register(event.pk, self.viewer)
+            self.events.append(event)
+
+    def list_events(self, user):
+        request = self.factory.get('/')
+        force_authenticate(request, user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = EventList.as_view()(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'], len(queries)
+
+    def test_list_queries_do_not_grow_with_page(self):
+        self.add_events(2)
+        _, short_page = self.list_events(self.viewer)
+        self.add_events(10)
+        results, full_page = self.list_events(self.viewer)
+        self.assertEqual(len(results), 10)
+        self.assertEqual(full_page, short_page)
+        # COUNT for the paginator, the page and the viewer's registrations
+        self.assertEqual(full_page, 3)
+
+    def test_counts_and_flags(self):
+        self.add_events(2)
+        results, _ = self.list_events(self.viewer)
+        by_id = {row['id']: row for row in results}
+        first, second = self.events
+        self.assertEqual(by_id[first.pk]['registrations_count'], 2)
+        self.assertTrue(by_id[first.pk]['is_registered'])
+        self.assertEqual(by_id[second.pk]['registrations_count'], 1)
+        self.assertFalse(by_id[second.pk]['is_registered'])
+
+    def test_anonymous_listing_skips_the_lookup(self):
+        self.add_events(2)
+        request = self.factory.get('/')
+        with self.assertNumQueries(2):
+            response = EventList.as_view()(request)
+            response.render()
+        self.assertFalse(any(row['is_registered'] for row in response.data['results']))
+
+    def test_keyset_pages(self):
+        """?cursor= pages newest first by keyset: the page and the registrations, no COUNT"""
+        self.add_events(12)
+        request = self.factory.get('/', {'cursor': ''})
+        force_authenticate(request, user=self.viewer)
+        with CaptureQueriesContext(connection) as queries:
+            response = EventList.as_view()(request)
+            response.render()
+        self.assertEqual(len(queries), 2)
+        first = [row['id'] for row in response.data['results']]
+        self.assertEqual(len(first), 10)
+        request = self.factory.get(response.data['next'])
+        force_authenticate(request, user=self.viewer)
+        second = [row['id'] for row in EventList.as_view()(request).data['results']]
+        ordered = [e.pk for e in sorted(self.events, key=lambda e: (e.start_date, e.pk), reverse=True)]
+        self.assertEqual(first + second, ordered)
+
+    def test_registrations_keep_their_order_without_a_cursor(self):
+        """Only ?cursor= pages switch to the id keyset; ?ordering= there may only pick id"""
+        self.add_events(2)
+        # Registration dates running against the ids: oldest id, newest date
+        ids = list(EventRegistration.objects.order_by('id').values_list('id', flat=True))
+        now = timezone.now()
+        for offset, pk in enumerate(ids):
+            EventRegistration.objects.filter(pk=pk).update(registration_date=now - timedelta(minutes=offset))
+
+        def listed(params):
+            request = self.factory.get('/', params)
+            force_authenticate(request, user=self.viewer)
+            return [row['id'] for row in EventRegistrationList.as_view()(request).data['results']]
+
+        self.assertEqual(listed({}), ids)
+        self.assertEqual(listed({'cursor': ''}), ids[::-1])
+        self.assertEqual(listed({'cursor': '', 'ordering': 'registration_date'}), ids[::-1])
+        self.assertEqual(listed({'cursor': '', 'ordering': 'id'}), ids)
+
+    def test_detail(self):
+        self.add_events(1)
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.viewer)
+        response = EventDetail.as_view()(request, pk=self.events[0].pk)
+        self.assertTrue(response.data['is_registered'])
+
+    def test_registrations_keyset_pages_newest_first(self):
+        self.add_events(3)
+        request = self.factory.get('/', {'cursor': '', 'page_size': 3})
+        force_authenticate(request, user=self.viewer)
+        response = EventRegistrationList.as_view()(request)
+        self.assertNotIn('count', response.data)
+        first = [row['id'] for row in response.data['results']]
+        request = self.factory.get(response.data['next'])
+        force_authenticate(request, user=self.viewer)
+        second = [row['id'] for row in EventRegistrationList.as_view()(request).data['results']]
+        self.assertEqual(first + second, list(EventRegistration.objects.order_by('-id').values_list('id', flat=True)))
+
+    def test_rebuild_recounts_registrations_written_directly(self):
+        self.add_events(1)
+        EventRegistration.objects.create(event=self.events[0], user=User.objects.create(email='x@example.com'))
+        rebuild_registration_counts()
+        self.events[0].refresh_from_db()
+        self.assertEqual(self.events[0].registrations_count, 3)
+
+
+class WaitlistTests(APITestCase):
+    """Freed seats go to the waitlist in order and queue a confirmation"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.organizer = User.objects.create(email='organizer@example.com')
+        self.event = create_event(self.organizer, capacity=2)
+        self.users = [User.objects.create(email=f'user{i}@example.com') for i in range(6)]
+        register(self.event.pk, self.users[0])
+        register(self.event.pk, self.users[1])
+
+    def join(self, user):
+        request = self.factory.post('/')
+        force_authenticate(request, user=user)
+        return EventWaitlistView.as_view()(request, event_id=self.event.pk)
+
+    def test_join_reports_position(self):
+        self.assertEqual(self.join(self.users[2]).data['position'], 1)
+        self.assertEqual(self.join(self.users[3]).data['position'], 2)
+        self.assertEqual(self.join(self.users[3]).status_code, 400)
+        self.assertEqual(self.join(self.users[0]).status_code, 400)
+
+    def test_freed_seats_are_promoted_in_order(self):
+        for user in self.users[2:5]:
+            join_waitlist(self.event.pk, user)
+        for registration in EventRegistration.objects.filter(user__in=self.users[:2]):
+            cancel_registration(registration)
+
+        # A seat is free, but the waitlist comes first
+        with self.assertRaises(EventFull):
+            register(self.event.pk, self.users[5])
+
+        self.assertEqual(promote_waitlist(), (2, 0))
+        registered = set(EventRegistration.objects.filter(event=self.event).values_list('user_id', flat=True))
+        self.assertEqual(registered, {self.users[2].pk, self.users[3].pk})
+        self.assertEqual(list(WaitlistEntry.objects.values_list('user_id', flat=True)), [self.users[4].pk])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 2)
+        queued = QueuedEmail.objects.filter(template_name='event_registration')
+        self.assertEqual(
+            sorted(email.recipient_list[0] for email in queued),
+            [self.users[2].email, self.users[3].email]
+        )
+        self.assertEqual(promote_waitlist(), (0, 0))
+
+    def test_entries_of_registered_users_are_dropped(self):
+        join_waitlist(self.event.pk, self.users[2])
+        EventRegistration.objects.filter(user=self.users[0]).delete()
+        EventRegistration.objects.create(event=self.event, user=self.users[2])
+        # registrations_count was not touched by the direct writes, so one seat looks free
+        Event.objects.filter(pk=self.event.pk).update(registrations_count=1)
+        self.assertEqual(promote_waitlist(), (0, 1))
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_only_full_capped_events_can_be_waitlisted(self):
+        """A waitlist entry never blocks registration for an event with free seats"""
+        open_event = create_event(self.organizer, capacity=5)
+        unlimited = create_event(self.organizer)
+        for event in (open_event, unlimited):
+            request = self.factory.post('/')
+            force_authenticate(request, user=self.users[2])
+            self.assertEqual(EventWaitlistView.as_view()(request, event_id=event.pk).status_code, 400)
+            with self.assertRaises(EventNotFull):
+                join_waitlist(event.pk, self.users[2])
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+        # Entries written some other way don't block an unlimited event either
+        WaitlistEntry.objects.create(event=unlimited, user=self.users[3])
+        register(unlimited.pk, self.users[4])
+        register(open_event.pk, self.users[4])
+
+    def test_seats_held_for_the_waitlist_can_be_waitlisted(self):
+        """A newcomer turned away from a seat held for the waitlist can join it"""
+        join_waitlist(self.event.pk, self.users[2])
+        cancel_registration(EventRegistration.objects.get(user=self.users[0]))
+
+        with self.assertRaises(EventFull):
+            register(self.event.pk, self.users[3])
+        self.assertEqual(self.join(self.users[3]).data['position'], 2)
+
+        self.assertEqual(promote_waitlist(), (1, 0))
+        self.assertEqual(list(WaitlistEntry.objects.values_list('user_id', flat=True)), [self.users[3].pk])
+
+
+class ConcurrentWaitlistPromotionTests(TransactionTestCase):
+    """Parallel promotion workers never hand out a seat twice"""
+
+    def test_parallel_workers(self):
+        organizer = User.objects.create(email='organizer@example.com')
+        events = [create_event(organizer, title=f'Event {i}', capacity=5) for i in range(10)]
+        User.objects.bulk_create([User(email=f'user{i}@example.com') for i in range(100)])
+        users = list(User.objects.exclude(pk=organizer.pk).order_by('id'))
+        # Waitlists of events whose seats were just freed, as after a capacity increase
+        for index, user in enumerate(users):
+            WaitlistEntry.objects.create(event=events[index % len(events)], user=user)
+
+        def work(_):
+            promoted = 0
+            try:
+                while True:
+                    try:
+                        batch, _ = promote_waitlist(batch_size=2)
+                    except OperationalError:
+                        # SQLite reports lock contention instead of waiting; retry
+                        continue
+                    if not batch and not WaitlistEntry.objects.filter(
+                        event__registrations_count__lt=5
+                    ).exists():
+                        return promoted
+                    promoted += batch
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            promoted = sum(pool.map(work, range(4)))
+
+        self.assertEqual(promoted, 50)
+        for event in Event.objects.all():
+            self.assertEqual(event.registrations_count, 5)
+            self.assertEqual(event.adpa_registrations.count(), 5)
+            # The first five to join each event got its seats
+            first = [user.pk for user in users[events.index(event)::len(events)][:5]]
+            self.assertEqual(sorted(event.adpa_registrations.values_list('user_id', flat=True)), first)
+        self.assertEqual(WaitlistEntry.objects.count(), 50)
+
+
+class CheckInTests(APITestCase):
+    """Badge scans are checked in per batch, idempotently"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.organizer = User.objects.create(email='organizer@example.com')
+        self.event = create_event(self.organizer)
+        self.users = [User.objects.create(email=f'user{i}@example.com') for i in range(30)]
+        self.registrations = [register(self.event.pk, user) for user in self.users]
+
+    def post(self, data, user=None):
+        request = self.factory.post('/', data, format='json')
+        force_authenticate(request, user=user or self.organizer)
+        with CaptureQueriesContext(connection) as queries:
+            response = EventCheckInView.as_view()(request, event_id=self.event.pk)
+            response.render()
+        return response, queries
+
+    def test_batch_is_one_lookup_and_one_update(self):
+        ids = [r.pk for r in self.registrations[:20]]
+        response, queries = self.post({'registrations': ids, 'emails': ['user25@example.com', 'nobody@example.com']})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['checked_in'], 21)
+        self.assertEqual(response.data['not_registered'], 1)
+        self.assertEqual(response.data['results'][20]['registration'], self.registrations[25].pk)
+        # Event, registrations lookup, UPDATE
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(EventRegistration.objects.filter(attended=True, checked_in_at__isnull=False).count(), 21)
+
+    def test_repeat_scans_are_idempotent(self):
+        ids = [self.registrations[0].pk, self.registrations[0].pk]
+        response, _ = self.post({'registrations': ids})
+        self.assertEqual([r['status'] for r in response.data['results']], ['checked_in', 'already_checked_in'])
+        checked_in_at = EventRegistration.objects.get(pk=ids[0]).checked_in_at
+        response, _ = self.post({'registrations': ids[:1]})
+        self.assertEqual(response.data['already_checked_in'], 1)
+        self.assertEqual(EventRegistration.objects.get(pk=ids[0]).checked_in_at, checked_in_at)
+
+    def test_offline_sync_keeps_scan_times(self):
+        earlier = timezone.now() - timedelta(hours=1)
+        scans = [
+            {'registration': self.registrations[0].pk, 'scanned_at': (earlier + timedelta(minutes=5)).isoformat()},
+            {'email': self.users[1].email, 'scanned_at': earlier.isoformat()},
+        ]
+        self.post({'registrations': [self.registrations[0].pk]})
+        response, _ = self.post({'scans': scans})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([r['status'] for r in response.data['results']], ['already_checked_in', 'checked_in'])
+        first, second = EventRegistration.objects.filter(pk__in=[r.pk for r in self.registrations[:2]]).order_by('id')
+        # The earlier offline scan replaces the live one
+        self.assertEqual(first.checked_in_at, earlier + timedelta(minutes=5))
+        self.assertEqual(second.checked_in_at, earlier)
+        # Uploading the same queue again changes nothing
+        response, _ = self.post({'scans': scans})
+        self.assertEqual(response.data['already_checked_in'], 2)
+
+    def test_invalid_batches(self):
+        response, _ = self.post({})
+        self.assertEqual(response.status_code, 400)
+        response, _ = self.post({'scans': [{'registration': 1, 'email': 'user1@example.com'}]})
+        self.assertEqual(response.status_code, 400)
+        response, _ = self.post({'registrations': [1]}, user=self.users[0])
+        self.assertEqual(response.status_code, 403)
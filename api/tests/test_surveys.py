@@ -0,0 +1,429 @@
+import csv
+import io
+import json
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+from django.test import override_settings
+from adpa_events.ingestion import ingest_staged_submissions
+from adpa_events.models import Answer, Choice, Question, StagedSubmission, Survey, SurveyResponse
+from adpa_events.survey_documents import get_survey_document
+from adpa_events.results import rebuild_survey_results
+from adpa_events.views import SurveyDetail, SurveyDocumentView, SurveyExportView, SurveyList, SurveyResponseList, SurveyResultsView
+from api.serializers import SurveySerializer
+
+User = get_user_model()
+
+
+def create_survey(title, questions, choices=3):
+    survey = Survey.objects.create(title=title)
+    # Created in reverse so display order differs from insertion order
+    for index in reversed(range(questions)):
+        question = Question.objects.create(
+            survey=survey,
+            text=f'Question {index}',
+            question_type='radio',
+            order=index
+        )
+        for choice in reversed(range(choices)):
+            Choice.objects.create(question=question, text=f'Choice {choice}', order=choice)
+    return survey
+
+
+class SurveySerializationTests(APITestCase):
+    """Survey read paths load questions and choices with a fixed number of queries"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(email='test@example.com', password='testpass123')
+        self.survey = create_survey('Feedback', questions=5)
+
+    def get(self, view, **kwargs):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = view.as_view()(request, **kwargs)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_detail_nests_ordered_questions_and_choices(self):
+        """Questions and choices come back in display order"""
+        response, _ = self.get(SurveyDetail, pk=self.survey.pk)
+        questions = response.data['questions']
+        self.assertEqual([q['text'] for q in questions], [f'Question {i}' for i in range(5)])
+        self.assertEqual([c['text'] for c in questions[0]['choices']], ['Choice 0', 'Choice 1', 'Choice 2'])
+
+    def test_detail_queries_do_not_grow_with_questions(self):
+        """A 40-question survey costs the same queries as a 5-question one"""
+        _, small = self.get(SurveyDetail, pk=self.survey.pk)
+        large = create_survey('Census', questions=40)
+        _, queries = self.get(SurveyDetail, pk=large.pk)
+        self.assertEqual(queries, small)
+        self.assertEqual(queries, 3)
+
+    def test_list_queries_do_not_grow_with_surveys(self):
+        """Listing more surveys reuses the same prefetch queries"""
+        _, few = self.get(SurveyList)
+        for index in range(4):
+            create_survey(f'Survey {index}', questions=3)
+        _, many = self.get(SurveyList)
+        self.assertEqual(many, few)
+
+    def test_api_serializer_uses_prefetch(self):
+        """The api survey serializer reads the same prefetched relations"""
+        queryset = SurveySerializer.setup_eager_loading(Survey.objects.filter(pk=self.survey.pk))
+        with self.assertNumQueries(3):
+            data = SurveySerializer(queryset, many=True).data
+        self.assertEqual(len(data[0]['questions']), 5)
+
+
+class SurveyDocumentTests(APITestCase):
+    """Cached survey documents with ETag revalidation"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.survey = create_survey('Feedback', questions=3)
+
+    def get(self, **headers):
+        request = self.factory.get('/', **headers)
+        response = SurveyDocumentView.as_view()(request, pk=self.survey.pk)
+        response.render()
+        return response
+
+    def test_hit_runs_no_queries(self):
+        """Once built, the document is served from the cache alone"""
+        self.get()
+        with self.assertNumQueries(0):
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['questions']), 3)
+
+    def test_if_none_match_returns_not_modified(self):
+        """A matching ETag gets a 304 without a body"""
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_none_match_compares_whole_etags(self):
+        """Listed, weak and * ETags match; partial ones don't"""
+        etag = self.get()['ETag']
+        for header in (f'"other", {etag}', f'W/{etag}', '*'):
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=header).status_code, 304)
+        for header in (etag.strip('"'), etag[:-2] + '"', f'"{etag}"'):
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=header).status_code, 200)
+
+    def test_choice_change_publishes_new_version(self):
+        """Editing a choice changes the ETag and the served document"""
+        etag = self.get()['ETag']
+        choice = Choice.objects.filter(question__survey=self.survey).first()
+        choice.text = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            choice.save()
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        texts = [c['text'] for q in response.data['questions'] for c in q['choices']]
+        self.assertIn('Renamed', texts)
+
+    def test_question_delete_and_survey_deactivation(self):
+        """Question deletes are picked up and inactive surveys are not public"""
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.filter(survey=self.survey).first().delete()
+        self.assertEqual(len(self.get().data['questions']), 2)
+
+        self.survey.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.survey.save()
+        self.assertEqual(self.get().status_code, 404)
+
+
+class SurveySubmissionTests(APITestCase):
+    """Survey submissions are validated up front and written in bulk"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(email='test@example.com', password='testpass123')
+        self.survey = create_survey('Feedback', questions=5)
+        self.questions = list(self.survey.adpa_questions.prefetch_related('adpa_choices'))
+
+    def payload(self, questions, survey=None):
+        return {
+            'survey': (survey or self.survey).pk,
+            'answers': [
+                {'question': q.pk, 'choice_answer': q.adpa_choices.all()[0].pk}
+                for q in questions
+            ]
+        }
+
+    def submit(self, data, user=None):
+        request = self.factory.post('/', data, format='json')
+        force_authenticate(request, user=user or self.user)
+        response = SurveyResponseList.as_view()(request, survey_id=self.survey.pk)
+        response.render()
+        return response
+
+    def test_submission_creates_response_and_answers(self):
+        """Every answer is stored against the new response"""
+        response = self.submit(self.payload(self.questions))
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data['answers']), 5)
+        self.assertEqual(Answer.objects.filter(response__user=self.user).count(), 5)
+
+    def test_queries_do_not_grow_with_answers(self):
+        """A 50-question submission runs as many queries as a 5-question one"""
+        def measure(survey, user):
+            get_survey_document(survey.pk)
+            questions = survey.adpa_questions.prefetch_related('adpa_choices')
+            with CaptureQueriesContext(connection) as queries:
+                response = self.submit(self.payload(questions, survey), user=user)
+            self.assertEqual(response.status_code, 201, response.data)
+            return len(queries)
+
+        small = measure(self.survey, self.user)
+        other = User.objects.create_user(email='other@example.com', password='testpass123')
+        self.assertEqual(measure(create_survey('Census', questions=50), other), small)
+
+    def test_invalid_answer_writes_nothing(self):
+        """A choice from another question rejects the whole submission"""
+        data = self.payload(self.questions)
+        data['answers'][1]['choice_answer'] = data['answers'][0]['choice_answer']
+        response = self.submit(data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('answers', response.data)
+        self.assertFalse(SurveyResponse.objects.exists())
+
+    def test_required_questions_and_duplicates(self):
+        """Missing required answers and second submissions are rejected"""
+        response = self.submit(self.payload(self.questions[:3]))
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(self.submit(self.payload(self.questions)).status_code, 201)
+        response = self.submit(self.payload(self.questions))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Answer.objects.count(), 5)
+
+
+@override_settings(SURVEY_STAGED_SUBMISSIONS=True)
+class SurveyIngestionTests(APITestCase):
+    """Staged submissions are acknowledged first and ingested in bulk"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.survey = create_survey('Feedback', questions=4)
+        self.answers = [
+            {'question': q.pk, 'choice_answer': q.adpa_choices.all()[0].pk}
+            for q in self.survey.adpa_questions.prefetch_related('adpa_choices')
+        ]
+        self.users = [
+            User.objects.create_user(email=f'user{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+
+    def submit(self, user, answers=None):
+        request = self.factory.post('/', {'survey': self.survey.pk, 'answers': answers or self.answers}, format='json')
+        force_authenticate(request, user=user)
+        response = SurveyResponseList.as_view()(request, survey_id=self.survey.pk)
+        response.render()
+        return response
+
+    def test_submission_is_staged(self):
+        """A valid submission is acknowledged with 202 and nothing is written yet"""
+        response = self.submit(self.users[0])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(StagedSubmission.objects.count(), 1)
+        self.assertFalse(SurveyResponse.objects.exists())
+
+    def test_invalid_submission_is_rejected_up_front(self):
+        """Validation still happens before staging"""
+        response = self.submit(self.users[0], answers=self.answers[:1])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StagedSubmission.objects.exists())
+
+    def test_ingest_deduplicates_and_bulk_writes(self):
+        """Repeat and already-stored submissions are dropped; the rest are written in bulk"""
+        SurveyResponse.objects.create(survey=self.survey, user=self.users[2])
+        for user in (self.users[0], self.users[1], self.users[0], self.users[2]):
+            self.submit(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            created, duplicates = ingest_staged_submissions()
+        self.assertEqual((created, duplicates), (2, 2))
+        inserts = [
+            q for q in queries
+            if q['sql'].startswith(('INSERT INTO "adpa_events_surveyresponse"', 'INSERT INTO "adpa_events_answer"'))
+        ]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(SurveyResponse.objects.filter(survey=self.survey).count(), 3)
+        self.assertEqual(Answer.objects.count(), 8)
+        self.assertFalse(StagedSubmission.objects.exists())
+        self.assertEqual(ingest_staged_submissions(), (0, 0))
+
+    def test_ingest_drops_answers_to_removed_questions(self):
+        """Answers whose question was deleted after staging are skipped"""
+        self.submit(self.users[0])
+        self.survey.adpa_questions.first().delete()
+        ingest_staged_submissions()
+        self.assertEqual(Answer.objects.count(), 3)
+
+
+class SurveyResultsTests(APITestCase):
+    """Survey results come from incrementally maintained tallies"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='admin123')
+        self.survey = create_survey('Feedback', questions=2)
+        self.text_question = Question.objects.create(
+            survey=self.survey, text='Comments', question_type='text', order=10
+        )
+        self.pick = Question.objects.create(
+            survey=self.survey, text='Topics', question_type='checkbox', order=20, is_required=False
+        )
+        self.topics = [Choice.objects.create(question=self.pick, text=t, order=i) for i, t in enumerate('ab')]
+        self.questions = list(self.survey.adpa_questions.filter(question_type='radio').prefetch_related('adpa_choices'))
+
+    def submit(self, user, choice_index, comment, topics, expected=201):
+        answers = [
+            {'question': q.pk, 'choice_answer': q.adpa_choices.all()[choice_index].pk} for q in self.questions
+        ]
+        answers.append({'question': self.text_question.pk, 'text_answer': comment})
+        answers += [{'question': self.pick.pk, 'choice_answer': self.topics[i].pk} for i in topics]
+        request = self.factory.post('/', {'survey': self.survey.pk, 'answers': answers}, format='json')
+        force_authenticate(request, user=user)
+        response = SurveyResponseList.as_view()(request, survey_id=self.survey.pk)
+        response.render()
+        self.assertEqual(response.status_code, expected, response.data)
+
+    def results(self):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = SurveyResultsView.as_view()(request, pk=self.survey.pk)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def submit_all(self):
+        users = [User.objects.create_user(email=f'user{i}@example.com', password='x') for i in range(3)]
+        self.submit(users[0], 0, 'Great', [0, 1])
+        self.submit(users[1], 0, 'Good food', [1])
+        self.submit(users[2], 2, '', [])
+
+    def test_results_from_direct_submissions(self):
+        """Choice counts and text stats are tallied as responses arrive"""
+        self.submit_all()
+        data, queries = self.results()
+        self.assertEqual(queries, 1)
+        first, text, topics = data['questions'][0], data['questions'][2], data['questions'][3]
+        self.assertEqual(first['responses'], 3)
+        self.assertEqual([c['count'] for c in first['choices']], [2, 1])
+        self.assertEqual(text['responses'], 3)
+        self.assertEqual(text['average_length'], round(len('GreatGood food') / 3, 1))
+        self.assertEqual(topics['responses'], 2)
+        self.assertEqual([c['count'] for c in topics['choices']], [1, 2])
+
+    def test_staged_ingestion_and_rebuild_agree(self):
+        """Ingested submissions are tallied and a rebuild reproduces the counters"""
+        users = [User.objects.create_user(email=f'user{i}@example.com', password='x') for i in range(2)]
+        with override_settings(SURVEY_STAGED_SUBMISSIONS=True):
+            self.submit(users[0], 1, 'Hi', [0], expected=202)
+            self.submit(users[1], 1, 'Hello', [0, 1], expected=202)
+        ingest_staged_submissions()
+
+        incremental, _ = self.results()
+        self.assertEqual(incremental['questions'][0]['choices'][0]['count'], 2)
+        rebuild_survey_results(self.survey.pk)
+        self.assertEqual(self.results()[0], incremental)
+
+    def test_unknown_and_empty_surveys(self):
+        """Surveys without answers return no questions; unknown ids are 404"""
+        self.assertEqual(self.results()[0]['questions'], [])
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.admin)
+        self.assertEqual(SurveyResultsView.as_view()(request, pk=999).status_code, 404)
+
+
+class SurveyExportTests(APITestCase):
+    """Survey exports stream one row per response"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='admin123')
+        self.survey = create_survey('Feedback', questions=2)
+        self.comment = Question.objects.create(
+            survey=self.survey, text='Comments', question_type='text', order=10, is_required=False
+        )
+        self.pick = Question.objects.create(
+            survey=self.survey, text='Topics', question_type='checkbox', order=20, is_required=False
+        )
+        self.topics = [Choice.objects.create(question=self.pick, text=t, order=i) for i, t in enumerate('ab')]
+        radios = self.survey.adpa_questions.filter(question_type='radio').order_by('order')
+        self.radio_choices = [q.adpa_choices.order_by('order').first() for q in radios]
+        for index in range(3):
+            user = User.objects.create_user(email=f'user{index}@example.com', password='x')
+            response = SurveyResponse.objects.create(survey=self.survey, user=user)
+            for choice in self.radio_choices:
+                Answer.objects.create(response=response, question=choice.question, choice_answer=choice)
+            if index < 2:
+                Answer.objects.create(response=response, question=self.comment, text_answer=f'Comment, {index}')
+            for topic in self.topics[:index]:
+                Answer.objects.create(response=response, question=self.pick, choice_answer=topic)
+
+    def export(self, output):
+        request = self.factory.get('/', {'output': output})
+        force_authenticate(request, user=self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = SurveyExportView.as_view()(request, pk=self.survey.pk)
+            body = b''.join(response.streaming_content).decode()
+        self.assertEqual(response.status_code, 200)
+        return body, queries
+
+    def test_csv_has_a_column_per_question(self):
+        """One header row, then one row per response in question order"""
+        body, queries = self.export('csv')
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], ['response_id', 'user', 'submitted_at', 'Question 0', 'Question 1', 'Comments', 'Topics'])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][3:], ['Choice 0', 'Choice 0', 'Comment, 0', ''])
+        self.assertEqual(rows[3][3:], ['Choice 0', 'Choice 0', '', 'a; b'])
+        # Survey existence, the document build and a single answers query
+        answer_queries = [q for q in queries if 'adpa_events_answer' in q['sql']]
+        self.assertEqual(len(answer_queries), 1)
+
+    def test_columnar_row_groups(self):
+        """Columnar output is a schema line and dictionary-encoded row groups"""
+        with override_settings(SURVEY_EXPORT_ROW_GROUP_SIZE=2):
+            body, _ = self.export('columnar')
+        lines = [json.loads(line) for line in body.splitlines()]
+        schema, groups = lines[0], lines[1:]
+        self.assertEqual(schema['questions'][3]['choices'], ['a', 'b'])
+        self.assertEqual([group['rows'] for group in groups], [2, 1])
+        column = lambda name: sum((group['columns'][name] for group in groups), [])
+        self.assertEqual(column(f'q{self.pick.pk}'), [[], [0], [0, 1]])
+        self.assertEqual(column(f'q{self.comment.pk}'), ['Comment, 0', 'Comment, 1', None])
+        self.assertEqual(column(f'q{self.radio_choices[0].question_id}'), [0, 0, 0])
+
+    def test_unknown_output_is_rejected(self):
+        request = self.factory.get('/', {'output': 'xlsx'})
+        force_authenticate(request, user=self.admin)
+        response = SurveyExportView.as_view()(request, pk=self.survey.pk)
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_writes_to_its_stdout(self):
+        out = io.StringIO()
+        call_command('export_survey_responses', self.survey.pk, stdout=out)
+        body, _ = self.export('csv')
+        self.assertEqual(out.getvalue(), body)
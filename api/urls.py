@@ -36,7 +36,6 @@ from .views import (
     CSRFTokenView,
     EventList,
     EventDetail,
-    track_email_open,
     PasswordResetView,
     PasswordResetConfirmView,
     UserProfileViewSet,
@@ -49,8 +48,16 @@ from .views import (
 from adpa_events.views import (
     SurveyList,
     SurveyDetail,
+    SurveyDocumentView,
+    SurveyResultsView,
+    SurveyExportView,
     EventRegistrationList,
     EventRegistrationDetail,
+    EventWaitlistView,
+    EventCheckInView,
+    CalendarFeedView,
+    public_calendar_feed,
+    user_calendar_feed,
     SurveyResponseList,
     SurveyResponseDetail
 )
@@ -155,18 +162,26 @@ urlpatterns = [
     path('events/', EventList.as_view(), name='event-list'),
     path('events/<int:pk>/', EventDetail.as_view(), name='event-detail'),
     path('events/<int:event_id>/register/', EventRegistrationList.as_view(), name='event-registration-list'),
+    path('events/<int:event_id>/waitlist/', EventWaitlistView.as_view(), name='event-waitlist'),
+    path('events/<int:event_id>/check-in/', EventCheckInView.as_view(), name='event-check-in'),
+    path('calendar/', CalendarFeedView.as_view(), name='calendar-feeds'),
+    path('calendar/events.ics', public_calendar_feed, name='calendar-public-feed'),
+    path('calendar/users/<str:token>.ics', user_calendar_feed, name='calendar-user-feed'),
     
     # ====================
     # Survey Management
     # ====================
     path('surveys/', SurveyList.as_view(), name='survey-list'),
     path('surveys/<int:pk>/', SurveyDetail.as_view(), name='survey-detail'),
+    path('surveys/<int:pk>/document/', SurveyDocumentView.as_view(), name='survey-document'),
+    path('surveys/<int:pk>/results/', SurveyResultsView.as_view(), name='survey-results'),
+    path('surveys/<int:pk>/export/', SurveyExportView.as_view(), name='survey-export'),
     path('surveys/<int:survey_id>/responses/', SurveyResponseList.as_view(), name='survey-response-list'),
     
     # ====================
     # Email Tracking
     # ====================
-    path('email/track/<uuid:email_id>.png', track_email_open, name='track_email_open'),
+    path('', include('emailutils.urls')),
     
     # ====================
     # Documentation
@@ -201,6 +216,13 @@ Event Management:
 - list: events/
 - detail: events/<id>/
 - registration: events/<id>/register/
+- waitlist: events/<id>/waitlist/
+- check-in: events/<id>/check-in/
+
+Calendar Feeds:
+- feeds: calendar/
+- public: calendar/events.ics
+- personal: calendar/users/<token>.ics
 
 Survey Management:
 - list: surveys/
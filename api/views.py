@@ -22,7 +22,6 @@ import requests
 from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.utils.encoding import force_bytes, force_str
@@ -38,6 +37,7 @@ from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
 from rest_auth.registration.views import SocialLoginView
+from emailutils.utils import queue_email
 
 User = get_user_model()
 
@@ -253,14 +253,13 @@ class PasswordRecoveryView(APIView):
         uid = urlsafe_base64_encode(force_bytes(user.pk))
         reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
         
-        # Send email
-        send_mail(
+        # Queue email; delivery happens in the send_queued_emails worker
+        queue_email(
             'Password Reset Request',
             f'Click the link to reset your password: {reset_url}\n'
             f'This link will expire in 24 hours.',
-            settings.DEFAULT_FROM_EMAIL,
             [user.email],
-            fail_silently=False,
+            settings.DEFAULT_FROM_EMAIL,
         )
 
         return Response(
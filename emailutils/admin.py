@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EmailLog
+from .models import EmailDailyStats, EmailLog, QueuedEmail
 
 @admin.register(EmailLog)
 class EmailLogAdmin(admin.ModelAdmin):
@@ -7,6 +7,30 @@ class EmailLogAdmin(admin.ModelAdmin):
     list_filter = ('status', 'template_name', 'sent_at')
     search_fields = ('recipient', 'subject', 'email_id')
     readonly_fields = ('email_id', 'sent_at', 'opened_at', 'clicked_at')
+    # Skip the unfiltered COUNT(*) on every changelist page
+    show_full_result_count = False
     
     def has_add_permission(self, request):
         return False
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('email_id', 'subject', 'template_name', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'template_name')
+    search_fields = ('subject', 'email_id')
+    readonly_fields = ('email_id', 'created_at', 'sent_at', 'last_error')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(EmailDailyStats)
+class EmailDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('date', 'template_name', 'sent', 'failed', 'opened', 'clicked')
+    list_filter = ('template_name',)
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
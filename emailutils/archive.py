@@ -0,0 +1,55 @@
+"""
+Retention for EmailLog.
+
+Rows older than the retention period are copied to EmailLogArchive and
+deleted from EmailLog in small batches, each in its own short transaction,
+so the hot table stays small without long-running locks.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import EmailLog, EmailLogArchive
+
+EMAIL_LOG_RETENTION_DAYS = 180
+EMAIL_LOG_ARCHIVE_BATCH_SIZE = 2000
+
+ARCHIVE_FIELDS = [
+    'email_id', 'recipient', 'subject', 'template_name', 'sent_at',
+    'status', 'opened_at', 'clicked_at', 'error_message',
+]
+
+
+def archive_cutoff(days=None):
+    """Return the sent_at before which EmailLog rows are archived."""
+    if days is None:
+        days = getattr(settings, 'EMAIL_LOG_RETENTION_DAYS', EMAIL_LOG_RETENTION_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(before, batch_size=None):
+    """
+    Move the oldest batch of rows sent before the cutoff. Returns the number moved.
+
+    The batch is locked while it is copied so a concurrent open/click
+    update cannot slip in between the copy and the delete.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_LOG_ARCHIVE_BATCH_SIZE', EMAIL_LOG_ARCHIVE_BATCH_SIZE)
+    with transaction.atomic():
+        rows = list(
+            EmailLog.objects.select_for_update()
+            .filter(sent_at__lt=before)
+            .order_by('sent_at')
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        # ignore_conflicts makes a rerun after a partial failure harmless
+        EmailLogArchive.objects.bulk_create(
+            [EmailLogArchive(**row) for row in rows],
+            ignore_conflicts=True
+        )
+        EmailLog.objects.filter(email_id__in=[row['email_id'] for row in rows]).delete()
+    return len(rows)
+
@@ -0,0 +1,171 @@
+"""
+Personalised email campaigns.
+
+A campaign sends one template to many recipients, each with their own
+context. The template is compiled once, messages are rendered lazily as
+they are sent, every message goes over the same backend connection and
+the tracking log is written in bulk once per batch.
+"""
+
+import uuid
+from datetime import datetime
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+from .utils import _email_log, save_email_logs, tracking_pixel
+
+CAMPAIGN_BATCH_SIZE = 500
+
+
+class CampaignTemplate:
+    """
+    An email template compiled once and rendered for many recipients.
+
+    Alongside the HTML, render() produces the plain text alternative. The
+    output is split into chunks at points that fall outside an HTML tag,
+    and chunks made up only of the template's literal text are converted
+    with strip_tags once and then reused, so only the personalised parts
+    are stripped per recipient.
+    """
+
+    def __init__(self, template_name):
+        self.template_name = template_name
+        self.template = get_template(f'email/{template_name}.html')
+        self.nodelist = self.template.template.nodelist
+        self.static_nodes = [isinstance(node, TextNode) for node in self.nodelist]
+        self._text_cache = {}
+
+    def _render_nodes(self, context):
+        template = self.template.template
+        context = make_context(context, autoescape=self.template.backend.engine.autoescape)
+        with context.render_context.push_state(template), context.bind_template(template):
+            context.template_name = template.name
+            return [node.render_annotated(context) for node in self.nodelist]
+
+    def _strip_chunk(self, parts, start, end):
+        html = ''.join(parts[start:end])
+        if not all(self.static_nodes[start:end]):
+            return strip_tags(html)
+        key = (start, end)
+        if key not in self._text_cache:
+            self._text_cache[key] = strip_tags(html)
+        return self._text_cache[key]
+
+    def render(self, context):
+        """Return the (html, text) bodies for one recipient's context."""
+        parts = self._render_nodes(context)
+        text = []
+        start = 0
+        inside_tag = False
+        for index, part in enumerate(parts):
+            opening, closing = part.rfind('<'), part.rfind('>')
+            if opening != closing:
+                inside_tag = opening > closing
+            # Only split where the output so far is not inside a tag
+            if not inside_tag:
+                text.append(self._strip_chunk(parts, start, index + 1))
+                start = index + 1
+        if start < len(parts):
+            text.append(self._strip_chunk(parts, start, len(parts)))
+        return ''.join(parts), ''.join(text)
+
+
+class Campaign:
+    """
+    One templated email sent to many recipients with personalised contexts.
+
+    Attributes:
+        template_name (str): Name of the template in templates/email/
+        subject (str): Subject line shared by every message
+        context (dict): Context shared by every recipient
+        from_email (str): Sender address (defaults to DEFAULT_FROM_EMAIL)
+        track (bool): Whether to add a tracking pixel and log each send
+    """
+
+    def __init__(self, template_name, subject, context=None, from_email=None, track=True):
+        self.template = CampaignTemplate(template_name)
+        self.template_name = template_name
+        self.subject = subject
+        self.context = dict(context or {})
+        self.context.setdefault('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        self.from_email = from_email or settings.DEFAULT_FROM_EMAIL
+        self.track = track
+
+    def messages(self, recipients, connection=None):
+        """
+        Lazily render one message per recipient.
+
+        recipients is an iterable of (email, context) pairs; it is consumed
+        as messages are sent, so it can be a queryset iterator. Yields
+        (email_id, recipient, message) tuples.
+        """
+        for recipient, recipient_context in recipients:
+            context = {**self.context, **(recipient_context or {})}
+            email_id = uuid.uuid4() if self.track else None
+            if email_id:
+                context['tracking_pixel'] = tracking_pixel(email_id)
+                context['email_id'] = email_id
+
+            html_content, text_content = self.template.render(context)
+            message = EmailMultiAlternatives(
+                self.subject,
+                text_content,
+                self.from_email,
+                [recipient],
+                connection=connection
+            )
+            message.attach_alternative(html_content, "text/html")
+            yield email_id, recipient, message
+
+    def send(self, recipients, batch_size=None):
+        """
+        Send the campaign over a single connection.
+
+        A failed message is logged and the connection is reopened before
+        carrying on with the next recipient. Returns a (sent, failed) tuple.
+        """
+        batch_size = batch_size or getattr(settings, 'CAMPAIGN_BATCH_SIZE', CAMPAIGN_BATCH_SIZE)
+        sent = failed = 0
+        logs = []
+
+        with get_connection() as connection:
+            for email_id, recipient, message in self.messages(recipients, connection):
+                try:
+                    connection.send_messages([message])
+                    status, error = 'sent', None
+                    sent += 1
+                except Exception as e:
+                    status, error = 'failed', str(e)
+                    failed += 1
+                    self._reconnect(connection)
+
+                if email_id:
+                    logs.append(_email_log(email_id, recipient, self.subject, self.template_name, status, error))
+                if len(logs) >= batch_size:
+                    save_email_logs(logs)
+                    logs = []
+
+        save_email_logs(logs)
+        return sent, failed
+
+    @staticmethod
+    def _reconnect(connection):
+        connection.close()
+        try:
+            connection.open()
+        except Exception:
+            # Leave it closed; the backend retries opening on the next send
+            pass
+
+
+def send_campaign(template_name, subject, recipients, context=None, from_email=None, track=True, batch_size=None):
+    """
+    Send a personalised templated email to every (email, context) pair in recipients.
+
+    Returns a (sent, failed) tuple.
+    """
+    campaign = Campaign(template_name, subject, context, from_email, track)
+    return campaign.send(recipients, batch_size)
@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand
+from emailutils.archive import archive_batch, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Move EmailLog rows past the retention period into the archive table in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Keep this many days in EmailLog (default: EMAIL_LOG_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows moved per transaction (default: EMAIL_LOG_ARCHIVE_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches'
+        )
+
+    def handle(self, *args, **options):
+        before = archive_cutoff(options['days'])
+        self.stdout.write(f'Archiving emails sent before {before:%Y-%m-%d %H:%M}...')
+
+        total = 0
+        while True:
+            moved = archive_batch(before, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'Moved {moved} rows ({total} so far)')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Archived {total} email log rows'))
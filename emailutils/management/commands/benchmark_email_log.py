@@ -0,0 +1,49 @@
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connection
+from emailutils.models import EmailLog
+from utils.benchmark import measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = 'Compare per-recipient EmailLog inserts with a single bulk insert (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipients',
+            type=int,
+            default=1000,
+            help='Number of recipients to log per run'
+        )
+
+    def handle(self, *args, **options):
+        recipients = [f'member{i}@example.com' for i in range(options['recipients'])]
+        self.stdout.write(f'Logging {len(recipients)} recipients on {connection.vendor}...')
+
+        def per_row():
+            for recipient in recipients:
+                EmailLog.objects.create(
+                    email_id=uuid.uuid4(),
+                    recipient=recipient,
+                    subject='Benchmark',
+                    template_name='benchmark',
+                    status='sent'
+                )
+
+        def bulk():
+            EmailLog.objects.bulk_create([
+                EmailLog(
+                    email_id=uuid.uuid4(),
+                    recipient=recipient,
+                    subject='Benchmark',
+                    template_name='benchmark',
+                    status='sent'
+                )
+                for recipient in recipients
+            ])
+
+        for label, write in (('create() per recipient', per_row), ('bulk_create()', bulk)):
+            with rolled_back():
+                elapsed, queries, _ = measure(write)
+            self.stdout.write(f'{label:<24} {elapsed * 1000:9.1f} ms  {queries:5d} queries')
+
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from emailutils.stats import rebuild_email_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily email statistics rollup from EmailLog'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only rebuild days from this date on (YYYY-MM-DD); default is everything'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                raise CommandError(f"--since {options['since']} is not a valid date")
+            if since is None:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        count = rebuild_email_stats(since)
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {count} daily stats rows'))
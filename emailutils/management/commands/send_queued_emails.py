@@ -0,0 +1,46 @@
+import time
+from django.core.management.base import BaseCommand
+from emailutils.utils import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound emails in batches over a reused mail connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of messages claimed per batch (default: EMAIL_QUEUE_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting once it is drained'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to sleep between polls when the queue is empty (with --loop)'
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = send_queued_emails(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+
+            if sent or failed:
+                self.stdout.write(f'Batch done: {sent} sent, {failed} failed')
+                continue
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Queue drained: {total_sent} sent, {total_failed} failed'
+        ))
@@ -46,7 +46,8 @@ class Command(BaseCommand):
         )
 
         if success:
-            self.stdout.write(self.style.SUCCESS(f'✓ Test email sent successfully (ID: {result})'))
+            email_ids = ', '.join(str(email_id) for email_id in result)
+            self.stdout.write(self.style.SUCCESS(f'✓ Test email sent successfully (ID: {email_ids})'))
         else:
             self.stdout.write(self.style.ERROR(f'✗ Failed to send test email: {result}'))
 
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emailutils', '0002_queuedemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template_name', models.CharField(max_length=100)),
+                ('date', models.DateField()),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('opened', models.PositiveIntegerField(default=0)),
+                ('clicked', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Email daily stats',
+                'ordering': ['-date', 'template_name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='emaildailystats',
+            constraint=models.UniqueConstraint(fields=('template_name', 'date'), name='unique_email_stats_per_day'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emailutils', '0003_emaildailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailLogArchive',
+            fields=[
+                ('email_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('recipient', models.EmailField(max_length=254)),
+                ('subject', models.CharField(max_length=255)),
+                ('template_name', models.CharField(max_length=100)),
+                ('sent_at', models.DateTimeField()),
+                ('status', models.CharField(max_length=20)),
+                ('opened_at', models.DateTimeField(blank=True, null=True)),
+                ('clicked_at', models.DateTimeField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='emaillog',
+            index=models.Index(fields=['-sent_at'], name='emaillog_sent_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emaillog',
+            index=models.Index(fields=['status', '-sent_at'], name='emaillog_status_sent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emaillog',
+            index=models.Index(fields=['template_name', '-sent_at'], name='emaillog_template_sent_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 
@@ -16,6 +17,102 @@ class EmailLog(models.Model):
 
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            # Admin changelist ordering, date drill-down and archival cut-off
+            models.Index(fields=['-sent_at'], name='emaillog_sent_at_idx'),
+            # Admin status/template filters and stats rebuilds
+            models.Index(fields=['status', '-sent_at'], name='emaillog_status_sent_idx'),
+            models.Index(fields=['template_name', '-sent_at'], name='emaillog_template_sent_idx'),
+        ]
         
     def __str__(self):
         return f"{self.recipient} - {self.subject} ({self.status})"
+
+
+class EmailLogArchive(models.Model):
+    """
+    EmailLog rows past the retention period, moved here by archive_email_logs.
+
+    Only indexed on the primary key, so it is cheap to append to and keeps
+    EmailLog itself small.
+    """
+
+    email_id = models.UUIDField(primary_key=True)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    template_name = models.CharField(max_length=100)
+    sent_at = models.DateTimeField()
+    status = models.CharField(max_length=20)
+    opened_at = models.DateTimeField(null=True, blank=True)
+    clicked_at = models.DateTimeField(null=True, blank=True)
+    error_message = models.TextField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.recipient} - {self.subject} ({self.status})"
+
+
+class QueuedEmail(models.Model):
+    """
+    An outbound email waiting to be delivered by the send_queued_emails worker.
+
+    The message is rendered when it is queued, so the worker only has to
+    hand it to the mail backend. Rows are claimed in batches, retried with
+    exponential backoff and marked failed once they run out of attempts.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    email_id = models.UUIDField(default=uuid.uuid4, unique=True)
+    recipient_list = models.JSONField()
+    from_email = models.CharField(max_length=255, blank=True)
+    subject = models.CharField(max_length=255)
+    template_name = models.CharField(max_length=100, blank=True)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True)
+    track = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{', '.join(self.recipient_list)} - {self.subject} ({self.status})"
+
+
+class EmailDailyStats(models.Model):
+    """
+    Daily delivery counters per template, keyed by the day the emails were sent.
+
+    Maintained incrementally whenever EmailLog rows are written or opens and
+    clicks are flushed, so reports never have to scan EmailLog.
+    """
+
+    template_name = models.CharField(max_length=100)
+    date = models.DateField()
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    opened = models.PositiveIntegerField(default=0)
+    clicked = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date', 'template_name']
+        verbose_name_plural = 'Email daily stats'
+        constraints = [
+            models.UniqueConstraint(fields=['template_name', 'date'], name='unique_email_stats_per_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.template_name} - {self.date}"
@@ -0,0 +1,17 @@
+from rest_framework import serializers
+from .models import EmailDailyStats
+
+
+class EmailDailyStatsSerializer(serializers.ModelSerializer):
+    open_rate = serializers.SerializerMethodField()
+    click_rate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EmailDailyStats
+        fields = ('template_name', 'date', 'sent', 'failed', 'opened', 'clicked', 'open_rate', 'click_rate')
+
+    def get_open_rate(self, obj):
+        return round(obj.opened / obj.sent, 4) if obj.sent else None
+
+    def get_click_rate(self, obj):
+        return round(obj.clicked / obj.sent, 4) if obj.sent else None
@@ -0,0 +1,87 @@
+"""
+Incremental maintenance of the EmailDailyStats rollup.
+
+Counters are bumped with F() expressions in the same places EmailLog is
+written, one UPDATE per (template, day) touched. rebuild_email_stats()
+recomputes the rollup from EmailLog and EmailLogArchive for backfills and
+reconciliation.
+"""
+
+from collections import Counter, defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import EmailDailyStats, EmailLog, EmailLogArchive
+
+
+def increment_stats(template_name, date, **counts):
+    """Add counts (sent/failed/opened/clicked) to one template's row for a day."""
+    counts = {field: n for field, n in counts.items() if n}
+    if not counts:
+        return
+    stats = EmailDailyStats.objects.filter(template_name=template_name, date=date)
+    updates = {field: F(field) + n for field, n in counts.items()}
+    if stats.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            EmailDailyStats.objects.create(template_name=template_name, date=date, **counts)
+    except IntegrityError:
+        # Another writer created the row first
+        stats.update(**updates)
+
+
+def record_logs(logs):
+    """Count freshly inserted EmailLog rows as sent or failed."""
+    counts = Counter(
+        (log.template_name, timezone.localdate(log.sent_at), log.status)
+        for log in logs
+        if log.status in ('sent', 'failed')
+    )
+    for (template_name, date, status), n in counts.items():
+        increment_stats(template_name, date, **{status: n})
+
+
+def _daily_counts(logs):
+    return (
+        logs.annotate(date=TruncDate('sent_at'))
+        .values('template_name', 'date')
+        .annotate(
+            sent=Count('email_id', filter=Q(status='sent')),
+            failed=Count('email_id', filter=Q(status='failed')),
+            opened=Count('email_id', filter=Q(opened_at__isnull=False)),
+            clicked=Count('email_id', filter=Q(clicked_at__isnull=False)),
+        )
+        .order_by()
+    )
+
+
+def rebuild_email_stats(since=None):
+    """
+    Recompute the rollup from EmailLog and its archive, optionally only from a given date.
+
+    Returns the number of rollup rows written.
+    """
+    sources = [EmailLog.objects.all(), EmailLogArchive.objects.all()]
+    stats = EmailDailyStats.objects.all()
+    if since:
+        sources = [logs.filter(sent_at__date__gte=since) for logs in sources]
+        stats = stats.filter(date__gte=since)
+
+    totals = defaultdict(Counter)
+    for logs in sources:
+        for row in _daily_counts(logs):
+            key = (row.pop('template_name'), row.pop('date'))
+            totals[key].update(row)
+
+    with transaction.atomic():
+        stats.delete()
+        created = EmailDailyStats.objects.bulk_create(
+            [
+                EmailDailyStats(template_name=template_name, date=date, **counts)
+                for (template_name, date), counts in totals.items()
+            ],
+            batch_size=1000
+        )
+    return len(created)
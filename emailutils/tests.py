@@ -1,3 +1,508 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.html import strip_tags
+from django.utils import timezone
+from .archive import archive_batch, archive_cutoff
+from .campaigns import CampaignTemplate, send_campaign
+from .models import EmailDailyStats, EmailLog, EmailLogArchive, QueuedEmail
+from .stats import rebuild_email_stats
+from .tracking import TrackingBuffer, tracking_buffer
+from .utils import queue_email, queue_templated_email, send_queued_emails, send_templated_email, tracked_url
+from .views import TRACKING_PIXEL
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SITE_URL='http://testserver'
+)
+class EmailQueueTests(TestCase):
+    """Tests for the outbound email queue and its worker"""
+
+    def test_queue_templated_email_does_not_send(self):
+        """Queueing renders the message but leaves delivery to the worker"""
+        success, email_ids = queue_templated_email(
+            'test',
+            {'name': 'Test User'},
+            'Queued',
+            ['a@example.com', 'b@example.com']
+        )
+        self.assertTrue(success)
+        self.assertEqual(len(email_ids), 2)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = QueuedEmail.objects.get(email_id=email_ids[0])
+        self.assertEqual(queued.recipient_list, ['a@example.com'])
+        self.assertIn(str(email_ids[0]), queued.html_body)
+
+    def test_worker_sends_batch_and_logs(self):
+        """One worker run delivers every due message and writes the tracking log"""
+        queue_templated_email('test', {}, 'Hello', ['a@example.com', 'b@example.com'])
+        queue_email('Plain', 'Body', ['c@example.com'])
+
+        sent, failed = send_queued_emails()
+
+        self.assertEqual((sent, failed), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(QueuedEmail.objects.exclude(status='sent').exists())
+        self.assertEqual(EmailLog.objects.filter(status='sent').count(), 2)
+
+    def test_batch_size_limits_claim(self):
+        """Only batch_size messages are claimed per run"""
+        for i in range(5):
+            queue_email('Plain', 'Body', [f'user{i}@example.com'])
+
+        self.assertEqual(send_queued_emails(batch_size=2), (2, 0))
+        self.assertEqual(QueuedEmail.objects.filter(status='pending').count(), 3)
+
+    @override_settings(EMAIL_QUEUE_MAX_ATTEMPTS=2, EMAIL_QUEUE_RETRY_DELAY=10)
+    def test_failed_send_is_retried_with_backoff(self):
+        """A failing send is rescheduled, then marked failed after the last attempt"""
+        queued = queue_email('Plain', 'Body', ['a@example.com'], track=True)
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('SMTP down')
+        ):
+            self.assertEqual(send_queued_emails(), (0, 1))
+            queued.refresh_from_db()
+            self.assertEqual(queued.status, 'pending')
+            self.assertEqual(queued.attempts, 1)
+            self.assertGreater(queued.next_attempt_at, timezone.now() + timedelta(seconds=5))
+
+            # Not due yet, so nothing is claimed
+            self.assertEqual(send_queued_emails(), (0, 0))
+
+            QueuedEmail.objects.filter(pk=queued.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(send_queued_emails(), (0, 1))
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'failed')
+        self.assertEqual(queued.last_error, 'SMTP down')
+        self.assertTrue(EmailLog.objects.filter(email_id=queued.email_id, status='failed').exists())
+
+    def test_expired_lease_is_reclaimed(self):
+        """Messages left in 'sending' by a dead worker are picked up again"""
+        queued = queue_email('Plain', 'Body', ['a@example.com'])
+        QueuedEmail.objects.filter(pk=queued.pk).update(
+            status='sending',
+            attempts=1,
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(send_queued_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_QUEUE_MAX_ATTEMPTS=2)
+    def test_expired_lease_on_last_attempt_gives_up(self):
+        """A message that kept killing its worker is marked failed instead of being claimed again"""
+        queued = queue_email('Plain', 'Body', ['a@example.com'], track=True)
+        QueuedEmail.objects.filter(pk=queued.pk).update(
+            status='sending',
+            attempts=2,
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(send_queued_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 2))
+        self.assertTrue(EmailLog.objects.filter(email_id=queued.email_id, status='failed').exists())
+
+    def test_management_command_drains_queue(self):
+        """send_queued_emails command keeps claiming batches until the queue is empty"""
+        for i in range(5):
+            queue_email('Plain', 'Body', [f'user{i}@example.com'])
+
+        call_command('send_queued_emails', batch_size=2, stdout=mock.MagicMock())
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(QueuedEmail.objects.exclude(status='sent').exists())
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SITE_URL='http://testserver'
+)
+class SendTemplatedEmailTests(TestCase):
+    """Tests for synchronous templated sends"""
+
+    def test_multi_recipient_send_logs_in_one_insert(self):
+        """Each recipient gets their own email_id and the log is one bulk insert"""
+        recipients = ['a@example.com', 'b@example.com', 'c@example.com']
+
+        with CaptureQueriesContext(connection) as captured:
+            success, email_ids = send_templated_email('test', {}, 'Hello', recipients)
+        log_inserts = [
+            q for q in captured.captured_queries
+            if q['sql'].startswith('INSERT INTO "emailutils_emaillog"')
+        ]
+        self.assertEqual(len(log_inserts), 1)
+
+        self.assertTrue(success)
+        self.assertEqual(len(set(email_ids)), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        for message, email_id in zip(mail.outbox, email_ids):
+            self.assertIn(str(email_id), message.alternatives[0][0])
+        self.assertEqual(
+            dict(EmailLog.objects.values_list('recipient', 'email_id')),
+            dict(zip(recipients, email_ids))
+        )
+
+    def test_failed_send_is_logged_per_recipient(self):
+        """A backend error is logged as failed against the affected recipient"""
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('SMTP down')
+        ):
+            success, error = send_templated_email('test', {}, 'Hello', ['a@example.com'])
+
+        self.assertFalse(success)
+        self.assertEqual(error, 'SMTP down')
+        self.assertEqual(EmailLog.objects.get().status, 'failed')
+
+    def test_error_closing_connection_keeps_sent_status(self):
+        """Messages that went out stay logged as sent if closing the connection fails"""
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.close',
+            side_effect=OSError('Connection reset')
+        ):
+            success, email_ids = send_templated_email('test', {}, 'Hello', ['a@example.com', 'b@example.com'])
+
+        self.assertTrue(success)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            set(EmailLog.objects.values_list('email_id', 'status')),
+            {(email_id, 'sent') for email_id in email_ids}
+        )
+
+    def test_connection_failure_is_logged_for_every_recipient(self):
+        """When the connection can't be opened every message is logged as failed"""
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open',
+            side_effect=OSError('Connection refused')
+        ):
+            success, error = send_templated_email('test', {}, 'Hello', ['a@example.com', 'b@example.com'])
+
+        self.assertFalse(success)
+        self.assertEqual(error, 'Connection refused')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(list(EmailLog.objects.values_list('status', flat=True)), ['failed', 'failed'])
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SITE_URL='http://testserver'
+)
+class CampaignTests(TestCase):
+    """Tests for personalised campaign sends"""
+
+    def test_text_matches_strip_tags(self):
+        """Chunked, cached text conversion gives the same result as stripping the whole page"""
+        template = CampaignTemplate('event_registration')
+        contexts = [
+            {'user': {'first_name': 'Ana'}, 'event': {'title': 'Summit', 'virtual_link': 'http://x'},
+             'calendar_links': {'google': 'http://g', 'ical': 'http://i'}},
+            {'user': {'first_name': '<b>Jo</b>'}, 'event': {'title': 'Expo'}},
+        ]
+        for context in contexts:
+            html, text = template.render(context)
+            self.assertEqual(text, strip_tags(html))
+        self.assertTrue(template._text_cache)
+
+    def test_send_campaign_personalises_each_message(self):
+        """Every recipient gets their own context, email_id and log row"""
+        recipients = ((f'user{i}@example.com', {'name': f'User {i}'}) for i in range(5))
+
+        sent, failed = send_campaign('test', 'Newsletter', recipients, batch_size=2)
+
+        self.assertEqual((sent, failed), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn('Hello User 3!', mail.outbox[3].body)
+        self.assertEqual(EmailLog.objects.count(), 5)
+        log = EmailLog.objects.get(recipient='user3@example.com')
+        self.assertIn(str(log.email_id), mail.outbox[3].alternatives[0][0])
+
+    def test_campaign_uses_one_connection(self):
+        """All messages share a single backend connection"""
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open',
+            autospec=True,
+            return_value=True
+        ) as open_connection:
+            send_campaign('test', 'Newsletter', [('a@example.com', {}), ('b@example.com', {})], track=False)
+
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_message_does_not_stop_campaign(self):
+        """A send error is logged and the remaining recipients still get their email"""
+        original = mail.backends.locmem.EmailBackend.send_messages
+
+        def flaky_send(backend, messages):
+            if messages[0].to == ['bad@example.com']:
+                raise OSError('Mailbox unavailable')
+            return original(backend, messages)
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            autospec=True,
+            side_effect=flaky_send
+        ):
+            sent, failed = send_campaign(
+                'test', 'Newsletter',
+                [('a@example.com', {}), ('bad@example.com', {}), ('c@example.com', {})]
+            )
+
+        self.assertEqual((sent, failed), (2, 1))
+        self.assertEqual(
+            EmailLog.objects.get(recipient='bad@example.com').error_message,
+            'Mailbox unavailable'
+        )
+
+
+# Buffer events without starting the background flusher; the tests flush by hand
+buffer_only = mock.patch.object(TrackingBuffer, '_start_flusher', lambda self: True)
+
+
+@override_settings(SITE_URL='http://testserver')
+@buffer_only
+class EmailTrackingTests(TestCase):
+    """Tests for buffered open and click tracking"""
+
+    def setUp(self):
+        tracking_buffer.flush()
+        self.log = EmailLog.objects.create(
+            recipient='a@example.com',
+            subject='Hello',
+            template_name='test',
+            status='sent'
+        )
+
+    def test_pixel_does_not_touch_database(self):
+        """The tracking pixel is served from memory and the open is only buffered"""
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/email/track/{self.log.email_id}.png')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response.content, TRACKING_PIXEL)
+        self.assertEqual(tracking_buffer.pending(), 1)
+        self.log.refresh_from_db()
+        self.assertIsNone(self.log.opened_at)
+
+    def test_flush_records_first_open_only(self):
+        """Flushing sets opened_at once and later opens leave it unchanged"""
+        first = timezone.now() - timedelta(hours=1)
+        tracking_buffer.record_open(self.log.email_id, first)
+        tracking_buffer.record_open(self.log.email_id)
+
+        self.assertEqual(tracking_buffer.flush(), 1)
+        self.log.refresh_from_db()
+        self.assertEqual(self.log.opened_at, first)
+
+        tracking_buffer.record_open(self.log.email_id)
+        self.assertEqual(tracking_buffer.flush(), 0)
+        self.log.refresh_from_db()
+        self.assertEqual(self.log.opened_at, first)
+
+    def test_flush_coalesces_many_opens(self):
+        """Opens for many emails are written with a single UPDATE"""
+        logs = EmailLog.objects.bulk_create([
+            EmailLog(recipient=f'user{i}@example.com', subject='Hello', template_name='test', status='sent')
+            for i in range(50)
+        ])
+        for log in logs:
+            tracking_buffer.record_open(log.email_id)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(tracking_buffer.flush(), 50)
+        log_updates = [
+            q for q in captured.captured_queries
+            if q['sql'].startswith('UPDATE "emailutils_emaillog"')
+        ]
+        self.assertEqual(len(log_updates), 1)
+        # The stats are counted from the rows the UPDATE returns, without reading EmailLog first
+        log_reads = [
+            q for q in captured.captured_queries
+            if q['sql'].startswith('SELECT') and 'emailutils_emaillog' in q['sql']
+        ]
+        self.assertEqual(log_reads, [])
+        self.assertFalse(EmailLog.objects.filter(opened_at__isnull=True).exclude(pk=self.log.pk).exists())
+
+    def test_click_redirects_to_signed_url(self):
+        """Tracked links redirect to their destination and buffer the click"""
+        link = tracked_url(self.log.email_id, 'https://adpa.org/events/1/')
+
+        response = self.client.get(link.replace('http://testserver', ''))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], 'https://adpa.org/events/1/')
+        tracking_buffer.flush()
+        self.log.refresh_from_db()
+        self.assertIsNotNone(self.log.clicked_at)
+
+    def test_click_rejects_unsigned_url(self):
+        """Click tracking refuses destinations that were not signed by us"""
+        response = self.client.get(
+            f'/api/email/click/{uuid.uuid4()}/',
+            {'url': 'https://evil.example.com/'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(tracking_buffer.pending(), 0)
+
+
+@override_settings(EMAIL_TRACKING_FLUSH_INTERVAL=None)
+class UnbufferedTrackingTests(TestCase):
+    """Tracking without a background flusher"""
+
+    def setUp(self):
+        self.log = EmailLog.objects.create(
+            recipient='a@example.com',
+            subject='Hello',
+            template_name='test',
+            status='sent'
+        )
+
+    def test_events_are_written_at_once(self):
+        """With the flush interval set to None every open is written as it is recorded"""
+        response = self.client.get(f'/api/email/track/{self.log.email_id}.png')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(tracking_buffer.pending(), 0)
+        self.log.refresh_from_db()
+        self.assertIsNotNone(self.log.opened_at)
+        self.assertEqual(EmailDailyStats.objects.get(template_name='test').opened, 1)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SITE_URL='http://testserver'
+)
+@buffer_only
+class EmailStatsTests(TestCase):
+    """Tests for the daily email statistics rollup"""
+
+    def setUp(self):
+        tracking_buffer.flush()
+
+    def test_sends_and_opens_update_rollup(self):
+        """Sends, failures and first opens are counted per template and day"""
+        success, email_ids = send_templated_email('test', {}, 'Hello', ['a@example.com', 'b@example.com'])
+        send_campaign('welcome', 'Welcome', [('c@example.com', {})])
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('SMTP down')
+        ):
+            send_templated_email('test', {}, 'Hello', ['d@example.com'])
+
+        for email_id in email_ids:
+            tracking_buffer.record_open(email_id)
+        tracking_buffer.flush()
+        # A repeat open is not counted twice
+        tracking_buffer.record_open(email_ids[0])
+        tracking_buffer.flush()
+
+        stats = EmailDailyStats.objects.get(template_name='test', date=timezone.localdate())
+        self.assertEqual((stats.sent, stats.failed, stats.opened, stats.clicked), (2, 1, 2, 0))
+        self.assertEqual(EmailDailyStats.objects.get(template_name='welcome').sent, 1)
+
+    def test_open_written_by_another_flusher_is_not_counted(self):
+        """Opens are counted from the rows the UPDATE returns, so one set concurrently is not counted twice"""
+        success, email_ids = send_templated_email('test', {}, 'Hello', ['a@example.com'])
+        tracking_buffer.record_open(email_ids[0])
+        # A flusher in another process writes and counts the same open first
+        EmailLog.objects.filter(email_id=email_ids[0]).update(opened_at=timezone.now())
+
+        self.assertEqual(tracking_buffer.flush(), 0)
+        self.assertEqual(EmailDailyStats.objects.get(template_name='test').opened, 0)
+
+    def test_rebuild_matches_incremental_counts(self):
+        """Rebuilding from EmailLog gives the same rollup as incremental updates"""
+        send_templated_email('test', {}, 'Hello', ['a@example.com', 'b@example.com'])
+        tracking_buffer.record_click(EmailLog.objects.first().email_id)
+        tracking_buffer.flush()
+        incremental = list(EmailDailyStats.objects.values('template_name', 'date', 'sent', 'failed', 'opened', 'clicked'))
+
+        self.assertEqual(rebuild_email_stats(), 1)
+        rebuilt = list(EmailDailyStats.objects.values('template_name', 'date', 'sent', 'failed', 'opened', 'clicked'))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_stats_endpoint_reads_rollup_only(self):
+        """The stats endpoint is staff only and never queries EmailLog"""
+        admin = User.objects.create_superuser(email='admin@example.com', password='admin123')
+        EmailDailyStats.objects.create(template_name='test', date='2025-01-06', sent=200, opened=50)
+        EmailDailyStats.objects.create(template_name='test', date='2024-12-01', sent=10)
+        self.client.force_login(admin)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/email/stats/', {'template': 'test', 'start': '2025-01-01'})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['open_rate'], 0.25)
+        self.assertFalse(any('emailutils_emaillog' in q['sql'] for q in captured.captured_queries))
+
+    def test_invalid_dates_are_rejected(self):
+        """Dates in the right format that don't exist are a bad request, not an error"""
+        admin = User.objects.create_superuser(email='admin@example.com', password='admin123')
+        self.client.force_login(admin)
+
+        for start in ('2024-02-30', 'yesterday'):
+            response = self.client.get('/api/email/stats/', {'start': start})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('start', response.json())
+        with self.assertRaises(CommandError):
+            call_command('rebuild_email_stats', since='2024-02-30')
+
+    def test_stats_endpoint_requires_staff(self):
+        """Regular users cannot read delivery statistics"""
+        user = User.objects.create_user(email='user@example.com', password='testpass123')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/api/email/stats/').status_code, 403)
+
+
+class EmailLogArchiveTests(TestCase):
+    """Tests for moving old EmailLog rows into the archive"""
+
+    def setUp(self):
+        logs = EmailLog.objects.bulk_create([
+            EmailLog(recipient=f'user{i}@example.com', subject='Hello', template_name='test', status='sent')
+            for i in range(5)
+        ])
+        self.old_ids = [log.email_id for log in logs[:3]]
+        EmailLog.objects.filter(email_id__in=self.old_ids).update(
+            sent_at=timezone.now() - timedelta(days=400),
+            opened_at=timezone.now() - timedelta(days=399)
+        )
+
+    def test_archive_moves_only_old_rows_in_batches(self):
+        """Rows past the cut-off are moved batch by batch; recent rows stay"""
+        before = archive_cutoff(days=180)
+
+        self.assertEqual(archive_batch(before, batch_size=2), 2)
+        self.assertEqual(archive_batch(before, batch_size=2), 1)
+        self.assertEqual(archive_batch(before, batch_size=2), 0)
+
+        self.assertEqual(EmailLog.objects.count(), 2)
+        self.assertEqual(set(EmailLogArchive.objects.values_list('email_id', flat=True)), set(self.old_ids))
+        self.assertTrue(EmailLogArchive.objects.filter(opened_at__isnull=False).exists())
+
+    def test_command_and_rebuild_include_archive(self):
+        """Archiving does not change the rebuilt daily stats"""
+        rebuild_email_stats()
+        before = list(EmailDailyStats.objects.values('date', 'sent', 'opened'))
+
+        call_command('archive_email_logs', days=180, stdout=mock.MagicMock())
+        rebuild_email_stats()
+
+        self.assertEqual(EmailLog.objects.count(), 2)
+        self.assertEqual(list(EmailDailyStats.objects.values('date', 'sent', 'opened')), before)
@@ -0,0 +1,182 @@
+"""
+Coalesced email open and click tracking.
+
+Tracking requests only record the event in a per-process buffer; a
+background thread periodically writes the buffered events to EmailLog
+with one bulk UPDATE ... RETURNING per chunk. Only the first open and
+first click are kept: the UPDATE skips rows whose timestamp is already
+set, and the rows it returns are what goes into the daily stats, so
+flushers in several processes never count the same open twice.
+
+With EMAIL_TRACKING_FLUSH_INTERVAL set to None there is no background
+thread and every event is written as soon as it is recorded.
+"""
+
+import atexit
+import logging
+import threading
+from collections import Counter
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+from .models import EmailLog
+from .stats import increment_stats
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TRACKING_FLUSH_INTERVAL = 5  # seconds; None writes every event as it is recorded
+EMAIL_TRACKING_MAX_BUFFER = 1000  # buffered events that trigger an early flush
+EMAIL_TRACKING_UPDATE_CHUNK = 500  # rows per UPDATE statement
+
+CLICK_SIGNER_SALT = 'emailutils.click'
+
+EVENT_COUNTERS = {'opened_at': 'opened', 'clicked_at': 'clicked'}  # EmailDailyStats fields
+
+
+def _setting(name):
+    return getattr(settings, name, globals()[name])
+
+
+class TrackingBuffer:
+    """Buffers first-open and first-click timestamps until they are flushed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = {'opened_at': {}, 'clicked_at': {}}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def record_open(self, email_id, when=None):
+        self._record('opened_at', email_id, when)
+
+    def record_click(self, email_id, when=None):
+        self._record('clicked_at', email_id, when)
+
+    def _record(self, field, email_id, when):
+        with self._lock:
+            self._events[field].setdefault(email_id, when or timezone.now())
+            size = sum(len(events) for events in self._events.values())
+        if not self._start_flusher():
+            # Without a background flusher nothing else would write the event
+            self.flush()
+        elif size >= _setting('EMAIL_TRACKING_MAX_BUFFER'):
+            self._wakeup.set()
+
+    def pending(self):
+        """Number of buffered events not yet written."""
+        with self._lock:
+            return sum(len(events) for events in self._events.values())
+
+    def flush(self):
+        """Write all buffered events to EmailLog. Returns the number of rows updated."""
+        with self._lock:
+            events, self._events = self._events, {'opened_at': {}, 'clicked_at': {}}
+
+        try:
+            return self._write(events)
+        except Exception:
+            # Put the events back; rewriting them later is harmless
+            self._merge(events)
+            raise
+
+    def _write(self, events):
+        updated = 0
+        chunk_size = _setting('EMAIL_TRACKING_UPDATE_CHUNK')
+        for field, timestamps in events.items():
+            items = list(timestamps.items())
+            for start in range(0, len(items), chunk_size):
+                with transaction.atomic():
+                    updated += self._write_chunk(field, dict(items[start:start + chunk_size]))
+        return updated
+
+    def _write_chunk(self, field, chunk):
+        """
+        Write one chunk with a single UPDATE and count it into the stats.
+
+        The counts come from the rows the UPDATE returns, so a row another
+        process set in the meantime is neither written nor counted twice.
+        """
+        rows = _update_returning(
+            EmailLog.objects.filter(email_id__in=chunk.keys(), **{f'{field}__isnull': True}),
+            {field: Case(
+                *[When(email_id=email_id, then=Value(when)) for email_id, when in chunk.items()],
+                output_field=DateTimeField()
+            )},
+            ('template_name', 'sent_at')
+        )
+        counts = Counter((template_name, timezone.localdate(sent_at)) for template_name, sent_at in rows)
+        for (template_name, date), count in counts.items():
+            increment_stats(template_name, date, **{EVENT_COUNTERS[field]: count})
+        return len(rows)
+
+    def _merge(self, events):
+        with self._lock:
+            for field, timestamps in events.items():
+                for email_id, when in timestamps.items():
+                    current = self._events[field].get(email_id)
+                    if current is None or when < current:
+                        self._events[field][email_id] = when
+
+    def _start_flusher(self):
+        """Start the background flusher once per process; False if it is disabled."""
+        if not _setting('EMAIL_TRACKING_FLUSH_INTERVAL'):
+            return False
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run,
+                        name='email-tracking-flusher',
+                        daemon=True
+                    )
+                    self._thread.start()
+                    atexit.register(self._flush_quietly)
+        return True
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(_setting('EMAIL_TRACKING_FLUSH_INTERVAL'))
+            self._wakeup.clear()
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to flush email tracking events')
+        finally:
+            connections.close_all()
+
+
+def _update_returning(queryset, values, fields):
+    """
+    Run queryset.update(**values) and return the given fields of the updated rows.
+
+    update() only reports a row count; PostgreSQL and SQLite (3.35+) both
+    accept RETURNING after the same statement.
+    """
+    connection = connections[queryset.db]
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    sql, params = query.get_compiler(queryset.db).as_sql()
+    columns = [queryset.model._meta.get_field(name).get_col(queryset.model._meta.db_table) for name in fields]
+    converters = [connection.ops.get_db_converters(col) + col.get_db_converters(connection) for col in columns]
+    returning = ', '.join(connection.ops.quote_name(col.target.column) for col in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} RETURNING {returning}', params)
+        rows = cursor.fetchall()
+
+    def convert(value, col, col_converters):
+        for converter in col_converters:
+            value = converter(value, col, connection)
+        return value
+
+    return [
+        tuple(convert(value, col, col_converters) for value, col, col_converters in zip(row, columns, converters))
+        for row in rows
+    ]
+
+
+tracking_buffer = TrackingBuffer()
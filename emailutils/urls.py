@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import track_email_open, track_email_click, EmailStatsListView
+
+urlpatterns = [
+    path('email/track/<uuid:email_id>.png', track_email_open, name='track_email_open'),
+    path('email/click/<uuid:email_id>/', track_email_click, name='track_email_click'),
+    path('email/stats/', EmailStatsListView.as_view(), name='email-stats'),
+]
@@ -1,10 +1,67 @@
+import logging
 import uuid
-from datetime import datetime
-from django.core.mail import EmailMultiAlternatives
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.signing import Signer
+from django.urls import reverse
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.html import strip_tags
+from django.db import transaction
+from django.db.models import F
 from django.conf import settings
-from .models import EmailLog
+from .models import EmailLog, QueuedEmail
+from .stats import record_logs
+from .tracking import CLICK_SIGNER_SALT
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the outbound queue, overridable in settings
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+EMAIL_QUEUE_LEASE = 300  # seconds a claimed message stays reserved for a worker
+
+
+def _queue_setting(name):
+    return getattr(settings, name, globals()[name])
+
+
+def tracking_pixel(email_id):
+    """Return the <img> tag that reports an open of the given email."""
+    url = settings.SITE_URL + reverse('track_email_open', kwargs={'email_id': email_id})
+    return f'<img src="{url}" width="1" height="1" alt="" />'
+
+
+def tracked_url(email_id, url):
+    """
+    Wrap a link so that following it records a click for the given email.
+
+    The destination is signed so the click endpoint only redirects to
+    URLs we generated.
+    """
+    signed = Signer(salt=CLICK_SIGNER_SALT).sign(url)
+    path = reverse('track_email_click', kwargs={'email_id': email_id})
+    return f"{settings.SITE_URL}{path}?{urlencode({'url': signed})}"
+
+
+def render_email(template_name, context, email_id=None):
+    """
+    Render the HTML and plain text bodies for an email template.
+
+    When an email_id is given the tracking pixel is added to the context.
+    """
+    if email_id:
+        context['tracking_pixel'] = tracking_pixel(email_id)
+        context['email_id'] = email_id
+
+    # Add timestamp to context
+    context['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    html_content = render_to_string(f'email/{template_name}.html', context)
+    return html_content, strip_tags(html_content)
+
 
 def send_templated_email(
     template_name,
@@ -16,55 +73,291 @@ def send_templated_email(
 ):
     """
     Send an HTML email using a template with optional tracking.
+
+    With tracking enabled every recipient gets their own message and
+    email_id so opens can be attributed per person; the result is the list
+    of email ids. All messages share one connection and the tracking log
+    is written with a single bulk insert.
     """
+    if track:
+        messages = [([recipient], uuid.uuid4()) for recipient in recipient_list]
+    else:
+        messages = [(recipient_list, None)]
+
+    logs = []
+    error = None
+    connection = get_connection()
     try:
-        # Add tracking pixel and email ID if tracking is enabled
-        email_id = uuid.uuid4() if track else None
-        if track:
-            tracking_pixel = f'<img src="{settings.SITE_URL}/email/track/{email_id}.png" />'
-            context['tracking_pixel'] = tracking_pixel
-            context['email_id'] = email_id
-
-        # Add timestamp to context
-        context['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        # Render email templates
-        html_content = render_to_string(f'email/{template_name}.html', context)
-        text_content = strip_tags(html_content)
-
-        # Create email message
-        email = EmailMultiAlternatives(
-            subject,
-            text_content,
-            from_email or settings.DEFAULT_FROM_EMAIL,
-            recipient_list
-        )
-        email.attach_alternative(html_content, "text/html")
+        connection.open()
+    except Exception as e:
+        # The connection could not be opened, so nothing was sent
+        error = str(e)
+        logs = [
+            _email_log(email_id, recipients[0], subject, template_name, 'failed', error)
+            for recipients, email_id in messages if email_id
+        ]
+    else:
+        for recipients, email_id in messages:
+            try:
+                # Render email templates
+                html_content, text_content = render_email(template_name, dict(context), email_id)
+
+                # Create and send email message
+                email = EmailMultiAlternatives(
+                    subject,
+                    text_content,
+                    from_email or settings.DEFAULT_FROM_EMAIL,
+                    recipients,
+                    connection=connection
+                )
+                email.attach_alternative(html_content, "text/html")
+                email.send()
+                status, message_error = 'sent', None
+            except Exception as e:
+                status, message_error = 'failed', str(e)
+                error = error or message_error
+
+            if email_id:
+                logs.append(_email_log(email_id, recipients[0], subject, template_name, status, message_error))
+        try:
+            connection.close()
+        except Exception:
+            # The messages have already gone out
+            logger.warning('Failed to close the mail connection', exc_info=True)
+
+    # Log email if tracking is enabled
+    save_email_logs(logs)
+
+    if error:
+        return False, error
+    return True, [email_id for _, email_id in messages] if track else None
 
-        # Send email
-        email.send()
 
-        # Log email if tracking is enabled
+def save_email_logs(logs):
+    """Insert EmailLog rows in bulk and add them to the daily stats."""
+    if not logs:
+        return
+    with transaction.atomic():
+        EmailLog.objects.bulk_create(logs)
+        record_logs(logs)
+
+
+def _email_log(email_id, recipient, subject, template_name, status, error_message=None):
+    return EmailLog(
+        email_id=email_id,
+        recipient=recipient,
+        subject=subject,
+        template_name=template_name,
+        status=status,
+        error_message=error_message
+    )
+
+
+def queue_email(
+    subject,
+    text_body,
+    recipient_list,
+    from_email=None,
+    html_body='',
+    template_name='',
+    email_id=None,
+    track=False
+):
+    """
+    Queue an already rendered email for delivery by the send_queued_emails worker.
+    """
+    return QueuedEmail.objects.create(
+        email_id=email_id or uuid.uuid4(),
+        recipient_list=list(recipient_list),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        subject=subject,
+        template_name=template_name,
+        text_body=text_body,
+        html_body=html_body,
+        track=track,
+    )
+
+
+def queue_templated_email(
+    template_name,
+    context,
+    subject,
+    recipient_list,
+    from_email=None,
+    track=True
+):
+    """
+    Render a templated email and queue it instead of sending it inline.
+
+    Tracked emails are queued once per recipient so every recipient gets
+    their own tracking pixel. Returns the same (success, result) pair as
+    send_templated_email, with the list of queued email ids as the result.
+    """
+    try:
         if track:
+            queued = []
             for recipient in recipient_list:
-                EmailLog.objects.create(
-                    email_id=email_id,
-                    recipient=recipient,
-                    subject=subject,
+                email_id = uuid.uuid4()
+                html_content, text_content = render_email(template_name, dict(context), email_id)
+                queued.append(queue_email(
+                    subject, text_content, [recipient], from_email,
+                    html_body=html_content,
                     template_name=template_name,
-                    status='sent'
-                )
+                    email_id=email_id,
+                    track=True
+                ))
+        else:
+            html_content, text_content = render_email(template_name, context)
+            queued = [queue_email(
+                subject, text_content, recipient_list, from_email,
+                html_body=html_content,
+                template_name=template_name
+            )]
 
-        return True, email_id
+        return True, [q.email_id for q in queued]
 
     except Exception as e:
-        if track:
-            EmailLog.objects.create(
-                email_id=email_id,
-                recipient=recipient_list[0],
-                subject=subject,
-                template_name=template_name,
-                status='failed',
-                error_message=str(e)
-            )
-        return False, str(e) 
\ No newline at end of file
+        return False, str(e)
+
+
+def claim_queued_emails(batch_size=None):
+    """
+    Reserve a batch of due messages for this worker.
+
+    Rows are locked with SKIP LOCKED so several workers can drain the queue
+    side by side. Claimed rows are leased rather than held in a transaction;
+    if a worker dies mid-batch its rows become due again once the lease expires.
+    A message whose lease expired on its last attempt is marked failed
+    instead, so one that keeps killing the worker isn't retried forever.
+    """
+    batch_size = batch_size or _queue_setting('EMAIL_QUEUE_BATCH_SIZE')
+    now = timezone.now()
+    with transaction.atomic():
+        _fail_abandoned(now)
+        batch = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        lease_until = now + timedelta(seconds=_queue_setting('EMAIL_QUEUE_LEASE'))
+        QueuedEmail.objects.filter(pk__in=[q.pk for q in batch]).update(
+            status='sending',
+            attempts=F('attempts') + 1,
+            next_attempt_at=lease_until
+        )
+    for queued in batch:
+        queued.status = 'sending'
+        queued.attempts += 1
+        queued.next_attempt_at = lease_until
+    return batch
+
+
+def _fail_abandoned(now):
+    """Give up on messages whose lease expired on their last allowed attempt."""
+    abandoned = list(
+        QueuedEmail.objects.select_for_update(skip_locked=True)
+        .filter(
+            status='sending',
+            next_attempt_at__lte=now,
+            attempts__gte=_queue_setting('EMAIL_QUEUE_MAX_ATTEMPTS')
+        )
+    )
+    if not abandoned:
+        return
+    error = 'Lease expired on the last attempt'
+    QueuedEmail.objects.filter(pk__in=[q.pk for q in abandoned]).update(status='failed', last_error=error)
+    save_email_logs([_queued_email_log(q, 'failed', error) for q in abandoned if q.track])
+
+
+def _build_message(queued, connection):
+    email = EmailMultiAlternatives(
+        queued.subject,
+        queued.text_body,
+        queued.from_email or settings.DEFAULT_FROM_EMAIL,
+        queued.recipient_list,
+        connection=connection
+    )
+    if queued.html_body:
+        email.attach_alternative(queued.html_body, "text/html")
+    return email
+
+
+def _queued_email_log(queued, status, error_message=None):
+    return _email_log(
+        queued.email_id,
+        queued.recipient_list[0],
+        queued.subject,
+        queued.template_name,
+        status,
+        error_message
+    )
+
+
+def _record_failure(queued, error):
+    """
+    Schedule a retry with exponential backoff, or give up after the last attempt.
+
+    Returns the unsaved 'failed' EmailLog for tracked emails that gave up.
+    """
+    queued.last_error = error
+    log = None
+    if queued.attempts >= _queue_setting('EMAIL_QUEUE_MAX_ATTEMPTS'):
+        queued.status = 'failed'
+        if queued.track:
+            log = _queued_email_log(queued, 'failed', error)
+    else:
+        queued.status = 'pending'
+        delay = _queue_setting('EMAIL_QUEUE_RETRY_DELAY') * 2 ** (queued.attempts - 1)
+        queued.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    queued.save(update_fields=['status', 'next_attempt_at', 'last_error'])
+    return log
+
+
+def send_queued_emails(batch_size=None):
+    """
+    Deliver one batch of queued emails over a single backend connection.
+
+    Returns a (sent, failed) tuple for the batch, where failed counts
+    messages that were rescheduled or gave up.
+    """
+    batch = claim_queued_emails(batch_size)
+    if not batch:
+        return 0, 0
+
+    connection = get_connection()
+    sent = []
+    logs = []
+    try:
+        connection.open()
+    except Exception as e:
+        for queued in batch:
+            logs.append(_record_failure(queued, f'Could not connect to mail server: {e}'))
+        _bulk_log(logs)
+        return 0, len(batch)
+
+    try:
+        for queued in batch:
+            try:
+                connection.send_messages([_build_message(queued, connection)])
+                sent.append(queued)
+            except Exception as e:
+                logs.append(_record_failure(queued, str(e)))
+    finally:
+        connection.close()
+
+    if sent:
+        QueuedEmail.objects.filter(pk__in=[q.pk for q in sent]).update(
+            status='sent',
+            sent_at=timezone.now(),
+            last_error=None
+        )
+        logs.extend(_queued_email_log(q, 'sent') for q in sent if q.track)
+
+    # One insert for the whole batch's tracking log
+    _bulk_log(logs)
+
+    return len(sent), len(batch) - len(sent)
+
+
+def _bulk_log(logs):
+    save_email_logs([log for log in logs if log is not None])
@@ -1,3 +1,76 @@
-from django.shortcuts import render
+import base64
+from django.core.signing import BadSignature, Signer
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from .models import EmailDailyStats
+from .serializers import EmailDailyStatsSerializer
+from .tracking import CLICK_SIGNER_SALT, tracking_buffer
 
-# Create your views here.
+# 1x1 transparent PNG, decoded once at import
+TRACKING_PIXEL = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNgYGBgAAAABQABeqhXUAAAAABJRU5ErkJggg=='
+)
+
+
+@require_GET
+def track_email_open(request, email_id):
+    """
+    Serve the tracking pixel and buffer the open.
+
+    No database work happens here; opens are written to EmailLog in bulk
+    by the tracking buffer's flusher.
+    """
+    tracking_buffer.record_open(email_id)
+    response = HttpResponse(TRACKING_PIXEL, content_type='image/png')
+    response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
+    return response
+
+
+@require_GET
+def track_email_click(request, email_id):
+    """
+    Buffer a click and redirect to the signed destination URL.
+
+    Destinations are signed when the link is built (see tracked_url) so the
+    endpoint cannot be used as an open redirect.
+    """
+    try:
+        url = Signer(salt=CLICK_SIGNER_SALT).unsign(request.GET.get('url', ''))
+    except BadSignature:
+        return HttpResponseBadRequest('Invalid tracking link')
+
+    tracking_buffer.record_click(email_id)
+    return HttpResponseRedirect(url)
+
+
+class EmailStatsListView(generics.ListAPIView):
+    """
+    Daily delivery statistics per template, read from the EmailDailyStats rollup.
+
+    Query parameters:
+        template: only this template
+        start, end: inclusive date range (YYYY-MM-DD)
+    """
+    permission_classes = [IsAdminUser]
+    serializer_class = EmailDailyStatsSerializer
+
+    def get_queryset(self):
+        queryset = EmailDailyStats.objects.all()
+        params = self.request.query_params
+
+        if params.get('template'):
+            queryset = queryset.filter(template_name=params['template'])
+        for param, lookup in (('start', 'date__gte'), ('end', 'date__lte')):
+            if params.get(param):
+                try:
+                    date = parse_date(params[param])
+                except ValueError:
+                    raise ValidationError({param: 'Not a valid date.'})
+                if date is None:
+                    raise ValidationError({param: 'Use the YYYY-MM-DD format.'})
+                queryset = queryset.filter(**{lookup: date})
+        return queryset
@@ -0,0 +1,11 @@
+from django_filters import rest_framework as filters
+from .models import Project
+
+
+class ProjectFilter(filters.FilterSet):
+    # Served by the (country, project) index on ProjectCountry
+    country = filters.CharFilter(field_name='project_countries__country')
+
+    class Meta:
+        model = Project
+        fields = ['country', 'status']
@@ -0,0 +1,87 @@
+from urllib.parse import parse_qs, urlparse
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.pagination import Cursor
+from rest_framework.test import APIRequestFactory, force_authenticate
+from api.pagination import KeysetPagination
+from members.models import Document
+from members.views import DocumentListView
+from utils.benchmark import measure, rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Time page number, approximate count and keyset pages of the document listing (the rows are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            default='10000,1000000',
+            help='Comma-separated table sizes to time'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per page (best is reported)')
+
+    def handle(self, *args, **options):
+        for rows in [int(size) for size in options['rows'].split(',')]:
+            self.stdout.write(f'Listing {rows} documents on {connection.vendor}...')
+            with rolled_back():
+                user = self.create_documents(rows)
+                self.report(user, rows, options['repeat'])
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark complete'))
+
+    def create_documents(self, count):
+        user = User.objects.create(email='benchmark-pagination@example.com')
+        Document.objects.bulk_create([
+            Document(
+                title=f'Document {i}',
+                category='reports',
+                file_type='pdf',
+                file_size='1 MB',
+                file_url=f'https://example.com/{i}.pdf'
+            )
+            for i in range(count)
+        ], batch_size=5000)
+        if connection.vendor == 'postgresql':
+            # Planner statistics for the estimated count
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Document._meta.db_table}')
+        return user
+
+    def report(self, user, rows, repeat):
+        view = DocumentListView.as_view()
+        last = (rows + 9) // 10
+        for page in (1, last // 2, last):
+            modes = (
+                ('page', {'page': page}),
+                ('approximate', {'page': page, 'count': 'approximate'}),
+                ('keyset', {'cursor': self.cursor_for_page(page)}),
+            )
+            for label, params in modes:
+                elapsed, queries, count = self.measure(view, user, params, repeat)
+                self.stdout.write(
+                    f'{label:<12} page {page:<7} {elapsed * 1000:8.1f} ms  {queries} queries  count={count}'
+                )
+
+    def cursor_for_page(self, page):
+        """The ?cursor= a client reaches after following next links to this page."""
+        if page == 1:
+            return ''
+        position = Document.objects.order_by('-id').values_list('id', flat=True)[(page - 1) * 10 - 1]
+        paginator = KeysetPagination()
+        paginator.base_url = 'http://localhost/'
+        url = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(position)))
+        return parse_qs(urlparse(url).query)['cursor'][0]
+
+    def measure(self, view, user, params, repeat):
+        """Best time for one page of the listing, its query count and the reported count."""
+        factory = APIRequestFactory()
+
+        def get_page():
+            request = factory.get('/', params, HTTP_HOST='localhost')
+            force_authenticate(request, user=user)
+            return view(request).render()
+
+        elapsed, queries, response = measure(get_page, repeat)
+        return elapsed, queries, response.data.get('count', '-')
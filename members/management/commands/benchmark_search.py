@@ -0,0 +1,73 @@
+import random
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from adpa_events.models import Event
+from members.models import Document, Project
+from members.search import search
+from utils.benchmark import measure, rolled_back
+
+COMMON_WORDS = [
+    'pipeline', 'refinery', 'offshore', 'exploration', 'production', 'gas', 'crude', 'safety',
+    'licensing', 'training', 'regional', 'annual', 'report', 'workshop', 'summit', 'policy',
+    'investment', 'environment', 'drilling', 'transport',
+]
+
+
+class Command(BaseCommand):
+    help = 'Time /api/search/ queries against large event, project and document tables (the rows are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Rows to create in each table')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed searches per query (best is reported)')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        self.stdout.write(f'Searching {rows} events, projects and documents on {connection.vendor}...')
+        with rolled_back():
+            self.create_rows(rows)
+            for query in ('pipeline', 'site4242', 'offshore site4242', '"annual report"', 'gas -pipeline'):
+                elapsed, queries, results = measure(lambda: search(query), options['repeat'])
+                self.stdout.write(
+                    f'{query:<20} {elapsed * 1000:8.1f} ms  {queries} queries  {len(results)} results'
+                )
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark complete'))
+
+    def create_rows(self, count):
+        # Three common words and one rare one (about 1 in 10000 rows) per row
+        rng = random.Random(0)
+        now = timezone.now()
+
+        def text():
+            return ' '.join(rng.sample(COMMON_WORDS, 3) + [f'site{rng.randrange(10000)}'])
+
+        Event.objects.bulk_create([
+            Event(
+                title=text(),
+                description=text(),
+                start_date=now + timedelta(minutes=i),
+                end_date=now + timedelta(minutes=i + 60),
+                location='Luanda'
+            )
+            for i in range(count)
+        ], batch_size=5000)
+        Project.objects.bulk_create([
+            Project(name=text(), description=text(), status='Active', budget=1000, start_date=now.date())
+            for i in range(count)
+        ], batch_size=5000)
+        Document.objects.bulk_create([
+            Document(
+                title=text(),
+                category='reports',
+                file_type='pdf',
+                file_size='1 MB',
+                file_url=f'https://example.com/{i}.pdf'
+            )
+            for i in range(count)
+        ], batch_size=5000)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for model in (Event, Project, Document):
+                    cursor.execute(f'ANALYZE {model._meta.db_table}')
+
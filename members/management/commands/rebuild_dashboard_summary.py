@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from members.metrics import invalidate_dashboard_metrics
+from members.summary import rebuild_dashboard_summary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard budget and compliance summary from Member and Project'
+
+    def handle(self, *args, **options):
+        count = rebuild_dashboard_summary()
+        invalidate_dashboard_metrics()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {count} dashboard summary rows'))
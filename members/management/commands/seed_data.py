@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from members.models import Member, Project, Document, Event
+from members.models import Member, Project, Document
 from datetime import datetime, timedelta
 
 class Command(BaseCommand):
@@ -12,7 +12,6 @@ class Command(BaseCommand):
         Member.objects.all().delete()
         Project.objects.all().delete()
         Document.objects.all().delete()
-        Event.objects.all().delete()
 
         # Create Members
         members_data = [
@@ -49,6 +48,7 @@ class Command(BaseCommand):
         ]
         
         for data in projects_data:
-            Project.objects.create(**data)
+            countries = data.pop('countries').split(',')
+            Project.objects.create(**data).set_countries(countries)
 
         self.stdout.write(self.style.SUCCESS('Successfully seeded ADPA data'))
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Dashboard metrics snapshot.
+
+The metrics are computed once, stored in the cache and served from there
+until they expire or a Member/Project change invalidates them (see
+members.signals), so a dashboard load normally runs no queries at all.
+Budget, compliance and the tier/country breakdowns are read from the
+DashboardSummary rows, so even a cache miss does not scan Project.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from .models import DashboardSummary, Member
+
+DASHBOARD_METRICS_CACHE_KEY = 'members:dashboard-metrics'
+DASHBOARD_METRICS_CACHE_TIMEOUT = 300  # seconds
+
+
+def compute_dashboard_metrics():
+    """Build the metrics from the database."""
+    member_counts = Member.objects.aggregate(
+        member_count=Count('id', filter=Q(status='Active')),
+        observer_count=Count('id', filter=Q(status='Observer')),
+    )
+    summary = {'all': None, 'tier': [], 'country': []}
+    for row in DashboardSummary.objects.all():
+        if row.scope == 'all':
+            summary['all'] = row
+        else:
+            summary[row.scope].append(row)
+    total = summary['all'] or DashboardSummary(scope='all')
+    return {
+        **member_counts,
+        'active_projects': total.active_projects,
+        'annual_budget': total.active_budget,
+        'compliance_rate': total.compliance_rate,
+        'by_tier': [
+            {
+                'tier': row.key,
+                'members': row.members,
+                'compliance_rate': row.compliance_rate
+            }
+            for row in summary['tier'] if row.members
+        ],
+        'by_country': [
+            {
+                'country': row.key,
+                'members': row.members,
+                'compliance_rate': row.compliance_rate,
+                'active_projects': row.active_projects,
+                'budget': row.active_budget
+            }
+            for row in summary['country'] if row.members or row.active_projects
+        ],
+        'growth_data': list(
+            Member.objects.values('since')
+            .annotate(count=Count('id'))
+            .order_by('since')
+        ),
+        'recent_activities': [
+            {
+                'id': member['id'],
+                'text': f"{member['country']} joined ADPA",
+                'date': member['since']
+            }
+            for member in Member.objects.order_by('-since').values('id', 'country', 'since')[:5]
+        ]
+    }
+
+
+def get_dashboard_metrics():
+    """Return the cached metrics snapshot, computing it on a miss."""
+    timeout = getattr(settings, 'DASHBOARD_METRICS_CACHE_TIMEOUT', DASHBOARD_METRICS_CACHE_TIMEOUT)
+    return cache.get_or_set(DASHBOARD_METRICS_CACHE_KEY, compute_dashboard_metrics, timeout)
+
+
+def invalidate_dashboard_metrics(**kwargs):
+    """Drop the cached snapshot; usable directly as a signal receiver."""
+    cache.delete(DASHBOARD_METRICS_CACHE_KEY)
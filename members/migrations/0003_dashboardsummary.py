@@ -0,0 +1,65 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:31
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def populate_summary(apps, schema_editor):
+    Member = apps.get_model('members', 'Member')
+    Project = apps.get_model('members', 'Project')
+    DashboardSummary = apps.get_model('members', 'DashboardSummary')
+
+    rows = defaultdict(lambda: {
+        'members': 0,
+        'assessed_members': 0,
+        'compliant_members': 0,
+        'active_projects': 0,
+        'active_budget': Decimal(0),
+    })
+    rows[('all', '')]
+    for member in Member.objects.only('tier', 'country', 'payment_status').iterator():
+        for key in (('all', ''), ('tier', member.tier), ('country', member.country)):
+            rows[key]['members'] += 1
+            rows[key]['assessed_members'] += member.payment_status != 'Not Applicable'
+            rows[key]['compliant_members'] += member.payment_status == 'Current'
+    for project in Project.objects.filter(status='Active').only('budget', 'countries').iterator():
+        countries = [c.strip() for c in project.countries.split(',') if c.strip()]
+        for key in [('all', '')] + [('country', country) for country in countries]:
+            rows[key]['active_projects'] += 1
+            rows[key]['active_budget'] += project.budget
+
+    DashboardSummary.objects.bulk_create([
+        DashboardSummary(scope=scope, key=key, **values) for (scope, key), values in rows.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0002_event_is_public'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'All'), ('tier', 'Tier'), ('country', 'Country')], max_length=10)),
+                ('key', models.CharField(blank=True, max_length=50)),
+                ('members', models.IntegerField(default=0)),
+                ('assessed_members', models.IntegerField(default=0)),
+                ('compliant_members', models.IntegerField(default=0)),
+                ('active_projects', models.IntegerField(default=0)),
+                ('active_budget', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['scope', 'key'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dashboardsummary',
+            constraint=models.UniqueConstraint(fields=('scope', 'key'), name='unique_dashboard_summary_scope_key'),
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
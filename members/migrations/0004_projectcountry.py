@@ -0,0 +1,65 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_countries(apps, schema_editor):
+    Project = apps.get_model('members', 'Project')
+    ProjectCountry = apps.get_model('members', 'ProjectCountry')
+    links = []
+    for project in Project.objects.only('countries').iterator():
+        countries = [c.strip() for c in project.countries.split(',') if c.strip()]
+        links.extend(
+            ProjectCountry(project_id=project.pk, country=country)
+            for country in dict.fromkeys(countries)
+        )
+    ProjectCountry.objects.bulk_create(links, batch_size=1000)
+
+
+def restore_countries(apps, schema_editor):
+    Project = apps.get_model('members', 'Project')
+    ProjectCountry = apps.get_model('members', 'ProjectCountry')
+    countries = {}
+    for link in ProjectCountry.objects.order_by('id').iterator():
+        countries.setdefault(link.project_id, []).append(link.country)
+    for project_id, country_list in countries.items():
+        Project.objects.filter(pk=project_id).update(countries=','.join(country_list))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0003_dashboardsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectCountry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=50)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_countries', to='members.project')),
+            ],
+            options={
+                'verbose_name_plural': 'project countries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['country', 'project'], name='projectcountry_country_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='projectcountry',
+            constraint=models.UniqueConstraint(fields=('project', 'country'), name='unique_project_country'),
+        ),
+        # A default lets the column be added back when migrating backwards
+        migrations.AlterField(
+            model_name='project',
+            name='countries',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.RunPython(copy_countries, restore_countries),
+        migrations.RemoveField(
+            model_name='project',
+            name='countries',
+        ),
+    ]
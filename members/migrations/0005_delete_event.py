@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:59
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0004_projectcountry'),
+        # Its rows are copied into adpa_events.Event first
+        ('adpa_events', '0010_consolidate_events'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Event',
+        ),
+    ]
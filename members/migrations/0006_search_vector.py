@@ -0,0 +1,46 @@
+# Generated by Django 4.2.11 on 2026-10-18 03:12
+
+from django.db import migrations
+
+# Weighted tsvectors the database keeps up to date on every write, for
+# members.search. PostgreSQL only; other databases search without them.
+# Columns they read can't change type while they exist.
+SEARCH_VECTORS = {
+    'members_project': ('project_search_idx', (
+        "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(implementing_agency, '')), 'C')"
+    )),
+    'members_document': ('document_search_idx', (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(category, '')), 'C')"
+    )),
+}
+
+
+def add_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, (index, vector) in SEARCH_VECTORS.items():
+        schema_editor.execute(
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED'
+        )
+        schema_editor.execute(f'CREATE INDEX {index} ON {table} USING gin (search_vector)')
+
+
+def remove_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_VECTORS:
+        schema_editor.execute(f'ALTER TABLE {table} DROP COLUMN search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0005_delete_event'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vectors, remove_search_vectors),
+    ]
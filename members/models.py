@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 class Member(models.Model):
     COUNTRY_CHOICES = [
@@ -65,7 +65,6 @@ class Project(models.Model):
 
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
-    countries = models.CharField(max_length=500)  # Comma-separated countries
     status = models.CharField(max_length=15, choices=STATUS_CHOICES)
     budget = models.DecimalField(max_digits=12, decimal_places=2)
     progress = models.IntegerField(default=0)
@@ -75,16 +74,43 @@ class Project(models.Model):
     implementing_agency = models.CharField(max_length=200, blank=True)
 
     def get_countries_list(self):
-        """Returns countries as a list"""
-        return [c.strip() for c in self.countries.split(',') if c.strip()]
+        """Returns countries as a list (uses prefetched project_countries when available)"""
+        return [link.country for link in self.project_countries.all()]
 
     def set_countries(self, country_list):
-        """Sets countries from a list"""
-        self.countries = ','.join(str(c) for c in country_list)
+        """Replaces the project's countries with the given list; the project must be saved"""
+        countries = list(dict.fromkeys(str(c).strip() for c in country_list if str(c).strip()))
+        with transaction.atomic():
+            self.project_countries.exclude(country__in=countries).delete()
+            existing = set(self.project_countries.values_list('country', flat=True))
+            for country in countries:
+                if country not in existing:
+                    # Saved one by one so the dashboard summary signals see each link
+                    ProjectCountry.objects.create(project=self, country=country)
+        getattr(self, '_prefetched_objects_cache', {}).pop('project_countries', None)
 
     def __str__(self):
         return self.name
 
+class ProjectCountry(models.Model):
+    """A country a project runs in."""
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='project_countries')
+    country = models.CharField(max_length=50)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name_plural = 'project countries'
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'country'], name='unique_project_country'),
+        ]
+        indexes = [
+            models.Index(fields=['country', 'project'], name='projectcountry_country_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id}: {self.country}"
+
 class Document(models.Model):
     CATEGORY_CHOICES = [
         ('governance', 'Governance'),
@@ -106,22 +132,41 @@ class Document(models.Model):
     def __str__(self):
         return self.title
 
-class Event(models.Model):
-    EVENT_TYPE_CHOICES = [
-        ('meeting', 'Meeting'),
-        ('workshop', 'Workshop'),
-        ('deadline', 'Deadline'),
-        ('conference', 'Conference'),
+class DashboardSummary(models.Model):
+    """
+    Materialised dashboard aggregates, one row per scope and key.
+
+    scope 'all' (empty key) holds the overall totals, 'tier' one row per
+    membership tier and 'country' one row per member or project country.
+    Kept up to date by members.summary on every Member/Project write.
+    """
+
+    SCOPE_CHOICES = [
+        ('all', 'All'),
+        ('tier', 'Tier'),
+        ('country', 'Country'),
     ]
 
-    title = models.CharField(max_length=200)
-    description = models.TextField(blank=True)
-    event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES)
-    start_date = models.DateTimeField()
-    end_date = models.DateTimeField(null=True, blank=True)
-    location = models.CharField(max_length=200, blank=True)
-    virtual_link = models.URLField(blank=True)
-    is_public = models.BooleanField(default=True)
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    key = models.CharField(max_length=50, blank=True)
+    members = models.IntegerField(default=0)
+    assessed_members = models.IntegerField(default=0)  # payment status other than Not Applicable
+    compliant_members = models.IntegerField(default=0)  # payment status Current
+    active_projects = models.IntegerField(default=0)
+    active_budget = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['scope', 'key']
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_dashboard_summary_scope_key'),
+        ]
+
+    @property
+    def compliance_rate(self):
+        """Percentage of assessed members whose dues are current."""
+        if not self.assessed_members:
+            return 0
+        return round(100 * self.compliant_members / self.assessed_members)
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"{self.scope}: {self.key}" if self.key else self.scope
@@ -0,0 +1,119 @@
+"""
+Full-text search over events, projects and documents.
+
+On PostgreSQL every searchable table has a search_vector column, a
+weighted tsvector of the fields in SEARCH_TYPES that the database
+generates on every write (see the search_vector migrations), indexed with
+GIN. A search is parsed with websearch_to_tsquery, so it accepts quoted
+phrases, OR and -word, and each table returns its best matches by
+ts_rank, one query per table; the lists are merged by rank.
+
+ts_rank reads every row it ranks, so ranking all matches of a common word
+costs a scan of most of the table. Only up to SEARCH_RANK_CANDIDATES
+matches in the weight A fields (titles and names) plus as many other
+matches of each table are ranked: a selective search ranks all of its
+matches, while a search matching more rows than that returns the best of
+the candidates found first, which include its title matches before any
+match in the other fields. A quoted phrase is checked against word
+positions, which the index doesn't hold, so a phrase of common words still
+reads rows until it has found its candidates. Searches with nothing but
+-words return nothing.
+
+Other databases (the test suite's SQLite) fall back to matching rows in
+which every word of the search appears in one of the fields and no -word
+does, ranked by the same weights, which scans the tables.
+"""
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from adpa_events.models import Event
+from .models import Document, Project
+
+SEARCH_CONFIG = 'english'  # text search configuration the search_vector columns are built with
+SEARCH_RESULT_LIMIT = 20  # results per search
+SEARCH_MAX_RESULT_LIMIT = 100
+SEARCH_RANK_CANDIDATES = 1000  # title matches, and other matches, ranked per table
+
+# ts_rank's default weights for the A, B and C labels
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+
+# Result type -> model, the field shown as the result title and the
+# weighted fields; the search_vector migrations build the same vectors.
+SEARCH_TYPES = {
+    'event': (Event, 'title', {'title': 'A', 'description': 'B', 'location': 'C'}),
+    'project': (Project, 'name', {'name': 'A', 'description': 'B', 'implementing_agency': 'C'}),
+    'document': (Document, 'title', {'title': 'A', 'category': 'C'}),
+}
+
+
+def search(query, types=None, limit=None):
+    """
+    Return the best matches for a search across the given result types.
+
+    Results are dicts with 'type', 'id', 'title' and 'rank', best first.
+    """
+    limit = limit or getattr(settings, 'SEARCH_RESULT_LIMIT', SEARCH_RESULT_LIMIT)
+    if not _search_words(query):
+        # Only exclusions (or nothing): it would match most rows and can't use the index
+        return []
+    results = []
+    for result_type in types or SEARCH_TYPES:
+        model, title_field, fields = SEARCH_TYPES[result_type]
+        queryset = model._default_manager.all()
+        if connections[queryset.db].vendor == 'postgresql':
+            queryset = _full_text_matches(queryset, query)
+        else:
+            queryset = _fallback_matches(queryset, query, fields)
+        rows = queryset.order_by('-rank', 'pk').values_list('pk', title_field, 'rank')[:limit]
+        results += [
+            {'type': result_type, 'id': pk, 'title': title, 'rank': rank}
+            for pk, title, rank in rows
+        ]
+    results.sort(key=lambda result: -result['rank'])
+    return results[:limit]
+
+
+def _full_text_matches(queryset, query):
+    # Unqualified, so it names the right table inside the candidates subqueries
+    tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+    params = [SEARCH_CONFIG, query]
+    limit = getattr(settings, 'SEARCH_RANK_CANDIDATES', SEARCH_RANK_CANDIDATES)
+    # The same query with every lexeme labelled :A, for matches on the weight A
+    # fields (titles and names). It stays a plain tsquery, so the index serves
+    # it and the planner estimates it like the query itself.
+    title_tsquery = f"regexp_replace({tsquery}::text, %s, %s, 'g')::tsquery"
+    title_params = params + [r"'((?:[^']|'')*)'", r"'\1':A"]
+    match = RawSQL(f'search_vector @@ {tsquery}', params, output_field=BooleanField())
+    title_match = RawSQL(f'search_vector @@ {title_tsquery}', title_params, output_field=BooleanField())
+    # Title matches first, then any others; a -word only excluded from the
+    # title is checked on the candidates
+    candidates = queryset.filter(title_match).order_by().values('pk')[:limit].union(
+        queryset.filter(match).order_by().values('pk')[:limit]
+    )
+    return queryset.filter(match, pk__in=candidates).annotate(
+        rank=RawSQL(f'ts_rank(search_vector, {tsquery})', params, output_field=FloatField())
+    )
+
+
+def _search_words(query):
+    return [term for term in query.replace('"', ' ').split() if not term.startswith('-')]
+
+
+def _fallback_matches(queryset, query, fields):
+    # Quotes are ignored and -word excludes rows containing the word
+    terms = query.replace('"', ' ').split()
+    words = _search_words(query)
+    for term in terms:
+        match = Q()
+        for field in fields:
+            match |= Q(**{f'{field}__icontains': term.lstrip('-')})
+        queryset = queryset.exclude(match) if term.startswith('-') else queryset.filter(match)
+    rank = Value(0.0, output_field=FloatField())
+    for field, weight in fields.items():
+        found = Q()
+        for word in words:
+            found |= Q(**{f'{field}__icontains': word})
+        rank = rank + Case(When(found, then=Value(WEIGHTS[weight])), default=Value(0.0), output_field=FloatField())
+    return queryset.annotate(rank=rank)
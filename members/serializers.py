@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Member, Project, Document, Event
+from adpa_events.models import Event
+from .models import Member, Project, Document
+from .search import SEARCH_MAX_RESULT_LIMIT, SEARCH_TYPES
 
 class MemberSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,14 +9,17 @@ class MemberSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class ProjectSerializer(serializers.ModelSerializer):
-    countries = serializers.SerializerMethodField()
-    
+    # Reads the prefetched project_countries; see ProjectListView.queryset
+    countries = serializers.SlugRelatedField(
+        source='project_countries',
+        slug_field='country',
+        many=True,
+        read_only=True
+    )
+
     class Meta:
         model = Project
         fields = '__all__'
-    
-    def get_countries(self, obj):
-        return obj.get_countries_list()
 
 class DocumentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,13 +29,29 @@ class DocumentSerializer(serializers.ModelSerializer):
 class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
-        fields = '__all__'
+        fields = (
+            'id', 'title', 'description', 'event_type', 'start_date', 'end_date',
+            'location', 'virtual_link', 'is_public'
+        )
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField()
+    type = serializers.MultipleChoiceField(choices=list(SEARCH_TYPES), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=SEARCH_MAX_RESULT_LIMIT, required=False)
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    rank = serializers.FloatField()
 
 class DashboardMetricsSerializer(serializers.Serializer):
     member_count = serializers.IntegerField()
     observer_count = serializers.IntegerField()
-    annual_budget = serializers.DecimalField(max_digits=12, decimal_places=2)
+    annual_budget = serializers.DecimalField(max_digits=14, decimal_places=2)
     active_projects = serializers.IntegerField()
     compliance_rate = serializers.IntegerField()
+    by_tier = serializers.ListField()
+    by_country = serializers.ListField()
     growth_data = serializers.ListField()
     recent_activities = serializers.ListField()
\ No newline at end of file
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from .metrics import invalidate_dashboard_metrics
+from .models import Member, Project, ProjectCountry
+from .summary import apply_country_change, apply_project_change, project_contribution, refresh_member_summary
+
+
+def refresh_member_summary_receiver(sender, raw=False, **kwargs):
+    if not raw:
+        refresh_member_summary()
+
+
+def remember_project_contribution(sender, instance, raw=False, **kwargs):
+    """Stash what the stored version of the project contributes before it is overwritten."""
+    if raw:
+        return
+    previous = None
+    if instance.pk:
+        previous = Project.objects.filter(pk=instance.pk).only('status', 'budget').first()
+    instance._summary_contribution = project_contribution(previous)
+
+
+def update_project_summary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        apply_project_change(getattr(instance, '_summary_contribution', None), project_contribution(instance))
+        instance._summary_contribution = project_contribution(instance)
+
+
+def remove_project_summary(sender, instance, **kwargs):
+    # The ProjectCountry links are deleted (and accounted for) before the project itself
+    apply_project_change(project_contribution(instance, with_countries=False), None)
+
+
+def add_country_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        apply_country_change(instance.project, instance.country, 1)
+
+
+def remove_country_summary(sender, instance, **kwargs):
+    apply_country_change(instance.project, instance.country, -1)
+
+
+post_save.connect(refresh_member_summary_receiver, sender=Member, dispatch_uid='dashboard-summary-save-Member')
+post_delete.connect(refresh_member_summary_receiver, sender=Member, dispatch_uid='dashboard-summary-delete-Member')
+pre_save.connect(remember_project_contribution, sender=Project, dispatch_uid='dashboard-summary-presave-Project')
+post_save.connect(update_project_summary, sender=Project, dispatch_uid='dashboard-summary-save-Project')
+post_delete.connect(remove_project_summary, sender=Project, dispatch_uid='dashboard-summary-delete-Project')
+post_save.connect(add_country_summary, sender=ProjectCountry, dispatch_uid='dashboard-summary-save-ProjectCountry')
+post_delete.connect(remove_country_summary, sender=ProjectCountry, dispatch_uid='dashboard-summary-delete-ProjectCountry')
+
+# Connected after the summary receivers so the cache is dropped once the summary is current
+for model in (Member, Project, ProjectCountry):
+    post_save.connect(invalidate_dashboard_metrics, sender=model, dispatch_uid=f'dashboard-metrics-save-{model.__name__}')
+    post_delete.connect(invalidate_dashboard_metrics, sender=model, dispatch_uid=f'dashboard-metrics-delete-{model.__name__}')
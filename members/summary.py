@@ -0,0 +1,122 @@
+"""
+Maintenance of the DashboardSummary table.
+
+Member-side columns are refreshed with three grouped aggregates over
+Member (one row per country, so these stay small). Project-side columns
+are maintained incrementally with F() expressions: a project write only
+adds the difference between its old and new contribution to the overall
+row and to the rows of the countries it covers, and adding or removing a
+ProjectCountry link moves an active project's budget in or out of that
+country's row.
+
+Signals don't fire for queryset.update() or bulk_create(); run
+rebuild_dashboard_summary after bulk changes.
+"""
+
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from .models import DashboardSummary, Member, Project, ProjectCountry
+
+MEMBER_FIELDS = ['members', 'assessed_members', 'compliant_members']
+
+MEMBER_AGGREGATES = {
+    'members': Count('id'),
+    'assessed_members': Count('id', filter=~Q(payment_status='Not Applicable')),
+    'compliant_members': Count('id', filter=Q(payment_status='Current')),
+}
+
+
+def refresh_member_summary():
+    """Recompute the member columns of every summary row."""
+    rows = {('all', ''): Member.objects.aggregate(**MEMBER_AGGREGATES)}
+    for scope, field in (('tier', 'tier'), ('country', 'country')):
+        for row in Member.objects.values(field).annotate(**MEMBER_AGGREGATES).order_by():
+            rows[(scope, row.pop(field))] = row
+
+    with transaction.atomic():
+        # Tiers/countries that no longer have members drop to zero
+        DashboardSummary.objects.exclude(scope='all').update(**{field: 0 for field in MEMBER_FIELDS})
+        DashboardSummary.objects.bulk_create(
+            [DashboardSummary(scope=scope, key=key, **counts) for (scope, key), counts in rows.items()],
+            update_conflicts=True,
+            unique_fields=['scope', 'key'],
+            update_fields=MEMBER_FIELDS
+        )
+
+
+def project_contribution(project, with_countries=True):
+    """Return (budget, countries) a project adds to the summary, or None if it is not active."""
+    if project is None or project.status != 'Active':
+        return None
+    return Decimal(project.budget or 0), project.get_countries_list() if with_countries else []
+
+
+def apply_project_change(before, after):
+    """Move the summary from a project's old contribution to its new one."""
+    if before == after:
+        return
+    deltas = {}
+    for contribution, sign in ((before, -1), (after, 1)):
+        if contribution is None:
+            continue
+        budget, countries = contribution
+        for key in [('all', '')] + [('country', country) for country in countries]:
+            projects, total = deltas.get(key, (0, Decimal(0)))
+            deltas[key] = (projects + sign, total + sign * budget)
+
+    with transaction.atomic():
+        for (scope, key), (projects, budget) in deltas.items():
+            if projects or budget:
+                _increment(scope, key, projects, budget)
+
+
+def apply_country_change(project, country, sign):
+    """Add (sign=1) or remove (sign=-1) an active project's contribution to one country."""
+    if project.status == 'Active':
+        _increment('country', country, sign, sign * Decimal(project.budget or 0))
+
+
+def _increment(scope, key, projects, budget):
+    rows = DashboardSummary.objects.filter(scope=scope, key=key)
+    updates = {
+        'active_projects': F('active_projects') + projects,
+        'active_budget': F('active_budget') + budget,
+    }
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            DashboardSummary.objects.create(
+                scope=scope, key=key, active_projects=projects, active_budget=budget
+            )
+    except IntegrityError:
+        rows.update(**updates)
+
+
+def rebuild_dashboard_summary():
+    """Recompute the whole summary table from Member and Project. Returns the number of rows."""
+    with transaction.atomic():
+        DashboardSummary.objects.all().delete()
+        totals = Project.objects.filter(status='Active').aggregate(
+            active_projects=Count('id'),
+            active_budget=Sum('budget'),
+        )
+        DashboardSummary.objects.create(
+            scope='all',
+            key='',
+            active_projects=totals['active_projects'],
+            active_budget=totals['active_budget'] or 0
+        )
+        by_country = (
+            ProjectCountry.objects.filter(project__status='Active')
+            .values('country')
+            .annotate(active_projects=Count('project'), active_budget=Sum('project__budget'))
+            .order_by()
+        )
+        DashboardSummary.objects.bulk_create([
+            DashboardSummary(scope='country', key=row.pop('country'), **row)
+            for row in by_country
+        ])
+        refresh_member_summary()
+    return DashboardSummary.objects.count()
@@ -1,3 +1,476 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock, skipUnless
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from adpa_events.models import Event
+from .metrics import get_dashboard_metrics
+from .models import DashboardSummary, Document, Member, Project
+from .search import _full_text_matches, search
+from .summary import rebuild_dashboard_summary
 
-# Create your tests here.
+User = get_user_model()
+
+
+def create_member(country, **kwargs):
+    fields = {
+        'status': 'Active',
+        'since': 2020,
+        'tier': 'Full',
+        'payment_status': 'Current',
+        'representative': 'Representative',
+        'latitude': 0,
+        'longitude': 0,
+    }
+    fields.update(kwargs)
+    return Member.objects.create(country=country, **fields)
+
+
+def create_project(name, countries='Angola', **kwargs):
+    fields = {
+        'status': 'Active',
+        'budget': 1000,
+        'start_date': '2024-01-01',
+    }
+    fields.update(kwargs)
+    project = Project.objects.create(name=name, **fields)
+    project.set_countries(countries.split(','))
+    return project
+
+
+class DashboardMetricsTests(APITestCase):
+    """Tests for the cached dashboard metrics snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='test@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        create_member('Angola', since=1987)
+        create_member('Ghana', since=1987)
+        create_member('Russia', status='Observer', since=2020)
+        create_project('Pipeline')
+        create_project('Refinery', status='Planning')
+
+    def test_metrics_values(self):
+        """Counts, growth data and recent activities come from the database"""
+        metrics = get_dashboard_metrics()
+        self.assertEqual(metrics['member_count'], 2)
+        self.assertEqual(metrics['observer_count'], 1)
+        self.assertEqual(metrics['active_projects'], 1)
+        self.assertEqual(metrics['growth_data'], [{'since': 1987, 'count': 2}, {'since': 2020, 'count': 1}])
+        self.assertEqual(metrics['recent_activities'][0]['text'], 'Russia joined ADPA')
+
+    def test_cache_hit_runs_no_queries(self):
+        """Once cached, the snapshot is served without touching the database"""
+        get_dashboard_metrics()
+        with self.assertNumQueries(0):
+            get_dashboard_metrics()
+
+    def test_endpoint_serves_cached_snapshot(self):
+        """The dashboard endpoint only queries on a cache miss"""
+        self.client.get('/api/member/data/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/member/data/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['member_count'], 2)
+
+    def test_member_and_project_changes_invalidate(self):
+        """Saving or deleting a Member or Project refreshes the snapshot"""
+        self.assertEqual(get_dashboard_metrics()['member_count'], 2)
+
+        create_member('Togo')
+        self.assertEqual(get_dashboard_metrics()['member_count'], 3)
+
+        Project.objects.get(name='Refinery').delete()
+        create_project('Terminal')
+        self.assertEqual(get_dashboard_metrics()['active_projects'], 2)
+
+
+class DashboardSummaryTests(APITestCase):
+    """Tests for the budget and compliance summary behind the dashboard"""
+
+    def setUp(self):
+        cache.clear()
+        create_member('Angola', tier='Founding', payment_status='Current')
+        create_member('Ghana', tier='Full', payment_status='Overdue')
+        create_member('Togo', tier='Full', payment_status='Current')
+        create_member('Russia', status='Observer', tier='Observer', payment_status='Not Applicable')
+        self.pipeline = create_project('Pipeline', countries='Angola,Ghana', budget=2500000)
+        create_project('Refinery', countries='Togo', budget=1000000)
+        create_project('Terminal', countries='Togo', status='Planning', budget=400000)
+
+    def summary(self, scope, key=''):
+        return DashboardSummary.objects.get(scope=scope, key=key)
+
+    def summary_rows(self):
+        return {
+            (row.scope, row.key): (row.members, row.compliant_members, row.assessed_members,
+                                   row.active_projects, row.active_budget)
+            for row in DashboardSummary.objects.all()
+            if row.members or row.active_projects
+        }
+
+    def test_budget_and_compliance(self):
+        """Budget sums active projects; compliance ignores members with no dues"""
+        metrics = get_dashboard_metrics()
+        self.assertEqual(metrics['annual_budget'], Decimal('3500000'))
+        self.assertEqual(metrics['active_projects'], 2)
+        self.assertEqual(metrics['compliance_rate'], 67)
+
+    def test_breakdowns(self):
+        """Metrics are broken down per tier and per country"""
+        metrics = get_dashboard_metrics()
+        tiers = {row['tier']: row for row in metrics['by_tier']}
+        self.assertEqual(tiers['Full']['members'], 2)
+        self.assertEqual(tiers['Full']['compliance_rate'], 50)
+        self.assertEqual(tiers['Observer']['compliance_rate'], 0)
+        countries = {row['country']: row for row in metrics['by_country']}
+        self.assertEqual(countries['Angola']['budget'], Decimal('2500000'))
+        self.assertEqual(countries['Togo']['active_projects'], 1)
+
+    def test_project_changes_are_incremental(self):
+        """Editing, deactivating and deleting projects adjusts the summary in place"""
+        self.pipeline.budget = 3000000
+        self.pipeline.save()
+        self.pipeline.set_countries(['Angola'])
+        self.assertEqual(self.summary('all').active_budget, Decimal('4000000'))
+        self.assertEqual(self.summary('country', 'Ghana').active_projects, 0)
+        self.assertEqual(self.summary('country', 'Angola').active_budget, Decimal('3000000'))
+
+        Project.objects.filter(name='Terminal').get().delete()
+        self.pipeline.status = 'Completed'
+        self.pipeline.save()
+        self.assertEqual(self.summary('all').active_projects, 1)
+        self.assertEqual(self.summary('all').active_budget, Decimal('1000000'))
+
+    def test_member_changes(self):
+        """Member payment changes and deletions refresh the compliance counts"""
+        Member.objects.filter(country='Ghana').get().delete()
+        self.assertEqual(self.summary('all').compliance_rate, 100)
+        self.assertEqual(self.summary('country', 'Ghana').members, 0)
+
+        member = Member.objects.get(country='Togo')
+        member.payment_status = 'Pending'
+        member.save()
+        self.assertEqual(self.summary('tier', 'Full').compliance_rate, 0)
+
+    def test_rebuild_matches_incremental(self):
+        """A full rebuild reproduces the incrementally maintained rows"""
+        self.pipeline.budget = 100
+        self.pipeline.save()
+        Member.objects.get(country='Ghana').delete()
+        incremental = self.summary_rows()
+        rebuild_dashboard_summary()
+        self.assertEqual(self.summary_rows(), incremental)
+
+    def test_cache_miss_reads_summary(self):
+        """Computing the snapshot does not depend on the number of projects"""
+        for index in range(20):
+            create_project(f'Project {index}')
+        with self.assertNumQueries(4):
+            get_dashboard_metrics()
+
+
+class ProjectCountryTests(APITestCase):
+    """Tests for the normalised project countries and the ?country= filter"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='test@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        create_project('Pipeline', countries='Angola,Namibia')
+        create_project('Refinery', countries='Ghana')
+        create_project('Terminal', countries='Angola', status='Planning')
+
+    def results(self, response):
+        data = response.data
+        return data['results'] if isinstance(data, dict) else data
+
+    def test_list_serializes_countries(self):
+        """Countries are listed in the order they were set"""
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        countries = {project['name']: project['countries'] for project in self.results(response)}
+        self.assertEqual(countries['Pipeline'], ['Angola', 'Namibia'])
+        self.assertEqual(countries['Refinery'], ['Ghana'])
+
+    def test_filter_by_country(self):
+        """?country= only returns projects running in that country"""
+        response = self.client.get('/api/projects/', {'country': 'Angola'})
+        self.assertEqual(sorted(p['name'] for p in self.results(response)), ['Pipeline', 'Terminal'])
+
+        response = self.client.get('/api/projects/', {'country': 'Angola', 'status': 'Active'})
+        self.assertEqual([p['name'] for p in self.results(response)], ['Pipeline'])
+
+    def test_list_query_count_is_constant(self):
+        """Countries are prefetched instead of being loaded per project"""
+        self.client.get('/api/projects/')
+        for index in range(10):
+            create_project(f'Project {index}', countries='Togo,Mali')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/projects/')
+        project_queries = [q for q in queries if 'members_project' in q['sql']]
+        self.assertLessEqual(len(project_queries), 3)
+
+    def test_set_countries_updates_summary(self):
+        """Replacing a project's countries moves its budget between country rows"""
+        project = Project.objects.get(name='Refinery')
+        project.set_countries(['Togo', 'Ghana', 'Togo'])
+        self.assertEqual(project.get_countries_list(), ['Ghana', 'Togo'])
+        project.set_countries(['Togo'])
+        summary = {row.key: row.active_projects for row in DashboardSummary.objects.filter(scope='country')}
+        self.assertEqual(summary['Ghana'], 0)
+        self.assertEqual(summary['Togo'], 1)
+
+        project.delete()
+        self.assertEqual(DashboardSummary.objects.get(scope='country', key='Togo').active_projects, 0)
+        self.assertEqual(DashboardSummary.objects.get(scope='all').active_projects, 1)
+
+
+class UpcomingEventsTests(APITestCase):
+    """The dashboard lists upcoming events from the shared event table"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        for days in (-2, 3, 1, 2) + tuple(range(10, 22)):
+            Event.objects.create(
+                title=f'In {days} days',
+                event_type='workshop',
+                start_date=now + timedelta(days=days),
+                end_date=now + timedelta(days=days, hours=2),
+            )
+
+    def test_upcoming_events_are_paginated_soonest_first(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/events/upcoming/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 15)
+        titles = [event['title'] for event in response.data['results']]
+        self.assertEqual(titles[:3], ['In 1 days', 'In 2 days', 'In 3 days'])
+        self.assertEqual(len(titles), 10)
+        self.assertEqual(response.data['results'][0]['event_type'], 'workshop')
+        # Count and page; the session user is loaded by the test client
+        self.assertLessEqual(len([q for q in queries if 'adpa_events_event' in q['sql']]), 2)
+
+        response = self.client.get('/api/events/upcoming/', {'page': 2})
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_keyset_pages_cover_every_event_once(self):
+        """?cursor= walks the listing by keyset, one query per page and no COUNT"""
+        seen = []
+        response = self.client.get('/api/events/upcoming/', {'cursor': '', 'page_size': 4})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen += [event['title'] for event in response.data['results']]
+            if not response.data['next']:
+                break
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.data['next'])
+            self.assertEqual(len([q for q in queries if 'adpa_events_event' in q['sql']]), 1)
+        self.assertEqual(len(seen), 15)
+        self.assertEqual(seen[:2], ['In 1 days', 'In 2 days'])
+        self.assertEqual(len(set(seen)), 15)
+
+
+class PaginationModeTests(APITestCase):
+    """?cursor= and ?count=approximate on the member listings"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        Document.objects.bulk_create([
+            Document(
+                title=f'Document {index}',
+                category='reports',
+                file_type='pdf',
+                file_size='1 MB',
+                file_url=f'https://example.com/{index}.pdf'
+            )
+            for index in range(25)
+        ])
+
+    def test_keyset_pages_newest_first_without_count(self):
+        seen = []
+        response = self.client.get('/api/documents/', {'cursor': ''})
+        while True:
+            self.assertNotIn('count', response.data)
+            seen += [document['title'] for document in response.data['results']]
+            if not response.data['next']:
+                break
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.data['next'])
+            document_queries = [q['sql'] for q in queries if 'members_document' in q['sql']]
+            self.assertEqual(len(document_queries), 1)
+            self.assertNotIn('COUNT(', document_queries[0])
+        self.assertEqual(seen, [f'Document {index}' for index in range(24, -1, -1)])
+
+    def test_keyset_pages_members_and_filtered_projects(self):
+        for country in ('Angola', 'Ghana', 'Namibia'):
+            create_member(country)
+        response = self.client.get('/api/members/', {'cursor': '', 'page_size': 2})
+        self.assertEqual([m['country'] for m in response.data['results']], ['Angola', 'Ghana'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([m['country'] for m in response.data['results']], ['Namibia'])
+
+        create_project('Pipeline', countries='Angola')
+        create_project('Refinery', countries='Ghana')
+        create_project('Terminal', countries='Angola')
+        response = self.client.get('/api/projects/', {'cursor': '', 'country': 'Angola', 'page_size': 1})
+        self.assertEqual(response.data['results'][0]['name'], 'Pipeline')
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['name'], 'Terminal')
+        self.assertIsNone(response.data['next'])
+
+    def test_approximate_count_falls_back_to_exact_count(self):
+        """Without planner estimates (SQLite, small tables) the count is exact"""
+        response = self.client.get('/api/documents/', {'count': 'approximate'})
+        self.assertEqual(response.data['count'], 25)
+        self.assertTrue(response.data['count_is_approximate'])
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNotNone(response.data['next'])
+        self.assertNotIn('count_is_approximate', self.client.get('/api/documents/').data)
+
+    def test_approximate_count_pages_past_a_low_estimate(self):
+        """Paging follows the rows, not the estimate"""
+        with mock.patch('api.pagination.estimate_count', return_value=12):
+            response = self.client.get('/api/documents/', {'count': 'approximate', 'page': 3})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 12)
+            self.assertEqual(len(response.data['results']), 5)
+            self.assertIsNone(response.data['next'])
+            response = self.client.get('/api/documents/', {'count': 'approximate', 'page': 4})
+            self.assertEqual(response.status_code, 404)
+
+
+class SearchTests(APITestCase):
+    """/api/search/ across events, projects and documents (the SQLite fallback)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='Pipeline safety workshop',
+            description='Inspection of offshore pipelines',
+            start_date=now,
+            end_date=now + timedelta(hours=2),
+            location='Luanda'
+        )
+        self.project = create_project('Gas pipeline', description='Regional gas pipeline safety')
+        self.document = Document.objects.create(
+            title='Annual report',
+            category='reports',
+            file_type='pdf',
+            file_size='1 MB',
+            file_url='https://example.com/report.pdf'
+        )
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(result['type'], result['id']) for result in response.data['results']]
+
+    def test_ranks_title_matches_first(self):
+        # One query per result type
+        with self.assertNumQueries(3):
+            results = self.search(q='pipeline safety')
+        self.assertEqual(results, [('event', self.event.pk), ('project', self.project.pk)])
+
+        # A title match outranks a description match
+        self.assertEqual(self.search(q='gas safety'), [('project', self.project.pk)])
+        self.assertEqual(self.search(q='safety'), [('event', self.event.pk), ('project', self.project.pk)])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search(q='pipeline report'), [])
+        self.assertEqual(self.search(q='Luanda workshop'), [('event', self.event.pk)])
+        self.assertEqual(self.search(q='annual REPORT'), [('document', self.document.pk)])
+        self.assertEqual(self.search(q='pipeline -gas'), [('event', self.event.pk)])
+        self.assertEqual(self.search(q='-gas'), [])
+
+    def test_type_and_limit(self):
+        self.assertEqual(self.search(q='pipeline', type='project'), [('project', self.project.pk)])
+        self.assertEqual(len(self.search(q='pipeline', limit=1)), 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'gas', 'type': 'member'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'gas', 'limit': 1000}).status_code, 400)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'search_vector columns only exist on PostgreSQL')
+class FullTextSearchTests(APITestCase):
+    """The PostgreSQL path: generated tsvectors, GIN indexes and ts_rank"""
+
+    def setUp(self):
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='Pipeline safety workshop',
+            description='Inspection of offshore installations',
+            start_date=now,
+            end_date=now + timedelta(hours=2),
+            location='Luanda'
+        )
+        self.project = create_project('Gas network', description='Regional pipelines')
+
+    def found(self, query, **kwargs):
+        return [(result['type'], result['id']) for result in search(query, **kwargs)]
+
+    def test_matches_are_stemmed_and_ranked_by_field_weight(self):
+        results = search('pipeline')
+        self.assertEqual(
+            [(r['type'], r['id']) for r in results],
+            [('event', self.event.pk), ('project', self.project.pk)]
+        )
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+        self.assertEqual(self.found('"safety workshop"'), [('event', self.event.pk)])
+        self.assertEqual(self.found('"workshop safety"'), [])
+        self.assertEqual(self.found('pipelines -gas'), [('event', self.event.pk)])
+        self.assertEqual(self.found('luanda or network', types=['project']), [('project', self.project.pk)])
+        self.assertEqual(self.found('-gas'), [])
+
+    def test_vectors_follow_every_kind_of_write(self):
+        document = Document.objects.create(
+            title='Annual report', category='reports', file_type='pdf', file_size='1 MB',
+            file_url='https://example.com/report.pdf'
+        )
+        self.assertEqual(self.found('budget'), [])
+        document.title = 'Budget review'
+        document.save()
+        self.assertEqual(self.found('budget'), [('document', document.pk)])
+        Document.objects.filter(pk=document.pk).update(title='Audit')
+        self.assertEqual(self.found('budget'), [])
+        Project.objects.bulk_create([
+            Project(name='Refinery audit', status='Active', budget=1, start_date='2024-01-01')
+        ])
+        self.assertEqual(sorted(r['type'] for r in search('audit')), ['document', 'project'])
+        self.event.delete()
+        self.assertEqual(self.found('workshop'), [])
+
+    @override_settings(SEARCH_RANK_CANDIDATES=2)
+    def test_title_matches_are_ranked_beyond_the_candidate_limit(self):
+        # Written first, so a plain LIMIT over the matches would stop at these
+        for index in range(3):
+            create_project(f'Survey {index}', description='Pipeline maintenance')
+        named = create_project('Pipeline expansion')
+
+        results = search('pipeline', types=['project'])
+        self.assertEqual(results[0]['id'], named.pk)
+        self.assertEqual(len(results), 3)
+
+        # Only the title is checked for the -word while picking title matches
+        create_project('Pipeline review', description='Gas supply')
+        self.assertNotIn('Pipeline review', [r['title'] for r in search('pipeline -gas', types=['project'])])
+
+    def test_searches_use_the_gin_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = _full_text_matches(Document.objects.all(), 'report').explain()
+        self.assertIn('document_search_idx', plan)
@@ -4,7 +4,8 @@ from .views import (
     MemberListView,
     ProjectListView,
     DocumentListView,
-    EventListView
+    EventListView,
+    SearchView
 )
 
 urlpatterns = [
@@ -12,5 +13,7 @@ urlpatterns = [
     path('members/', MemberListView.as_view(), name='member-list'),
     path('projects/', ProjectListView.as_view(), name='project-list'),
     path('documents/', DocumentListView.as_view(), name='document-list'),
-    path('events/', EventListView.as_view(), name='event-list'),
+    # events/ itself is served by api.urls
+    path('events/upcoming/', EventListView.as_view(), name='upcoming-events'),
+    path('search/', SearchView.as_view(), name='search'),
 ]
\ No newline at end of file
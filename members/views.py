@@ -1,65 +1,77 @@
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import Member, Project, Document, Event
+from adpa_events.models import Event
+from api.pagination import EventKeysetPagination, PaginationModeMixin
+from .models import Member, Project, Document
 from .serializers import (
     MemberSerializer, 
     ProjectSerializer,
     DocumentSerializer,
     EventSerializer,
-    DashboardMetricsSerializer
+    DashboardMetricsSerializer,
+    SearchQuerySerializer,
+    SearchResultSerializer
 )
-from django.db.models import Count
-from datetime import datetime
+from .filters import ProjectFilter
+from .metrics import get_dashboard_metrics
+from .search import search
 
 class DashboardMetricsView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = DashboardMetricsSerializer
 
     def get(self, request):
-        metrics = {
-            'member_count': Member.objects.filter(status='Active').count(),
-            'observer_count': Member.objects.filter(status='Observer').count(),
-            'annual_budget': 8500000,
-            'active_projects': Project.objects.filter(status='Active').count(),
-            'compliance_rate': 87,
-            'growth_data': list(
-                Member.objects.values('since')
-                .annotate(count=Count('id'))
-                .order_by('since')
-            ),
-            'recent_activities': [
-                {
-                    'id': member.id,
-                    'text': f"{member.country} joined ADPA",
-                    'date': member.since
-                } 
-                for member in Member.objects.order_by('-since')[:5]
-            ]
-        }
-        serializer = self.get_serializer(metrics)
+        serializer = self.get_serializer(get_dashboard_metrics())
         return Response(serializer.data)
 
-class MemberListView(generics.ListAPIView):
+class MemberListView(PaginationModeMixin, generics.ListAPIView):
+    """Members; ?cursor= pages by keyset and ?count=approximate estimates the total."""
     permission_classes = [IsAuthenticated]
     queryset = Member.objects.all()
     serializer_class = MemberSerializer
+    keyset_ordering = ('id',)
 
-class ProjectListView(generics.ListAPIView):
+class ProjectListView(PaginationModeMixin, generics.ListAPIView):
+    """Projects, optionally filtered with ?country=<name>."""
     permission_classes = [IsAuthenticated]
-    queryset = Project.objects.all()
+    queryset = Project.objects.prefetch_related('project_countries').order_by('id')
     serializer_class = ProjectSerializer
+    filterset_class = ProjectFilter
+    keyset_ordering = ('id',)
 
-class DocumentListView(generics.ListAPIView):
+class DocumentListView(PaginationModeMixin, generics.ListAPIView):
+    """Documents; ?cursor= pages newest first."""
     permission_classes = [IsAuthenticated]
     queryset = Document.objects.all()
     serializer_class = DocumentSerializer
 
-class EventListView(generics.ListAPIView):
+class EventListView(PaginationModeMixin, generics.ListAPIView):
+    """Upcoming events, soonest first; ?cursor= pages by keyset instead of page number"""
     permission_classes = [IsAuthenticated]
     serializer_class = EventSerializer
+    keyset_pagination_class = EventKeysetPagination
 
     def get_queryset(self):
-        return Event.objects.filter(
-            start_date__gte=datetime.now()
-        ).order_by('start_date')[:10]
\ No newline at end of file
+        return Event.objects.upcoming()
+
+class SearchView(generics.GenericAPIView):
+    """
+    Ranked full-text search across events, projects and documents.
+
+    ?q= is the search, ?type= (repeatable) limits it to event, project or
+    document results and ?limit= caps the results; see members.search.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = SearchResultSerializer
+    pagination_class = None
+
+    def get(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        results = search(
+            params.validated_data['q'],
+            types=sorted(params.validated_data.get('type') or []),
+            limit=params.validated_data.get('limit')
+        )
+        return Response({'results': self.get_serializer(results, many=True).data})
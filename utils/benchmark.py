@@ -0,0 +1,42 @@
+"""
+Helpers shared by the benchmark_* management commands.
+
+Benchmarks create their rows inside rolled_back(), so nothing they write
+is kept, and time their work with measure().
+"""
+
+import time
+from contextlib import contextmanager
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def measure(func, repeat=1):
+    """
+    Call func repeat times and return the best time in seconds, the number
+    of queries and the result of the last call.
+    """
+    best = None
+    reset_queries()
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(captured.captured_queries), result
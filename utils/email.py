@@ -5,6 +5,7 @@ from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from .models import EmailLog
+from emailutils.utils import queue_templated_email
 
 def send_templated_email(
     template_name,
@@ -70,12 +71,12 @@ def send_templated_email(
         return False, str(e)
 
 def send_welcome_email(user):
-    """Send welcome email to new users."""
+    """Queue welcome email to new users."""
     context = {
         'user': user,
         'portal_link': f"{settings.SITE_URL}/dashboard/"
     }
-    return send_templated_email(
+    return queue_templated_email(
         'welcome',
         context,
         'Welcome to ADPA!',
@@ -83,13 +84,13 @@ def send_welcome_email(user):
     )
 
 def send_password_reset_email(user, reset_token):
-    """Send password reset email."""
+    """Queue password reset email."""
     context = {
         'user': user,
         'reset_url': f"{settings.SITE_URL}/reset-password/{reset_token}/",
         'expiry_hours': 24
     }
-    return send_templated_email(
+    return queue_templated_email(
         'password_reset',
         context,
         'Reset Your ADPA Password',
@@ -97,14 +98,14 @@ def send_password_reset_email(user, reset_token):
     )
 
 def send_event_registration_email(user, event, calendar_links):
-    """Send event registration confirmation."""
+    """Queue event registration confirmation."""
     context = {
         'user': user,
         'event': event,
         'event_details_url': f"{settings.SITE_URL}/events/{event.id}/",
         'calendar_links': calendar_links
     }
-    return send_templated_email(
+    return queue_templated_email(
         'event_registration',
         context,
         f'Registration Confirmed: {event.title}',